@@ -0,0 +1,248 @@
+"""
+Script to benchmark the data processing pipeline of process_single_ir_test_folders.py.
+
+Reports files/s, MB/s and peak memory of each stage:
+    discovery   Finding the test data files in the cell folders.
+    load        Loading the IR test logs (only the columns the IR calculation needs).
+    ir          Calculating the internal resistance of already loaded IR test logs.
+    ocv         Reading the OCV of the Rest logs.
+    write       Saving the processed data file.
+    end-to-end  Processing every file with process_test_files, for each worker count.
+
+Peak memory is the peak traced Python/numpy allocation of a stage, measured
+with tracemalloc in a separate run so it doesn't slow down the timed run.
+
+Benchmarks an existing directory of cell data, or generates a synthetic one
+with generate_synthetic_cells.py if no directory is given, e.g.:
+    python benchmark_processing.py --cells 10000 --samples 2000 --workers 1 4 8
+Results can be saved with --json to compare against later runs. The
+synthetic directory is removed afterwards unless --keep is given.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import log_format
+import process_single_ir_test_folders as processing
+from generate_synthetic_cells import generate_cell_tree
+
+STAGE_COLUMNS = ["Stage", "Files", "MB", "Seconds", "Files/s", "MB/s", "Peak MB"]
+
+def test_type_files(files: list, test_type: str) -> list:
+    """
+    Gets the test data files of one test type.
+
+    Args:
+        files (list): Paths of the test data files.
+        test_type (str): Test type, e.g. "Rest".
+
+    Returns:
+        list: Paths of the files of the test type.
+    """
+    return [f for f in files if processing.parse_file_name(f)[1] == test_type]
+
+def total_size(files: list) -> int:
+    """
+    Gets the total size of a list of files.
+
+    Args:
+        files (list): Paths of the files.
+
+    Returns:
+        int: Total size in bytes.
+    """
+    return sum(os.path.getsize(f) for f in files)
+
+def run_stage(name: str, func, files: list, repeat: int = 1, memory: bool = True) -> dict:
+    """
+    Times a stage and measures its peak memory.
+    func returns the time spent in the part of the stage being measured,
+    or None to time the whole call.
+
+    Args:
+        name (str): Stage name.
+        func (callable): Function running the stage once.
+        files (list): Files the stage works on, for files/s and MB/s.
+        repeat (int): Number of timed runs, the fastest is reported.
+        memory (bool): True to measure peak memory in an extra run.
+
+    Returns:
+        dict: Results of the stage by STAGE_COLUMNS.
+    """
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        elapsed = func()
+        if elapsed is None:
+            elapsed = time.perf_counter() - start
+        seconds = min(seconds, elapsed)
+
+    peak = float("nan")
+    if memory:
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    megabytes = total_size(files) / 1e6
+    return {
+        "Stage": name,
+        "Files": len(files),
+        "MB": megabytes,
+        "Seconds": seconds,
+        "Files/s": len(files) / seconds if seconds > 0 else float("inf"),
+        "MB/s": megabytes / seconds if seconds > 0 else float("inf"),
+        "Peak MB": peak,
+    }
+
+def benchmark(
+    folder: str,
+    workers: list,
+    repeat: int = 1,
+    memory: bool = True,
+    chunked: bool = False
+) -> list:
+    """
+    Benchmarks every stage of the pipeline on a directory of cell data.
+
+    Args:
+        folder (str): Directory of cell data.
+        workers (list): Worker counts to run the end-to-end stage with.
+        repeat (int): Number of timed runs per stage.
+        memory (bool): True to measure peak memory.
+        chunked (bool): True to reduce IR tests in chunks.
+
+    Returns:
+        list: Results of each stage.
+    """
+    files = processing.find_test_files(folder)
+    ir_files = test_type_files(files, "Single_IR_Test")
+    rest_files = test_type_files(files, "Rest")
+    cell_dict = processing.process_test_files(files, 1, chunked)
+    out_dir = tempfile.TemporaryDirectory()
+    out_folder = out_dir.name
+
+    def discovery():
+        processing.find_test_files(folder)
+
+    def load():
+        for f in ir_files:
+            log_format.load_log(f, log_format.IR_COLUMNS)
+
+    def ir():
+        elapsed = 0
+        for f in ir_files:
+            if chunked:
+                start = time.perf_counter()
+                processing.process_ir_test_chunked(f)
+            else:
+                df = log_format.load_log(f, log_format.IR_COLUMNS)
+                start = time.perf_counter()
+                processing.process_single_ir_test(df)
+            elapsed += time.perf_counter() - start
+        return elapsed
+
+    def ocv():
+        for f in rest_files:
+            log_format.read_first_value(f, 'Voltage')
+
+    def write():
+        processing.write_processed_data(out_folder, cell_dict)
+
+    def end_to_end(num_workers):
+        processing.process_test_files(files, num_workers, chunked)
+
+    with out_dir:
+        results = [
+            run_stage("discovery", discovery, files, repeat, memory),
+            run_stage("load", load, ir_files, repeat, memory),
+            run_stage("ir", ir, ir_files, repeat, memory),
+            run_stage("ocv", ocv, rest_files, repeat, memory),
+            run_stage("write", write, files, repeat, memory),
+        ]
+    for num_workers in workers:
+        results.append(run_stage(
+            f"end-to-end ({num_workers} workers)",
+            lambda: end_to_end(num_workers),
+            files,
+            repeat,
+            # Worker process memory isn't traced, only measure serial runs.
+            memory and num_workers == 1,
+        ))
+    return results
+
+def print_results(results: list) -> None:
+    """
+    Prints the results of each stage as a table.
+
+    Args:
+        results (list): Results of each stage.
+    """
+    width = max(len(r["Stage"]) for r in results)
+    print(f"{STAGE_COLUMNS[0]:<{width}}" + "".join(f"{c:>11}" for c in STAGE_COLUMNS[1:]))
+    for r in results:
+        print(
+            f"{r['Stage']:<{width}}{r['Files']:>11}{r['MB']:>11.2f}{r['Seconds']:>11.4f}"
+            f"{r['Files/s']:>11.1f}{r['MB/s']:>11.2f}{r['Peak MB']:>11.2f}"
+        )
+
+def main(argv=None) -> int:
+    """
+    Runs the benchmark from the command line.
+
+    Args:
+        argv (list): Arguments, None to use sys.argv.
+
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the data processing pipeline.")
+    parser.add_argument(
+        "folder", nargs="?",
+        help="Directory of cell data. A synthetic one is generated if not given."
+    )
+    parser.add_argument(
+        "--cells", type=int, default=1000, help="Synthetic cells to generate (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--samples", type=int, default=1000, help="Samples per synthetic log (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, processing.NUM_WORKERS],
+        help="Worker counts for the end-to-end stage (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Timed runs per stage (default: %(default)s)."
+    )
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Skip peak memory runs.")
+    parser.add_argument("--chunked", action="store_true", help="Reduce IR tests in chunks.")
+    parser.add_argument("--json", help="Save the results to a json file.")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic directory.")
+    args = parser.parse_args(argv)
+
+    folder = args.folder
+    generated = folder is None
+    if generated:
+        folder = tempfile.mkdtemp(prefix="synthetic_cells_")
+    try:
+        if generated:
+            size = generate_cell_tree(folder, args.cells, args.samples)
+            print(f"Generated {args.cells} cells, {size / 1e6:.1f} MB in {folder}")
+        results = benchmark(folder, sorted(set(args.workers)), args.repeat, args.memory, args.chunked)
+    finally:
+        if generated and not args.keep:
+            shutil.rmtree(folder, ignore_errors=True)
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w', encoding="utf-8") as file:
+            json.dump({"folder": folder, "results": results}, file, indent=1)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
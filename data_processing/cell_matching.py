@@ -0,0 +1,239 @@
+"""
+Script to match processed cells into parallel groups for pack assembly.
+
+Takes the "Processed Data.csv" (or .json) output of
+process_single_ir_test_folders.py and builds a pack of SERIES groups with
+PARALLEL cells each:
+
+1. Cells are selected to minimize the spread within the pack. If an OCV
+   tolerance is given, only cells in the densest OCV window of that width
+   are used. Out of those, the SERIES * PARALLEL cells in the narrowest
+   internal resistance window are selected.
+2. The selected cells are sorted by internal resistance and dealt into the
+   groups in serpentine order (1, 2, ..., S, S, ..., 2, 1, 1, 2, ...), so every
+   group gets a similar mix of cells and the groups' combined (parallel)
+   resistances are balanced.
+   With the "sorted" method, consecutive cells are grouped instead, which
+   minimizes the spread within each group but not across groups.
+
+Groups are only balanced on internal resistance. OCV is only filtered by
+the tolerance window in step 1 and isn't balanced: the OCV spread within
+a group can be anything up to the tolerance (or the spread of every cell
+without one). Set --ocv-tolerance to the largest OCV spread acceptable
+in a parallel group, and check "OCV Spread [V]" in "Group Quality.csv".
+
+Both steps only sort and index arrays, so 10k+ cells are matched in well under a second.
+The groups are saved to "Cell Groups.csv" and their quality to "Group Quality.csv".
+
+Example:
+    python cell_matching.py "Processed Data.csv" --series 24 --parallel 8 --ocv-tolerance 0.01
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+CELL_COLUMN = "Cell Number"
+IR_COLUMN = "Internal Resistance [Ohms]"
+OCV_COLUMN = "Open Circuit Voltage [V]"
+METHODS = ("serpentine", "sorted")
+
+def load_processed_data(path: str) -> pd.DataFrame:
+    """
+    Loads processed cell data, dropping cells without a valid internal resistance or OCV.
+
+    Args:
+        path (str): Path of "Processed Data.csv" or "Processed Data.json".
+
+    Returns:
+        pd.DataFrame: Cell number, internal resistance and OCV of each cell.
+    """
+    if os.path.splitext(path)[1].lower() == ".json":
+        df = pd.read_json(path)
+    else:
+        df = pd.read_csv(path)
+    df = df[[CELL_COLUMN, IR_COLUMN, OCV_COLUMN]]
+    valid = (df[IR_COLUMN] > 0) & (df[OCV_COLUMN] > 0)
+    return df[valid].reset_index(drop=True)
+
+def densest_window(values, width: float) -> np.ndarray:
+    """
+    Finds the values that fall in the window of a given width containing the most values.
+
+    Args:
+        values (array): Values to search.
+        width (float): Width of the window.
+
+    Returns:
+        np.ndarray: Indices of the values in the window.
+    """
+    order = np.argsort(values, kind="stable")
+    sorted_values = np.asarray(values)[order]
+    # Number of values in the window starting at each value.
+    ends = np.searchsorted(sorted_values, sorted_values + width, side="right")
+    start = int(np.argmax(ends - np.arange(len(sorted_values))))
+    return order[start:ends[start]]
+
+def narrowest_window(values, count: int) -> np.ndarray:
+    """
+    Finds the given number of values with the smallest range.
+
+    Args:
+        values (array): Values to search.
+        count (int): Number of values to select.
+
+    Returns:
+        np.ndarray: Indices of the selected values, sorted by value.
+    """
+    order = np.argsort(values, kind="stable")
+    sorted_values = np.asarray(values)[order]
+    ranges = sorted_values[count - 1:] - sorted_values[:len(sorted_values) - count + 1]
+    start = int(np.argmin(ranges))
+    return order[start:start + count]
+
+def match_cells(
+    ir,
+    ocv,
+    series: int,
+    parallel: int,
+    method: str = "serpentine",
+    ocv_tolerance: float = None
+) -> np.ndarray:
+    """
+    Selects cells and matches them into series groups of parallel cells.
+    Groups are balanced on internal resistance only, the OCV spread within
+    a group is only limited by ocv_tolerance.
+
+    Args:
+        ir (array): Internal resistance of each cell in ohms.
+        ocv (array): OCV of each cell in volts.
+        series (int): Number of groups in series.
+        parallel (int): Number of cells in parallel in each group.
+        method (str): "serpentine" to balance the groups, "sorted" to group consecutive cells.
+        ocv_tolerance (float): Maximum OCV spread of the selected cells in volts, None for no limit.
+
+    Returns:
+        np.ndarray: Cell indices of each group, shape (series, parallel).
+            Each row is sorted by internal resistance.
+    """
+    ir = np.asarray(ir, dtype=float)
+    ocv = np.asarray(ocv, dtype=float)
+    count = series * parallel
+
+    candidates = np.arange(len(ir))
+    if ocv_tolerance is not None:
+        candidates = densest_window(ocv, ocv_tolerance)
+    if len(candidates) < count:
+        raise ValueError(
+            f"{count} cells needed for {series}s{parallel}p, only {len(candidates)} available."
+        )
+    selected = candidates[narrowest_window(ir[candidates], count)]
+    # Sort by internal resistance, then OCV for ties.
+    selected = selected[np.lexsort((ocv[selected], ir[selected]))]
+
+    if method == "sorted":
+        return selected.reshape(series, parallel)
+    if method != "serpentine":
+        raise ValueError(f"Unknown method {method}, use one of {METHODS}.")
+    rounds = selected.reshape(parallel, series).copy()
+    rounds[1::2] = rounds[1::2, ::-1]
+    return rounds.T
+
+def group_quality(groups: np.ndarray, ir, ocv) -> pd.DataFrame:
+    """
+    Calculates the quality of each group.
+
+    Args:
+        groups (np.ndarray): Cell indices of each group from match_cells.
+        ir (array): Internal resistance of each cell in ohms.
+        ocv (array): OCV of each cell in volts.
+
+    Returns:
+        pd.DataFrame: One row per group with the mean, minimum, maximum and spread
+            of the internal resistance, the combined (parallel) resistance
+            and the mean and spread of the OCV.
+    """
+    group_ir = np.asarray(ir, dtype=float)[groups]
+    group_ocv = np.asarray(ocv, dtype=float)[groups]
+    return pd.DataFrame({
+        "Group": np.arange(1, len(groups) + 1),
+        "IR Mean [Ohms]": group_ir.mean(axis=1),
+        "IR Min [Ohms]": group_ir.min(axis=1),
+        "IR Max [Ohms]": group_ir.max(axis=1),
+        "IR Spread [Ohms]": np.ptp(group_ir, axis=1),
+        "Parallel IR [Ohms]": 1 / (1 / group_ir).sum(axis=1),
+        "OCV Mean [V]": group_ocv.mean(axis=1),
+        "OCV Spread [V]": np.ptp(group_ocv, axis=1),
+    })
+
+def summarize_quality(quality: pd.DataFrame) -> dict:
+    """
+    Summarizes the quality of all groups.
+
+    Args:
+        quality (pd.DataFrame): Quality of each group from group_quality.
+
+    Returns:
+        dict: Largest IR and OCV spread within a group, and the spread and
+            relative spread of the combined resistance across groups.
+    """
+    parallel_ir = quality["Parallel IR [Ohms]"]
+    return {
+        "Max IR Spread In Group [Ohms]": quality["IR Spread [Ohms]"].max(),
+        "Max OCV Spread In Group [V]": quality["OCV Spread [V]"].max(),
+        "Parallel IR Spread Across Groups [Ohms]": parallel_ir.max() - parallel_ir.min(),
+        "Parallel IR Imbalance [%]": 100 * (parallel_ir.max() - parallel_ir.min()) / parallel_ir.mean(),
+    }
+
+def main(argv=None) -> int:
+    """
+    Matches cells from the command line.
+
+    Args:
+        argv (list): Arguments, None to use sys.argv.
+
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(description="Match processed cells into parallel groups.")
+    parser.add_argument("processed_data", help="Path of \"Processed Data.csv\" or .json.")
+    parser.add_argument("-s", "--series", type=int, required=True, help="Number of groups in series.")
+    parser.add_argument("-p", "--parallel", type=int, required=True, help="Cells in parallel per group.")
+    parser.add_argument(
+        "--method", choices=METHODS, default="serpentine",
+        help="serpentine balances the groups, sorted groups consecutive cells (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--ocv-tolerance", type=float,
+        help="Maximum OCV spread of the selected cells in volts, which also limits "
+        "the OCV spread within each group (OCV isn't balanced otherwise)."
+    )
+    parser.add_argument("--output", help="Directory to save the results in (default: next to the input).")
+    args = parser.parse_args(argv)
+
+    df = load_processed_data(args.processed_data)
+    try:
+        groups = match_cells(
+            df[IR_COLUMN], df[OCV_COLUMN], args.series, args.parallel, args.method, args.ocv_tolerance
+        )
+    except ValueError as err:
+        print(err)
+        return 1
+
+    quality = group_quality(groups, df[IR_COLUMN], df[OCV_COLUMN])
+    assignments = df.iloc[groups.ravel()].reset_index(drop=True)
+    assignments.insert(0, "Group", np.repeat(np.arange(1, args.series + 1), args.parallel))
+
+    output = args.output or os.path.dirname(os.path.abspath(args.processed_data))
+    assignments.to_csv(os.path.join(output, "Cell Groups.csv"), index=False)
+    quality.to_csv(os.path.join(output, "Group Quality.csv"), index=False)
+    for name, value in summarize_quality(quality).items():
+        print(f"{name}: {value:.6g}")
+    print(f"Finished. Groups in {os.path.join(output, 'Cell Groups.csv')}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
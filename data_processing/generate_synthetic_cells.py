@@ -0,0 +1,178 @@
+"""
+Script to generate a synthetic directory of cell data for testing and
+benchmarking the data processing scripts.
+The directory is organized the same way process_single_ir_test_folders.py
+expects:
+
+SELECTED DIRECTORY
+----> 1 (cell number, folder)
+--------> logs (test logs, folder)
+--------> 1 Continuous_Step_Cycles Rest 2023-03-08 19-41-54.csv
+--------> 1 Continuous_Step_Cycles Single_IR_Test 2023-03-08 19-41-55.csv
+----> 2
+--------> ...
+
+Each cell gets a random internal resistance and OCV, which are saved to
+"Synthetic Cells.csv" so processed results can be checked against them.
+
+Example:
+    python generate_synthetic_cells.py /tmp/synthetic --cells 10000 --samples 2000
+"""
+
+import argparse
+import csv
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+LOG_COLUMNS = [
+    "Timestamp",
+    "Voltage",
+    "Current",
+    "Data_Timestamp",
+    "Data_Timestamp_From_Step_Start",
+]
+TRUTH_FILE = "Synthetic Cells.csv"
+START_TIME = datetime(2023, 3, 8, 19, 41, 54)
+
+def write_log(path: str, start_time: datetime, step_time, volt, curr, sample_period: float) -> int:
+    """
+    Writes a test log in the csv format of the test scripts.
+
+    Args:
+        path (str): Path of the log.
+        start_time (datetime): Time of the first sample.
+        step_time (array): Data_Timestamp_From_Step_Start of every sample.
+        volt (array): Voltage of every sample.
+        curr (array): Current of every sample.
+        sample_period (float): Time between samples in seconds.
+
+    Returns:
+        int: Size of the log in bytes.
+    """
+    data_time = np.arange(len(step_time)) * sample_period
+    timestamp = start_time.timestamp() + data_time
+    data = np.column_stack((timestamp, volt, curr, data_time, step_time))
+    np.savetxt(
+        path,
+        data,
+        fmt=["%.6f", "%.6f", "%.6f", "%.3f", "%.3f"],
+        delimiter=",",
+        header=",".join(LOG_COLUMNS),
+        comments="",
+    )
+    return os.path.getsize(path)
+
+def generate_cell(
+    folder: str,
+    cell_num: int,
+    samples: int,
+    rng: np.random.Generator,
+    ir_steps: int = 2,
+    sample_period: float = 0.1
+) -> tuple:
+    """
+    Generates the Rest and Single_IR_Test logs of one cell.
+
+    Args:
+        folder (str): Directory to create the cell folder in.
+        cell_num (int): Cell number.
+        samples (int): Number of samples per log.
+        rng (np.random.Generator): Random number generator.
+        ir_steps (int): Number of current steps in the IR test.
+        sample_period (float): Time between samples in seconds.
+
+    Returns:
+        tuple: Internal resistance in ohms, OCV in volts and total size of the logs in bytes.
+    """
+    cell_folder = os.path.join(folder, str(cell_num))
+    os.makedirs(os.path.join(cell_folder, "logs"), exist_ok=True)
+    ir = rng.normal(0.025, 0.003)
+    ocv = rng.normal(3.9, 0.05)
+    start = START_TIME + timedelta(minutes=cell_num)
+    size = 0
+
+    # Rest: open circuit voltage with measurement noise.
+    rest_time = np.arange(samples) * sample_period
+    rest_volt = ocv + rng.normal(0, 0.0002, samples)
+    name = f"{cell_num} Continuous_Step_Cycles Rest {start:%Y-%m-%d %H-%M-%S}.csv"
+    size += write_log(
+        os.path.join(cell_folder, name), start, rest_time, rest_volt, np.zeros(samples), sample_period
+    )
+
+    # IR test: discharge current steps, with the first sample of each step still settling.
+    step_samples = np.diff(np.linspace(0, samples, ir_steps + 1).astype(int))
+    step_curr = -np.linspace(1.0, 5.0, ir_steps)
+    curr = np.repeat(step_curr, step_samples) + rng.normal(0, 0.001, samples)
+    step_starts = np.concatenate(([0], np.cumsum(step_samples)[:-1]))
+    curr[step_starts] *= 0.5
+    volt = ocv + ir * curr + rng.normal(0, 0.0002, samples)
+    step_time = (np.arange(samples) - np.repeat(step_starts, step_samples)) * sample_period
+    start += timedelta(seconds=1)
+    name = f"{cell_num} Continuous_Step_Cycles Single_IR_Test {start:%Y-%m-%d %H-%M-%S}.csv"
+    size += write_log(os.path.join(cell_folder, name), start, step_time, volt, curr, sample_period)
+
+    return ir, ocv, size
+
+def generate_cell_tree(
+    folder: str,
+    num_cells: int,
+    samples: int,
+    seed: int = 0,
+    ir_steps: int = 2
+) -> int:
+    """
+    Generates a synthetic directory of cell data.
+
+    Args:
+        folder (str): Directory to generate the cell folders in.
+        num_cells (int): Number of cells.
+        samples (int): Number of samples per log.
+        seed (int): Random seed, the same seed gives the same data.
+        ir_steps (int): Number of current steps in each IR test.
+
+    Returns:
+        int: Total size of the generated logs in bytes.
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    total_size = 0
+    with open(os.path.join(folder, TRUTH_FILE), 'w', newline='', encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Cell Number", "Internal Resistance [Ohms]", "Open Circuit Voltage [V]"])
+        for cell_num in range(1, num_cells + 1):
+            ir, ocv, size = generate_cell(folder, cell_num, samples, rng, ir_steps)
+            writer.writerow([cell_num, ir, ocv])
+            total_size += size
+    return total_size
+
+def main(argv=None) -> int:
+    """
+    Generates a synthetic directory of cell data from the command line.
+
+    Args:
+        argv (list): Arguments, None to use sys.argv.
+
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(description="Generate a synthetic directory of cell data.")
+    parser.add_argument("folder", help="Directory to generate the cell folders in.")
+    parser.add_argument("--cells", type=int, default=100, help="Number of cells (default: %(default)s).")
+    parser.add_argument(
+        "--samples", type=int, default=1000, help="Samples per log (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--ir-steps", type=int, default=2, help="Current steps per IR test (default: %(default)s)."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: %(default)s).")
+    args = parser.parse_args(argv)
+
+    size = generate_cell_tree(args.folder, args.cells, args.samples, args.seed, args.ir_steps)
+    print(f"Generated {args.cells} cells, {size / 1e6:.1f} MB in {args.folder}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
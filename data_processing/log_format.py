@@ -0,0 +1,281 @@
+"""
+Loading and conversion of test logs.
+
+Test logs can be stored as csv files, or converted to a columnar binary
+format (feather or parquet) so they are loaded without parsing text.
+Converted logs are saved next to the original csv file with the same name,
+e.g. "1 Continuous_Step_Cycles Rest 2023-03-08 19-41-54.feather".
+
+Only the columns needed for a calculation are loaded (see IR_COLUMNS,
+OCV_COLUMNS and CYCLE_COLUMNS), with fixed dtypes from LOG_SCHEMA.
+Feather files are saved uncompressed so they can be memory-mapped.
+read_first_value and iter_log_chunks read logs without loading the whole
+file, for values that only need the first row or can be reduced in chunks.
+
+pyarrow is required for feather and parquet files.
+pandas and pyarrow are imported when first used, to keep startup fast.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+TIME_COLUMN = "Data_Timestamp_From_Step_Start"
+IR_COLUMNS = [TIME_COLUMN, "Voltage", "Current"]
+OCV_COLUMNS = ["Voltage"]
+CYCLE_COLUMNS = [TIME_COLUMN, "Voltage", "Current"]
+
+# dtypes of the log columns used for calculations.
+LOG_SCHEMA = {
+    TIME_COLUMN: "float64",
+    "Voltage": "float64",
+    "Current": "float64",
+}
+# Halves the size of voltage and current columns, at about 7 significant digits.
+COMPACT_SCHEMA = {
+    TIME_COLUMN: "float64",
+    "Voltage": "float32",
+    "Current": "float32",
+}
+
+# Rows per chunk when reading logs in chunks.
+CHUNK_SIZE = 65536
+
+CSV_EXTENSION = ".csv"
+COLUMNAR_EXTENSIONS = {
+    "feather": ".feather",
+    "parquet": ".parquet",
+}
+LOG_EXTENSIONS = (CSV_EXTENSION,) + tuple(COLUMNAR_EXTENSIONS.values())
+
+def is_log_file(name: str) -> bool:
+    """
+    Checks if a file name is a test log in a supported format.
+
+    Args:
+        name (str): File name.
+
+    Returns:
+        bool: True for csv, feather and parquet files.
+    """
+    return os.path.splitext(name)[1].lower() in LOG_EXTENSIONS
+
+def log_name(path: str) -> str:
+    """
+    Gets the name identifying a test log, the same for its csv file,
+    converted logs and aggregated copy.
+
+    Args:
+        path (str): Path of the log.
+
+    Returns:
+        str: File name without extension or "Continuous_Step_Cycles ",
+            e.g. "1 Rest 2023-03-08 19-41-54".
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name.replace("Continuous_Step_Cycles ", "")
+
+def columnar_path(csv_path: str, fmt: str = "feather") -> str:
+    """
+    Gets the path a csv log is converted to.
+
+    Args:
+        csv_path (str): Path of the csv log.
+        fmt (str): Columnar format, "feather" or "parquet".
+
+    Returns:
+        str: Path of the converted log.
+    """
+    return os.path.splitext(csv_path)[0] + COLUMNAR_EXTENSIONS[fmt]
+
+def schema_dtypes(columns=None, compact: bool = False) -> dict:
+    """
+    Gets the dtypes of the known columns in a list of columns.
+
+    Args:
+        columns (list): Column names, None for all known columns.
+        compact (bool): True to use float32 voltage and current.
+
+    Returns:
+        dict: dtype by column name.
+    """
+    schema = COMPACT_SCHEMA if compact else LOG_SCHEMA
+    if columns is None:
+        return dict(schema)
+    return {c: schema[c] for c in columns if c in schema}
+
+def load_log(path: str, columns=None) -> "pd.DataFrame":
+    """
+    Loads a test log, reading only the given columns.
+    Feather files are memory-mapped.
+
+    Args:
+        path (str): Path of the log, csv, feather or parquet.
+        columns (list): Columns to load, None for all columns.
+
+    Returns:
+        pd.DataFrame: Test log data.
+    """
+    import pandas as pd
+    ext = os.path.splitext(path)[1].lower()
+    if ext == COLUMNAR_EXTENSIONS["feather"]:
+        from pyarrow import feather
+        table = feather.read_table(path, columns=columns, memory_map=True)
+        return table.to_pandas(split_blocks=True)
+    if ext == COLUMNAR_EXTENSIONS["parquet"]:
+        return pd.read_parquet(path, columns=columns, memory_map=True)
+    return pd.read_csv(path, usecols=columns, dtype=schema_dtypes(columns))
+
+def read_first_value(path: str, column: str) -> float:
+    """
+    Reads the value of a column in the first row of a test log, without
+    reading the rest of the file.
+
+    Args:
+        path (str): Path of the log, csv, feather or parquet.
+        column (str): Column name.
+
+    Returns:
+        float: Value in the first row.
+    """
+    import pandas as pd
+    ext = os.path.splitext(path)[1].lower()
+    if ext == COLUMNAR_EXTENSIONS["feather"]:
+        from pyarrow import feather
+        table = feather.read_table(path, columns=[column], memory_map=True)
+        return table.column(column)[0].as_py()
+    if ext == COLUMNAR_EXTENSIONS["parquet"]:
+        from pyarrow import parquet
+        batch = next(parquet.ParquetFile(path).iter_batches(batch_size=1, columns=[column]))
+        return batch.column(0)[0].as_py()
+    df = pd.read_csv(path, usecols=[column], nrows=1, dtype=schema_dtypes([column]))
+    return df[column].iloc[0]
+
+def iter_log_chunks(path: str, columns=None, chunksize: int = CHUNK_SIZE):
+    """
+    Reads a test log in chunks of rows, so only one chunk is in memory at a time.
+
+    Args:
+        path (str): Path of the log, csv, feather or parquet.
+        columns (list): Columns to load, None for all columns.
+        chunksize (int): Number of rows per chunk. Feather files are read
+            in the record batches they were written with.
+
+    Yields:
+        pd.DataFrame: Chunk of test log data.
+    """
+    import pandas as pd
+    ext = os.path.splitext(path)[1].lower()
+    if ext == COLUMNAR_EXTENSIONS["feather"]:
+        import pyarrow as pa
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if columns is not None:
+                    batch = batch.select(columns)
+                yield batch.to_pandas()
+    elif ext == COLUMNAR_EXTENSIONS["parquet"]:
+        from pyarrow import parquet
+        for batch in parquet.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        with pd.read_csv(
+            path, usecols=columns, dtype=schema_dtypes(columns), chunksize=chunksize
+        ) as reader:
+            for chunk in reader:
+                yield chunk
+
+def convert_log(csv_path: str, fmt: str = "feather", compact: bool = False) -> str:
+    """
+    Converts a csv log to a columnar format.
+    All columns are kept, with the known columns stored as fixed dtypes.
+
+    Args:
+        csv_path (str): Path of the csv log.
+        fmt (str): Columnar format, "feather" or "parquet".
+        compact (bool): True to store voltage and current as float32.
+
+    Returns:
+        str: Path of the converted log.
+    """
+    import pandas as pd
+    dst = columnar_path(csv_path, fmt)
+    header = pd.read_csv(csv_path, nrows=0).columns
+    df = pd.read_csv(csv_path, dtype=schema_dtypes(header, compact))
+    # Write to a temporary file first so a partial file is never picked up as a log.
+    tmp = dst + ".tmp"
+    if fmt == "feather":
+        df.to_feather(tmp, compression="uncompressed")
+    else:
+        df.to_parquet(tmp, index=False)
+    os.replace(tmp, dst)
+    return dst
+
+def needs_conversion(csv_path: str, fmt: str = "feather") -> bool:
+    """
+    Checks if a csv log has no converted log, or has changed since it was converted.
+
+    Args:
+        csv_path (str): Path of the csv log.
+        fmt (str): Columnar format, "feather" or "parquet".
+
+    Returns:
+        bool: True if the csv log should be converted.
+    """
+    dst = columnar_path(csv_path, fmt)
+    return not os.path.exists(dst) or os.path.getmtime(dst) < os.path.getmtime(csv_path)
+
+def convert_logs(files: list, fmt: str = "feather", compact: bool = False, workers: int = 1) -> list:
+    """
+    Converts the csv logs in a list of files that need converting.
+
+    Args:
+        files (list): Paths of the test logs. Files that are not csv are ignored.
+        fmt (str): Columnar format, "feather" or "parquet".
+        compact (bool): True to store voltage and current as float32.
+        workers (int): Number of worker processes, 1 to convert serially.
+
+    Returns:
+        list: Paths of the converted logs.
+    """
+    to_convert = [
+        f for f in files
+        if os.path.splitext(f)[1].lower() == CSV_EXTENSION and needs_conversion(f, fmt)
+    ]
+    if workers > 1 and len(to_convert) > 1:
+        chunksize = max(1, len(to_convert) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                convert_log,
+                to_convert,
+                [fmt] * len(to_convert),
+                [compact] * len(to_convert),
+                chunksize=chunksize,
+            ))
+    return [convert_log(f, fmt, compact) for f in to_convert]
+
+def prefer_columnar(files: list) -> list:
+    """
+    Replaces csv logs with their converted log when there is an up to date one.
+    Each log is only listed once, in its fastest available format.
+
+    Args:
+        files (list): Paths of the test logs.
+
+    Returns:
+        list: Sorted paths of the logs to load.
+    """
+    by_stem = {}
+    for f in files:
+        by_stem.setdefault(os.path.splitext(f)[0], []).append(f)
+
+    selected = []
+    for stem, paths in by_stem.items():
+        csv_path = stem + CSV_EXTENSION
+        columnar = [
+            p for p in paths
+            if p != csv_path
+            and (csv_path not in paths or os.path.getmtime(p) >= os.path.getmtime(csv_path))
+        ]
+        selected.append(sorted(columnar)[0] if columnar else sorted(paths)[0])
+    return sorted(selected)
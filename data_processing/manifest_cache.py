@@ -0,0 +1,157 @@
+"""
+Manifest cache for processed test data files.
+
+Stores the size, modification time and optionally a content hash of every
+processed test data file together with its calculated result, so reruns
+only process files that are new or have changed.
+The manifest is saved as "Processed Data Manifest.json" in the selected directory.
+The processing options the results were calculated with are saved with
+them, and the manifest is discarded when the options change.
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = "Processed Data Manifest.json"
+MANIFEST_VERSION = 2
+HASH_BLOCK_SIZE = 1 << 20
+
+def file_hash(path: str) -> str:
+    """
+    Calculates the SHA-256 hash of the contents of a file.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+def file_signature(path: str) -> dict:
+    """
+    Gets the size and modification time of a file.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        dict: File size in bytes and modification time in nanoseconds.
+    """
+    stat = os.stat(path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+def manifest_key(folder: str, path: str) -> str:
+    """
+    Gets the manifest key of a file, its path relative to the selected directory.
+
+    Args:
+        folder (str): Selected directory.
+        path (str): Path of the file.
+
+    Returns:
+        str: Relative path using forward slashes.
+    """
+    return os.path.relpath(path, folder).replace(os.sep, "/")
+
+def load_manifest(folder: str, options: dict = None) -> dict:
+    """
+    Loads the manifest of a directory.
+    A missing, unreadable or outdated manifest, or one saved with other
+    processing options, is treated as empty, which makes every file get
+    processed again.
+
+    Args:
+        folder (str): Selected directory.
+        options (dict): Processing options the results must have been calculated with.
+
+    Returns:
+        dict: Manifest entries by manifest key.
+    """
+    manifest_file = os.path.join(folder, MANIFEST_NAME)
+    try:
+        with open(manifest_file, 'r', encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    if manifest.get("options", {}) != (options or {}):
+        return {}
+    return manifest.get("files", {})
+
+def save_manifest(folder: str, entries: dict, options: dict = None) -> None:
+    """
+    Saves the manifest of a directory.
+    Writes to a temporary file first so an interrupted run never leaves
+    a partially written manifest.
+
+    Args:
+        folder (str): Selected directory.
+        entries (dict): Manifest entries by manifest key.
+        options (dict): Processing options the results were calculated with.
+    """
+    manifest_file = os.path.join(folder, MANIFEST_NAME)
+    tmp_file = manifest_file + ".tmp"
+    with open(tmp_file, 'w', encoding="utf-8") as file:
+        json.dump(
+            {"version": MANIFEST_VERSION, "options": options or {}, "files": entries},
+            file,
+            indent=1,
+            sort_keys=True,
+            default=float,
+        )
+    os.replace(tmp_file, manifest_file)
+
+def is_unchanged(entry: dict, path: str, signature: dict, use_hash: bool = False) -> bool:
+    """
+    Checks if a file matches its manifest entry.
+    Size and modification time are checked first. If they differ and
+    use_hash is set, the content hash is compared so files that were only
+    touched or copied are not processed again.
+    The entry is updated with the new signature when the hash matches.
+
+    Args:
+        entry (dict): Manifest entry of the file, None if there is none.
+        path (str): Path of the file.
+        signature (dict): Current signature of the file from file_signature.
+        use_hash (bool): True to compare content hashes when the signature differs.
+
+    Returns:
+        bool: True if the file has not changed since it was processed.
+    """
+    if entry is None:
+        return False
+    if entry["size"] == signature["size"] and entry["mtime_ns"] == signature["mtime_ns"]:
+        return True
+    if use_hash and entry.get("hash") is not None and entry["size"] == signature["size"]:
+        if file_hash(path) == entry["hash"]:
+            entry.update(signature)
+            return True
+    return False
+
+def make_entry(path: str, signature: dict, result: tuple, use_hash: bool = False) -> dict:
+    """
+    Creates the manifest entry of a processed file.
+
+    Args:
+        path (str): Path of the file.
+        signature (dict): Signature of the file from file_signature.
+        result (tuple): Calculated result of the file.
+        use_hash (bool): True to store the content hash of the file.
+
+    Returns:
+        dict: Manifest entry.
+    """
+    entry = dict(signature)
+    entry["hash"] = file_hash(path) if use_hash else None
+    entry["result"] = list(result)
+    return entry
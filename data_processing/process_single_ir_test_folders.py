@@ -7,6 +7,7 @@ SELECTED DIRECTORY
 --------> logs (test logs, folder)
 --------> 1 Continuous_Step_Cycles Rest 2023-03-08 19-41-54 (Rest test data, file)
 --------> 1 Continuous_Step_Cycles Single_IR_Test 2023-03-08 19-41-55 (IR test data, file)
+--------> 1 Continuous_Step_Cycles Cycle 2023-03-08 19-45-00 (charge/discharge data, file)
 --------> ANY OTHER FUTURE TEST DATA FOR CELL 1
 ----> 2
 --------> ...
@@ -14,17 +15,195 @@ SELECTED DIRECTORY
 --------> ...
 ----> ...
 
-Calculated data will be saved to a csv file named "Processed Data.csv".
+Calculated data will be saved to a csv file named "Processed Data.csv"
+(or "Processed Data.json" with the json output format).
+
+Run with one or more directories (or glob patterns) as arguments to process
+them without a display, e.g. for nightly processing of every tester:
+    python process_single_ir_test_folders.py "/data/tester*" --workers 8
+Without arguments, a dialog box is shown to select the directory.
+See --help for all options. The constants below are their defaults.
+
+Test files are processed in parallel across a pool of worker processes.
+Set NUM_WORKERS to 1 to process files one at a time.
+
+With INCREMENTAL set, test files are read in place from the cell folders
+instead of being copied into an "Aggregated Data" folder, and only new or
+changed files are processed. Results of unchanged files are taken from
+"Processed Data Manifest.json" (see manifest_cache.py).
+
+With CONVERT_FORMAT set, csv logs are first converted to a columnar format
+(see log_format.py) and the converted logs are loaded instead, reading only
+the columns each calculation needs.
+
+Charge, Discharge and Cycle files (CYCLE_TEST_TYPES) are integrated over
+time to get the capacity and energy of the cell, and the coulombic
+efficiency is calculated from the cell's charge and discharge capacity,
+whether they come from one file or separate ones. Positive current is
+charge and negative current is discharge. The averages, capacity and
+energy of each step of these files are saved to the "Step Data" folder,
+one csv file per test.
+
+The OCV of Rest files is read from the first row only. With CHUNKED set,
+IR tests are reduced in chunks (see step_accumulator.py) so memory use
+does not grow with the length of the log.
 """
 
 
+import argparse
 import csv
+import glob
+import json
 import os
 import shutil
 import re
-from tkinter.filedialog import askdirectory
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+
+# numpy, pandas and tkinter are imported where they are used, to keep
+# startup fast and allow running without a display.
+import log_format
+import manifest_cache
+
+# Number of worker processes used to process test files.
+NUM_WORKERS = os.cpu_count() or 1
+# Only process new or changed test files, reading them in place.
+INCREMENTAL = True
+# Compare content hashes of files whose size or modification time changed.
+HASH_FILES = False
+# Columnar format to convert csv logs to ("feather" or "parquet"), None to load csv logs.
+CONVERT_FORMAT = None
+# Store converted voltage and current as float32.
+CONVERT_COMPACT = False
+# Reduce IR tests in chunks of log_format.CHUNK_SIZE rows instead of loading whole files.
+CHUNKED = False
+
+# Test types processed by process_cycle_test.
+CYCLE_TEST_TYPES = ("Charge", "Discharge", "Cycle")
+# Folder of the step tables of cycle tests, in the selected directory.
+STEP_DATA_FOLDER = "Step Data"
+# Folders in the selected directory that aren't cell folders.
+OUTPUT_FOLDERS = ("Aggregated Data", STEP_DATA_FOLDER)
+
+OUTPUT_FORMATS = ("csv", "json", "sqlite")
+DATABASE_NAME = "Processed Data.db"
+# Column of each calculated value in the processed data file, after "Cell Number".
+PROCESSED_DATA_COLUMNS = {
+    "DC IR": "Internal Resistance [Ohms]",
+    "OCV": "Open Circuit Voltage [V]",
+    "Charge Capacity": "Charge Capacity [Ah]",
+    "Discharge Capacity": "Discharge Capacity [Ah]",
+    "Charge Energy": "Charge Energy [Wh]",
+    "Discharge Energy": "Discharge Energy [Wh]",
+    "Coulombic Efficiency": "Coulombic Efficiency",
+}
+
+def step_numbers(step_time) -> "np.ndarray":
+    """
+    Numbers the step of every row of test data.
+    Data_Timestamp_From_Step_Start goes from high back to low at the start
+    of every step, so all step boundaries are found in a single pass.
+
+    Args:
+        step_time (np.ndarray): Data_Timestamp_From_Step_Start values.
+
+    Returns:
+        np.ndarray: Step number of every row, starting from 0.
+    """
+    import numpy as np
+
+    step = np.zeros(len(step_time), dtype=np.int64)
+    np.cumsum(np.diff(step_time) < 0, out=step[1:])
+    return step
+
+def segment_steps(df) -> "pd.DataFrame":
+    """
+    Splits test data into its steps and calculates the mean voltage and
+    current of each step.
+    Data_Timestamp_From_Step_Start goes from high back to low at the start
+    of every step, so all step boundaries are found in a single pass.
+    The very first voltage and current measurement of each step is ignored
+    if possible, in case the current hasn't reached the set current yet.
 
-import pandas as pd
+    Args:
+        df (pd.DataFrame): Test data with Data_Timestamp_From_Step_Start,
+            Voltage and Current columns.
+
+    Returns:
+        pd.DataFrame: One row per step with the step number, index of the
+            first row of the step, number of samples, step duration and
+            mean voltage and current.
+    """
+    import numpy as np
+    import pandas as pd
+
+    step_time = df['Data_Timestamp_From_Step_Start'].to_numpy(dtype=float)
+    volt = df['Voltage'].to_numpy(dtype=float)
+    curr = df['Current'].to_numpy(dtype=float)
+    if len(step_time) == 0:
+        return pd.DataFrame(
+            columns=["Step", "Start Index", "Samples", "Duration", "Voltage", "Current"]
+        )
+
+    step = step_numbers(step_time)
+    samples = np.bincount(step)
+    num_steps = len(samples)
+    starts = np.concatenate(([0], np.cumsum(samples)[:-1]))
+    ends = starts + samples - 1
+
+    # Ignore first reading of a step unless it is the only reading.
+    keep = np.ones(len(step_time), dtype=bool)
+    keep[starts[samples > 1]] = False
+    kept_step = step[keep]
+    kept_samples = np.bincount(kept_step, minlength=num_steps)
+
+    return pd.DataFrame({
+        "Step": np.arange(num_steps),
+        "Start Index": starts,
+        "Samples": samples,
+        "Duration": step_time[ends],
+        "Voltage": np.bincount(kept_step, weights=volt[keep], minlength=num_steps) / kept_samples,
+        "Current": np.bincount(kept_step, weights=curr[keep], minlength=num_steps) / kept_samples,
+    })
+
+def least_squares_ir(steps: "pd.DataFrame") -> float:
+    """
+    Calculates the internal resistance as the least-squares slope of the
+    mean step voltages against the mean step currents.
+    For two steps this is the same as (v2 - v1) / (i2 - i1).
+
+    Args:
+        steps (pd.DataFrame): Step table from segment_steps.
+
+    Returns:
+        float: Internal resistance in ohms.
+    """
+    curr = steps['Current'].to_numpy(dtype=float)
+    volt = steps['Voltage'].to_numpy(dtype=float)
+    curr_dev = curr - curr.mean()
+    return float((curr_dev * (volt - volt.mean())).sum() / (curr_dev ** 2).sum())
+
+def process_multi_step_ir_test(df, printout = False) -> tuple:
+    """
+    Calculates the internal resistance for an IR test data file with any
+    number of current steps.
+
+    Args:
+        df (pd.DataFrame): IR test data.
+        printout (bool): True to print the result.
+
+    Returns:
+        tuple: Internal resistance in ohms and the step table from segment_steps.
+    """
+    steps = segment_steps(df)
+    dc_ir = least_squares_ir(steps)
+    if printout:
+        print(steps.to_string(index=False))
+        print(f"Internal Resistance: {dc_ir} Ohms, {dc_ir*1000} mOhms")
+
+    return dc_ir, steps
 
 # Function borrowed from Micah's GraphIV.py module, with a small edit.
 def process_single_ir_test(df, printout = False):
@@ -32,42 +211,112 @@ def process_single_ir_test(df, printout = False):
     Calculates the internal resistance for a single IR test data file.
     Mostly copied from Micah's GraphIV.py module, with a small edit
     to ignore the very first voltage and current measurement if possible.
+    Steps are found with segment_steps, so tests with more than two
+    current steps use the least-squares fit across all steps.
     """
-    #find index of last extry in first step
-    #Data_Timestamp_From_Step_Start goes from high back to low - diff is negative.
-    df['step_time_diff_single_step'] = df['Data_Timestamp_From_Step_Start'].diff().fillna(0)
-    row_index_2nd_step = df['step_time_diff_single_step'].argmin()
+    dc_ir, _ = process_multi_step_ir_test(df, printout)
+    return dc_ir
 
-    #split data into 1st step and 2nd step
-    df_1 = df.iloc[:row_index_2nd_step]
-    df_2 = df.iloc[row_index_2nd_step:]
+def process_ir_test_chunked(path: str, chunksize: int = log_format.CHUNK_SIZE) -> float:
+    """
+    Calculates the internal resistance for an IR test data file, reading
+    it in chunks so memory use stays constant however long the file is.
 
-    # Ignore first reading in case current draw hasn't reached the set current yet.
-    if len(df_1['Voltage']) > 1:
-        s1_v = df_1['Voltage'][1:].mean()
-        s1_i = df_1['Current'][1:].mean()
-    else:
-        s1_v = df_1['Voltage'][1:].mean()
-        s1_i = df_1['Current'][1:].mean()
+    Args:
+        path (str): Path of the IR test data file.
+        chunksize (int): Number of rows per chunk.
 
-    if len(df_2['Voltage']) > 1:
-        s2_v = df_2['Voltage'][1:].mean()
-        s2_i = df_2['Current'][1:].mean()
-    else:
-        s2_v = df_2['Voltage'].mean()
-        s2_i = df_2['Current'].mean()
+    Returns:
+        float: Internal resistance in ohms.
+    """
+    from step_accumulator import StepAccumulator
+
+    accumulator = StepAccumulator()
+    for chunk in log_format.iter_log_chunks(path, log_format.IR_COLUMNS, chunksize):
+        accumulator.add_chunk(
+            chunk['Data_Timestamp_From_Step_Start'].to_numpy(),
+            chunk['Voltage'].to_numpy(),
+            chunk['Current'].to_numpy(),
+        )
+    return least_squares_ir(accumulator.finish())
+
+def process_cycle_test(df, printout = False) -> tuple:
+    """
+    Calculates the capacity, energy and coulombic efficiency for a
+    charge/discharge test data file, and the averages of each step.
+    Current and power are integrated over time with the trapezoidal rule,
+    without integrating across step boundaries.
+    Positive current is charge, negative current is discharge.
 
-    #r = v/i
-    dc_ir = (s2_v - s1_v) / (s2_i - s1_i)
+    Args:
+        df (pd.DataFrame): Test data with Data_Timestamp_From_Step_Start
+            (in seconds), Voltage and Current columns.
+        printout (bool): True to print the results.
+
+    Returns:
+        tuple: Calculated values of the file and the step table.
+            Charge values are only included if the file has charge data,
+            discharge values only if it has discharge data, and coulombic
+            efficiency only if it has both.
+            The step table has one row per step with the step number,
+            number of samples, step duration, mean voltage and current,
+            and capacity (signed) and energy (signed) of the step.
+    """
+    import numpy as np
+    import pandas as pd
+
+    step_time = df['Data_Timestamp_From_Step_Start'].to_numpy(dtype=float)
+    volt = df['Voltage'].to_numpy(dtype=float)
+    curr = df['Current'].to_numpy(dtype=float)
+    step = step_numbers(step_time)
+    samples = np.bincount(step)
+    num_steps = len(samples)
+
+    # Charge (As) and energy (Ws) between each pair of samples in the same step.
+    dt = np.diff(step_time) * (step[1:] == step[:-1])
+    charge = 0.5 * (curr[1:] + curr[:-1]) * dt
+    power = volt * curr
+    energy = 0.5 * (power[1:] + power[:-1]) * dt
+    interval_step = step[1:]
+
+    steps = pd.DataFrame({
+        "Step": np.arange(num_steps),
+        "Samples": samples,
+        "Duration": np.bincount(interval_step, weights=dt, minlength=num_steps),
+        "Voltage": np.bincount(step, weights=volt, minlength=num_steps) / samples,
+        "Current": np.bincount(step, weights=curr, minlength=num_steps) / samples,
+        "Capacity [Ah]": np.bincount(interval_step, weights=charge, minlength=num_steps) / 3600,
+        "Energy [Wh]": np.bincount(interval_step, weights=energy, minlength=num_steps) / 3600,
+    })
+
+    results = {}
+    if (charge > 0).any():
+        results["Charge Capacity"] = charge[charge > 0].sum() / 3600
+        results["Charge Energy"] = energy[energy > 0].sum() / 3600
+    if (charge < 0).any():
+        results["Discharge Capacity"] = -charge[charge < 0].sum() / 3600
+        results["Discharge Energy"] = -energy[energy < 0].sum() / 3600
+    if "Charge Capacity" in results and "Discharge Capacity" in results:
+        results["Coulombic Efficiency"] = results["Discharge Capacity"] / results["Charge Capacity"]
     if printout:
-        print(f"Internal Resistance: {dc_ir} Ohms, {dc_ir*1000} mOhms")
+        print(steps.to_string(index=False))
+        for key, value in results.items():
+            print(f"{PROCESSED_DATA_COLUMNS[key]}: {value}")
 
-    return dc_ir
+    return results, steps
 
-if __name__ == "__main__":
-    folder = askdirectory(title='Select Folder') # shows dialog box and return the path
+def aggregate_files(folder: str) -> str:
+    """
+    Copies the test data files of every cell subfolder into a single
+    "Aggregated Data" folder.
+
+    Args:
+        folder (str): Selected directory containing the cell folders.
 
-    subfolders = [f.path for f in os.scandir(folder) if f.is_dir()]
+    Returns:
+        str: Path of the "Aggregated Data" folder.
+    """
+    subfolders = [f.path for f in os.scandir(folder) if f.is_dir() and f.name not in OUTPUT_FOLDERS]
     new_folder = os.path.join(folder, "Aggregated Data")
 
     if not os.path.exists(new_folder):
@@ -81,35 +330,502 @@ if __name__ == "__main__":
                 if not os.path.exists(dst):
                     shutil.copy(src, dst)
 
-    cell_dict = {}
+    return new_folder
+
+def parse_file_name(path: str) -> tuple:
+    """
+    Gets the cell number and test type from the name of a test data file.
+    Works for both original and aggregated file names, e.g.
+    "1 Continuous_Step_Cycles Rest 2023-03-08 19-41-54.csv" and
+    "1 Rest 2023-03-08 19-41-54.csv".
+
+    Args:
+        path (str): Path of the test data file.
+
+    Returns:
+        tuple: Cell number (int) and test type (str).
+    """
+    file_name, _ = os.path.splitext(os.path.basename(path))
+    file_name = file_name.replace("Continuous_Step_Cycles ", "").split()
+    cell_num = int(re.sub(r'\D', '', file_name[-4]))
+    test_type = file_name[-3]
+    return cell_num, test_type
+
+def parse_test_time(path: str) -> str:
+    """
+    Gets the test start time from the name of a test data file,
+    e.g. "2023-03-08T19:41:54" for "1 Continuous_Step_Cycles Rest 2023-03-08 19-41-54.csv".
+
+    Args:
+        path (str): Path of the test data file.
+
+    Returns:
+        str: Test start time in ISO format, None if the name has no valid time.
+    """
+    file_name, _ = os.path.splitext(os.path.basename(path))
+    try:
+        test_time = datetime.strptime(" ".join(file_name.split()[-2:]), "%Y-%m-%d %H-%M-%S")
+    except ValueError:
+        return None
+    return test_time.isoformat()
+
+def process_test_file(path: str, chunked: bool = CHUNKED, steps_folder: str = None) -> tuple:
+    """
+    Loads a single test data file and calculates its result.
+    Runs inside the worker processes, so it only takes and returns picklable values.
+
+    Args:
+        path (str): Path of the test data file.
+        chunked (bool): True to reduce IR tests in chunks.
+        steps_folder (str): Folder to save the step table of cycle tests in,
+            named after the test (see log_format.log_name), None to not save it.
+            The folder is created when the first step table is saved.
 
-    files = [f for f in os.scandir(new_folder) if os.path.isfile(f)]
+    Returns:
+        tuple: Cell number and a dict of the calculated values by name
+            (see PROCESSED_DATA_COLUMNS), empty for unknown test types.
+    """
+    cell_num, test_type = parse_file_name(path)
+    if test_type == "Single_IR_Test":
+        if chunked:
+            return cell_num, {"DC IR": process_ir_test_chunked(path)}
+        df = log_format.load_log(path, log_format.IR_COLUMNS)
+        return cell_num, {"DC IR": process_single_ir_test(df)}
+    if test_type == "Rest":
+        return cell_num, {"OCV": log_format.read_first_value(path, 'Voltage')}
+    if test_type in CYCLE_TEST_TYPES:
+        df = log_format.load_log(path, log_format.CYCLE_COLUMNS)
+        values, steps = process_cycle_test(df)
+        if steps_folder is not None and len(steps):
+            # Several workers may create the folder at the same time.
+            os.makedirs(steps_folder, exist_ok=True)
+            steps.to_csv(os.path.join(steps_folder, log_format.log_name(path) + ".csv"), index=False)
+        return cell_num, values
+    return cell_num, {}
+
+def run_test_files(
+    files: list,
+    workers: int = NUM_WORKERS,
+    chunked: bool = CHUNKED,
+    steps_folder: str = None
+) -> list:
+    """
+    Processes a list of test data files, optionally across a process pool.
+
+    Args:
+        files (list): Paths of the test data files.
+        workers (int): Number of worker processes, 1 to process serially.
+        chunked (bool): True to reduce IR tests in chunks.
+        steps_folder (str): Folder to save the step tables of cycle tests in, None to not save them.
+
+    Returns:
+        list: Result of each file from process_test_file, in the order of the file list.
+    """
+    if workers > 1 and len(files) > 1:
+        chunksize = max(1, len(files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                process_test_file, files, repeat(chunked), repeat(steps_folder), chunksize=chunksize
+            ))
+    return [process_test_file(f, chunked, steps_folder) for f in files]
+
+def merge_results(results: list) -> dict:
+    """
+    Merges the results of the test data files by cell.
+    The coulombic efficiency is calculated from the merged charge and
+    discharge capacity of each cell, so it's found for cells with separate
+    Charge and Discharge files too.
+
+    Args:
+        results (list): Results from process_test_file.
 
-    for file in files:
-        df = pd.read_csv(file)
-        file_name, ext = os.path.splitext(file)
-        file_name = file_name.split()
-        cell_num = int(re.sub(r'\D', '', file_name[-4]))
-        test_type = file_name[-3]
+    Returns:
+        dict: Calculated data of each cell, sorted by cell number.
+    """
+    cell_dict = {}
+    for cell_num, values in results:
         if cell_num not in cell_dict:
             cell_dict[cell_num] = {
                 "DC IR": 0,
                 "OCV": 0,
             }
+        cell_dict[cell_num].update(values)
+
+    for values in cell_dict.values():
+        values.pop("Coulombic Efficiency", None)
+        if values.get("Charge Capacity") and "Discharge Capacity" in values:
+            values["Coulombic Efficiency"] = values["Discharge Capacity"] / values["Charge Capacity"]
+
+    return dict(sorted(cell_dict.items()))
+
+def process_test_files(files: list, workers: int = NUM_WORKERS, chunked: bool = CHUNKED) -> dict:
+    """
+    Processes a list of test data files and merges the results by cell.
+    Results are merged in the order of the file list regardless of which
+    worker finishes first, so the output is the same as a serial run.
+
+    Args:
+        files (list): Paths of the test data files.
+        workers (int): Number of worker processes, 1 to process serially.
+        chunked (bool): True to reduce IR tests in chunks.
+
+    Returns:
+        dict: Calculated data of each cell, sorted by cell number.
+    """
+    files = sorted(os.fspath(f) for f in files)
+    return merge_results(run_test_files(files, workers, chunked))
 
-        if test_type == "Single_IR_Test":
-            cell_dict[cell_num]["DC IR"] = process_single_ir_test(df)
-        elif test_type == "Rest":
-            cell_dict[cell_num]["OCV"] = df['Voltage'][0]
+def find_test_files(folder: str) -> list:
+    """
+    Finds the test data files in every cell subfolder without copying them.
+    Logs converted to a columnar format are used in place of their csv file.
+
+    Args:
+        folder (str): Selected directory containing the cell folders.
+
+    Returns:
+        list: Sorted paths of the test data files.
+    """
+    files = []
+    for sub in os.scandir(folder):
+        if not sub.is_dir() or sub.name in OUTPUT_FOLDERS:
+            continue
+        for f in os.scandir(sub.path):
+            if f.is_file() and log_format.is_log_file(f.name) and "Processed Data" not in f.name:
+                files.append(f.path)
+    return log_format.prefer_columnar(files)
+
+def run_test_files_incremental(
+    folder: str,
+    files: list,
+    workers: int = NUM_WORKERS,
+    use_hash: bool = HASH_FILES,
+    chunked: bool = CHUNKED,
+    steps_folder: str = None
+) -> list:
+    """
+    Processes only the test data files that are new or changed since the
+    last run, and takes the results of the other files from the manifest.
+    Files that no longer exist are dropped from the manifest. Every file
+    is processed again if the options affecting the results (chunked,
+    saving step tables) changed since the last run. The output format
+    doesn't, it is applied to the results after they are loaded.
+
+    Args:
+        folder (str): Selected directory, where the manifest is kept.
+        files (list): Paths of the test data files.
+        workers (int): Number of worker processes, 1 to process serially.
+        use_hash (bool): True to compare content hashes when a file's
+            size or modification time changed.
+        chunked (bool): True to reduce IR tests in chunks.
+        steps_folder (str): Folder to save the step tables of cycle tests in, None to not save them.
+
+    Returns:
+        list: Result of each file, in the order of the file list.
+    """
+    files = [os.fspath(f) for f in files]
+    options = {"chunked": chunked, "step_data": steps_folder is not None}
+    old_entries = manifest_cache.load_manifest(folder, options)
+    entries = {}
+    signatures = {}
+    changed = []
+    for f in files:
+        key = manifest_cache.manifest_key(folder, f)
+        signatures[f] = manifest_cache.file_signature(f)
+        entry = old_entries.get(key)
+        if manifest_cache.is_unchanged(entry, f, signatures[f], use_hash):
+            entries[key] = entry
+        else:
+            changed.append(f)
 
+    for f, result in zip(changed, run_test_files(changed, workers, chunked, steps_folder)):
+        key = manifest_cache.manifest_key(folder, f)
+        entries[key] = manifest_cache.make_entry(f, signatures[f], result, use_hash)
+    manifest_cache.save_manifest(folder, entries, options)
+    print(f"Processed {len(changed)} new or changed files, {len(files) - len(changed)} unchanged.")
 
-    cell_dict = dict(sorted(cell_dict.items()))
+    return [entries[manifest_cache.manifest_key(folder, f)]["result"] for f in files]
 
-    processed_data_file = os.path.join(folder, "Processed Data.csv")
+def process_test_files_incremental(
+    folder: str,
+    files: list,
+    workers: int = NUM_WORKERS,
+    use_hash: bool = HASH_FILES,
+    chunked: bool = CHUNKED
+) -> dict:
+    """
+    Processes only the test data files that are new or changed since the
+    last run, and merges them with the cached results of the other files.
+
+    Args:
+        folder (str): Selected directory, where the manifest is kept.
+        files (list): Paths of the test data files.
+        workers (int): Number of worker processes, 1 to process serially.
+        use_hash (bool): True to compare content hashes when a file's
+            size or modification time changed.
+        chunked (bool): True to reduce IR tests in chunks.
+
+    Returns:
+        dict: Calculated data of each cell, sorted by cell number.
+    """
+    files = sorted(os.fspath(f) for f in files)
+    return merge_results(run_test_files_incremental(folder, files, workers, use_hash, chunked))
+
+def write_processed_data(folder: str, cell_dict: dict, output_format: str = "csv") -> str:
+    """
+    Saves the calculated data of each cell to "Processed Data.csv" or "Processed Data.json".
+
+    Args:
+        folder (str): Directory to save the file in.
+        cell_dict (dict): Calculated data of each cell.
+        output_format (str): "csv" or "json".
+
+    Returns:
+        str: Path of the saved file.
+    """
+    columns = ["Cell Number"] + list(PROCESSED_DATA_COLUMNS.values())
+    rows = [
+        [cell] + [data.get(key) for key in PROCESSED_DATA_COLUMNS]
+        for cell, data in cell_dict.items()
+    ]
+    processed_data_file = os.path.join(folder, f"Processed Data.{output_format}")
     with open(processed_data_file, 'w', newline='', encoding="utf-8") as file:
-        writer = csv.writer(file)
-        writer.writerow(["Cell Number", "Internal Resistance [Ohms]", "Open Circuit Voltage [V]"])
-        for cell, data in cell_dict.items():
-            writer.writerow([cell, data["DC IR"], data["OCV"]])
+        if output_format == "json":
+            records = [dict(zip(columns, row)) for row in rows]
+            json.dump(records, file, indent=1, default=float)
+        else:
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            writer.writerows(rows)
+    return processed_data_file
 
-    print(f"Finished. Data in {processed_data_file}")
+def write_results_database(database: str, lot: str, files: list, results: list) -> str:
+    """
+    Saves the calculated data of each cell to a results database, the
+    same values as the processed data file (see merge_results).
+    Each value is saved with the test data file it was calculated from,
+    the coulombic efficiency with the file of the discharge capacity.
+    See results_db.py.
+
+    Args:
+        database (str): Path of the database file.
+        lot (str): Lot name to store the results under.
+        files (list): Paths of the test data files.
+        results (list): Result of each file from process_test_file.
+
+    Returns:
+        str: Path of the database file.
+    """
+    from results_db import ResultsDatabase
+
+    # File each merged value comes from, later files replace earlier ones as in merge_results.
+    sources = {}
+    for f, (cell_num, values) in zip(files, results):
+        for key in values:
+            sources[cell_num, key] = f
+    records = []
+    for cell_num, values in merge_results(results).items():
+        for key, value in values.items():
+            source_key = "Discharge Capacity" if key == "Coulombic Efficiency" else key
+            f = sources.get((cell_num, source_key))
+            if f is None:
+                # Placeholder of a value the cell has no test for.
+                continue
+            records.append({
+                "lot": lot,
+                "cell": cell_num,
+                "metric": key,
+                "value": None if value is None else float(value),
+                "test_time": parse_test_time(f),
+                "test_name": log_format.log_name(f),
+                "source_file": os.path.abspath(f),
+            })
+    with ResultsDatabase(database) as db:
+        db.insert_measurements(records)
+    return database
+
+def process_folder(
+    folder: str,
+    workers: int = NUM_WORKERS,
+    incremental: bool = INCREMENTAL,
+    use_hash: bool = HASH_FILES,
+    convert_format: str = CONVERT_FORMAT,
+    compact: bool = CONVERT_COMPACT,
+    chunked: bool = CHUNKED,
+    output_format: str = "csv",
+    database: str = None,
+    lot: str = None
+) -> str:
+    """
+    Processes every cell in a directory of cell data and saves the results.
+
+    Args:
+        folder (str): Selected directory containing the cell folders.
+        workers (int): Number of worker processes, 1 to process serially.
+        incremental (bool): True to only process new or changed files in place,
+            False to copy every file into "Aggregated Data" and process it.
+        use_hash (bool): True to compare content hashes of changed files.
+        convert_format (str): Columnar format to convert csv logs to, None to load csv logs.
+        compact (bool): True to store converted voltage and current as float32.
+        chunked (bool): True to reduce IR tests in chunks.
+        output_format (str): "csv", "json" or "sqlite".
+        database (str): Path of the results database for the sqlite output
+            format, None for "Processed Data.db" in the directory.
+        lot (str): Lot name for the sqlite output format, None for the directory name.
+
+    Returns:
+        str: Path of the saved file.
+    """
+    steps_folder = os.path.join(folder, STEP_DATA_FOLDER)
+    if incremental:
+        files = find_test_files(folder)
+        if convert_format is not None:
+            log_format.convert_logs(files, convert_format, compact, workers)
+            files = find_test_files(folder)
+        results = run_test_files_incremental(folder, files, workers, use_hash, chunked, steps_folder)
+    else:
+        new_folder = aggregate_files(folder)
+        files = sorted(f.path for f in os.scandir(new_folder) if f.is_file())
+        if convert_format is not None:
+            log_format.convert_logs(files, convert_format, compact, workers)
+            files = log_format.prefer_columnar([f.path for f in os.scandir(new_folder) if f.is_file()])
+        results = run_test_files(files, workers, chunked, steps_folder)
+
+    if output_format == "sqlite":
+        if database is None:
+            database = os.path.join(folder, DATABASE_NAME)
+        if lot is None:
+            lot = os.path.basename(os.path.normpath(folder))
+        return write_results_database(database, lot, files, results)
+    return write_processed_data(folder, merge_results(results), output_format)
+
+def expand_directories(patterns: list) -> list:
+    """
+    Expands directory paths and glob patterns into a list of directories.
+
+    Args:
+        patterns (list): Directory paths or glob patterns.
+
+    Returns:
+        list: Matching directories, sorted and without duplicates.
+    """
+    folders = set()
+    for pattern in patterns:
+        matches = [m for m in glob.glob(pattern) if os.path.isdir(m)]
+        if not matches:
+            print(f"No directories match {pattern}.")
+        folders.update(matches)
+    return sorted(folders)
+
+def select_directory():
+    """
+    Shows a dialog box to select a directory.
+
+    Returns:
+        str: Selected directory, None if no display is available or the dialog was cancelled.
+    """
+    try:
+        import tkinter
+        from tkinter.filedialog import askdirectory
+    except ImportError:
+        print("tkinter not available, pass the directories to process as arguments.")
+        return None
+    try:
+        return askdirectory(title='Select Folder') or None # shows dialog box and return the path
+    except tkinter.TclError:
+        print("No display available, pass the directories to process as arguments.")
+        return None
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+
+    Args:
+        argv (list): Arguments, None to use sys.argv.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Calculate the internal resistance and OCV of every cell in directories of cell data."
+    )
+    parser.add_argument(
+        "directories", nargs="*",
+        help="Directories of cell data or glob patterns matching them. "
+        "Shows a dialog box to select one if none are given."
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=NUM_WORKERS,
+        help="Number of worker processes, 1 to process files serially (default: %(default)s)."
+    )
+    parser.add_argument(
+        "-f", "--format", dest="output_format", choices=OUTPUT_FORMATS, default="csv",
+        help="Output file format (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--database",
+        help="Results database for the sqlite format, shared by all directories "
+        "(default: \"Processed Data.db\" in each directory)."
+    )
+    parser.add_argument(
+        "--lot", help="Lot name for the sqlite format (default: name of each directory)."
+    )
+    parser.add_argument(
+        "--full", dest="incremental", action="store_false", default=INCREMENTAL,
+        help="Copy every file into \"Aggregated Data\" and process it, instead of only new or changed files."
+    )
+    parser.add_argument(
+        "--hash", dest="use_hash", action="store_true", default=HASH_FILES,
+        help="Compare content hashes of files whose modification time changed."
+    )
+    parser.add_argument(
+        "--convert", dest="convert_format", choices=sorted(log_format.COLUMNAR_EXTENSIONS),
+        default=CONVERT_FORMAT, help="Convert csv logs to a columnar format before processing."
+    )
+    parser.add_argument(
+        "--compact", action="store_true", default=CONVERT_COMPACT,
+        help="Store converted voltage and current as float32."
+    )
+    parser.add_argument(
+        "--chunked", action="store_true", default=CHUNKED,
+        help="Reduce IR tests in chunks so memory use does not grow with log length."
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    """
+    Processes the directories given on the command line, or one selected in a dialog box.
+
+    Args:
+        argv (list): Arguments, None to use sys.argv.
+
+    Returns:
+        int: Exit code.
+    """
+    args = parse_args(argv)
+    if args.directories:
+        folders = expand_directories(args.directories)
+    else:
+        folder = select_directory()
+        folders = [folder] if folder else []
+    if not folders:
+        return 1
+
+    for folder in folders:
+        processed_data_file = process_folder(
+            folder,
+            workers=max(1, args.workers),
+            incremental=args.incremental,
+            use_hash=args.use_hash,
+            convert_format=args.convert_format,
+            compact=args.compact,
+            chunked=args.chunked,
+            output_format=args.output_format,
+            database=args.database,
+            lot=args.lot,
+        )
+        print(f"Finished. Data in {processed_data_file}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""
+SQLite database of processed cell results.
+
+Every calculated value (DC IR, OCV, ...) of every cell, the same values
+as "Processed Data.csv", is stored as a row of the measurements table,
+with the lot, cell number, test time, test name and source file, so
+results of many lots can be queried without rescanning their
+"Processed Data.csv" files. For example, all cells with an internal
+resistance over 30 mOhms tested in March 2023:
+
+    with ResultsDatabase("results.db") as db:
+        rows = db.query_measurements(
+            "DC IR", min_value=0.030, start="2023-03-01", end="2023-04-01"
+        )
+
+Rows are inserted in batches, each batch in a single transaction.
+Rows are keyed by lot, test name (see log_format.log_name) and metric, so
+reprocessing a test replaces its previous rows, whether it was read from
+its csv file, a converted log or an aggregated copy.
+"""
+
+import sqlite3
+
+BATCH_SIZE = 1000
+# Seconds to wait for another process writing to the same database.
+TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS measurements (
+    id INTEGER PRIMARY KEY,
+    lot TEXT NOT NULL,
+    cell INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    test_time TEXT,
+    test_name TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    UNIQUE (lot, test_name, metric)
+);
+CREATE INDEX IF NOT EXISTS idx_measurements_metric_value ON measurements (metric, value);
+CREATE INDEX IF NOT EXISTS idx_measurements_metric_time ON measurements (metric, test_time);
+CREATE INDEX IF NOT EXISTS idx_measurements_cell ON measurements (lot, cell, metric, test_time);
+"""
+
+MEASUREMENT_COLUMNS = ["lot", "cell", "metric", "value", "test_time", "test_name", "source_file"]
+
+class ResultsDatabase:
+    """
+    Class to represent a SQLite database of processed cell results.
+
+    Args:
+        path (str): Path of the database file, created if it doesn't exist.
+
+    Attributes:
+        conn: sqlite3 connection to the database.
+    """
+    def __init__(self, path: str) -> None:
+        self.conn = sqlite3.connect(path, timeout=TIMEOUT)
+        self.conn.row_factory = sqlite3.Row
+        # Write-ahead logging lets other processes read while results are written.
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def insert_measurements(self, records: list, batch_size: int = BATCH_SIZE) -> int:
+        """
+        Inserts measurements in batches, each batch in a single transaction.
+        Existing measurements of the same lot, test name and metric are replaced.
+
+        Args:
+            records (list): Measurements as dicts with the keys in MEASUREMENT_COLUMNS.
+            batch_size (int): Number of measurements per transaction.
+
+        Returns:
+            int: Number of measurements inserted.
+        """
+        sql = (
+            f"INSERT OR REPLACE INTO measurements ({', '.join(MEASUREMENT_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(MEASUREMENT_COLUMNS))})"
+        )
+        rows = [tuple(r[c] for c in MEASUREMENT_COLUMNS) for r in records]
+        for start in range(0, len(rows), batch_size):
+            with self.conn:
+                self.conn.executemany(sql, rows[start:start + batch_size])
+        return len(rows)
+
+    def query_measurements(
+        self,
+        metric: str,
+        min_value: float = None,
+        max_value: float = None,
+        lot: str = None,
+        start: str = None,
+        end: str = None
+    ) -> list:
+        """
+        Gets the measurements of a metric, optionally filtered by value, lot and test time.
+
+        Args:
+            metric (str): Metric name, e.g. "DC IR" or "OCV".
+            min_value (float): Minimum value, inclusive.
+            max_value (float): Maximum value, inclusive.
+            lot (str): Lot name.
+            start (str): Earliest test time, ISO format, inclusive.
+            end (str): Latest test time, ISO format, exclusive.
+
+        Returns:
+            list: Matching measurements as sqlite3.Row, sorted by lot and cell.
+        """
+        conditions = ["metric = ?"]
+        params = [metric]
+        for condition, param in (
+            ("value >= ?", min_value),
+            ("value <= ?", max_value),
+            ("lot = ?", lot),
+            ("test_time >= ?", start),
+            ("test_time < ?", end),
+        ):
+            if param is not None:
+                conditions.append(condition)
+                params.append(param)
+        return self.conn.execute(
+            f"SELECT {', '.join(MEASUREMENT_COLUMNS)} FROM measurements "
+            f"WHERE {' AND '.join(conditions)} ORDER BY lot, cell, test_time",
+            params,
+        ).fetchall()
+
+    def query_cells(self, lot: str = None) -> list:
+        """
+        Gets the latest DC IR and OCV of each cell.
+
+        Args:
+            lot (str): Lot name, None for all lots.
+
+        Returns:
+            list: sqlite3.Row with lot, cell, dc_ir, ocv and test_time
+                (time of the latest test), sorted by lot and cell.
+        """
+        sql = """
+            SELECT lot, cell,
+                MAX(CASE WHEN metric = 'DC IR' THEN value END) AS dc_ir,
+                MAX(CASE WHEN metric = 'OCV' THEN value END) AS ocv,
+                MAX(test_time) AS test_time
+            FROM measurements AS m
+            WHERE test_time IS (
+                SELECT MAX(test_time) FROM measurements
+                WHERE lot = m.lot AND cell = m.cell AND metric = m.metric
+            )
+        """
+        params = []
+        if lot is not None:
+            sql += " AND lot = ?"
+            params.append(lot)
+        sql += " GROUP BY lot, cell ORDER BY lot, cell"
+        return self.conn.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        """
+        Closes the connection to the database.
+        """
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,109 @@
+"""
+Streaming per-step reduction of test data.
+
+Keeps running sums for each step while test data is fed in chunks, so long
+logs can be reduced with constant memory use. Gives the same step table as
+segment_steps in process_single_ir_test_folders.py, including ignoring the
+very first voltage and current measurement of each step if possible.
+"""
+
+import numpy as np
+import pandas as pd
+
+STEP_COLUMNS = ["Step", "Start Index", "Samples", "Duration", "Voltage", "Current"]
+
+class StepAccumulator:
+    """
+    Class to reduce chunks of test data to per-step mean voltage and current.
+    A new step starts wherever Data_Timestamp_From_Step_Start goes back down,
+    including across chunk boundaries.
+
+    Attributes:
+        steps: Finished steps as rows of the step table.
+        rows: Number of rows fed so far.
+    """
+    def __init__(self) -> None:
+        self.steps = []
+        self.rows = 0
+        self._step = None
+        self._last_time = None
+
+    def add_chunk(self, step_time, volt, curr) -> None:
+        """
+        Adds a chunk of test data.
+        Works on whole arrays, looping only over the steps in the chunk.
+
+        Args:
+            step_time (array): Data_Timestamp_From_Step_Start values.
+            volt (array): Voltage values.
+            curr (array): Current values.
+        """
+        step_time = np.asarray(step_time, dtype=float)
+        volt = np.asarray(volt, dtype=float)
+        curr = np.asarray(curr, dtype=float)
+        num_rows = len(step_time)
+        if num_rows == 0:
+            return
+
+        new_step = np.empty(num_rows, dtype=bool)
+        new_step[0] = self._step is None or step_time[0] < self._last_time
+        new_step[1:] = np.diff(step_time) < 0
+        seg_starts = np.union1d([0], np.flatnonzero(new_step))
+        seg_samples = np.diff(np.append(seg_starts, num_rows))
+        volt_sums = np.add.reduceat(volt, seg_starts)
+        curr_sums = np.add.reduceat(curr, seg_starts)
+
+        for start, samples, volt_sum, curr_sum in zip(seg_starts, seg_samples, volt_sums, curr_sums):
+            if new_step[start]:
+                self._finish_step()
+                # Sums exclude the first reading, which is only used if it's the only one.
+                self._step = {
+                    "start": self.rows + start,
+                    "samples": 0,
+                    "volt_sum": -volt[start],
+                    "curr_sum": -curr[start],
+                    "first_volt": volt[start],
+                    "first_curr": curr[start],
+                }
+            self._step["samples"] += int(samples)
+            self._step["volt_sum"] += volt_sum
+            self._step["curr_sum"] += curr_sum
+            self._step["duration"] = step_time[start + samples - 1]
+
+        self._last_time = step_time[-1]
+        self.rows += num_rows
+
+    def _finish_step(self) -> None:
+        """
+        Adds the step in progress to the finished steps.
+        """
+        step = self._step
+        if step is None:
+            return
+        if step["samples"] > 1:
+            volt = step["volt_sum"] / (step["samples"] - 1)
+            curr = step["curr_sum"] / (step["samples"] - 1)
+        else:
+            volt = step["first_volt"]
+            curr = step["first_curr"]
+        self.steps.append([
+            len(self.steps),
+            step["start"],
+            step["samples"],
+            step["duration"],
+            volt,
+            curr,
+        ])
+        self._step = None
+
+    def finish(self) -> pd.DataFrame:
+        """
+        Finishes the last step and gets the step table.
+
+        Returns:
+            pd.DataFrame: One row per step with the step number, index of
+                the first row of the step, number of samples, step duration
+                and mean voltage and current.
+        """
+        self._finish_step()
+        return pd.DataFrame(self.steps, columns=STEP_COLUMNS)
@@ -1,9 +1,20 @@
 """
 Module driver template for a SCPI VISA digital multimeter.
 Implements all the standard SCPI commands for DMM control.
+
+Buffered acquisition stores readings in the DMM's reading memory at the
+meter's own sample rate, then fetches them in bulk as an IEEE 754 binary
+block instead of one query per sample:
+
+    dmm.configure_acquisition(sample_count=1000, nplc=0.02, trig_source="BUS")
+    dmm.start_acquisition()
+    dmm.trigger()
+    readings = dmm.fetch_readings()
 """
 
-from pyvisa.errors import InvalidSession
+import math
+
+import numpy as np
 
 import dmm_ks34410a_consts as ks34410a_consts
 from inst_pyvisa import PyVisaInstrument
@@ -21,12 +32,21 @@ class Ks34410A(PyVisaInstrument):
         model_number: Model number of instrument.
         max_curr: Maximum current rating of the channel.
         max_volt: Maximum voltage rating of the channel.
+        mode: Measurement mode.
+        nplc: Integration time in power line cycles.
+        resolution: Resolution readings are rounded to, 0 for no rounding.
+        meas_range: Measurement range, 0 for auto range.
+        sample_count: Samples taken per trigger.
+        trig_count: Triggers accepted per acquisition.
+        trig_source: Trigger source (IMM, BUS, EXT).
+        sample_interval: Time in seconds between samples, None for as fast as possible.
+        data_format: Format readings are returned in (ASCII, REAL).
     """
     def __init__(self, visa_name: str) -> None:
         super().__init__(visa_name)
 
         # Initialize settings of PSU.
-        self.inst.write("*RST")
+        self.write("*RST")
         self.disable_front_panel(True)
         self.max_curr = 0
         self.max_volt = 0
@@ -34,6 +54,11 @@ class Ks34410A(PyVisaInstrument):
         self.nplc = 1
         self.resolution = 0
         self.meas_range = 0
+        self.sample_count = 1
+        self.trig_count = 1
+        self.trig_source = "IMM"
+        self.sample_interval = None
+        self.data_format = "ASCII"
         self.set_mode("VOLT:DC")
 
 
@@ -46,9 +71,9 @@ class Ks34410A(PyVisaInstrument):
             state (bool): True for remote mode, False for local mode.
         """
         if state:
-            self.inst.write("SYST:REM")
+            self.write("SYST:REM", setting="SYST")
         else:
-            self.inst.write("SYST:LOC")
+            self.write("SYST:LOC", setting="SYST")
 
     def set_mode(self, mode: str="VOLT:DC") -> None:
         """
@@ -69,7 +94,7 @@ class Ks34410A(PyVisaInstrument):
                 VOLT:DC = DC Voltage
         """
         self.mode = mode
-        self.inst.write(f"FUNC:{mode}")
+        self.write(f"FUNC:{mode}", setting="FUNC")
 
     def set_nplc(self, nplc: float=1) -> None:
         """
@@ -83,35 +108,245 @@ class Ks34410A(PyVisaInstrument):
         if nplc in ks34410a_consts.NPLC_RANGE:
             self.nplc = nplc
             self.resolution = self.calc_resolution(ks34410a_consts.NPLC_RANGE[nplc])
-            self.inst.write(f"{self.mode}:NPLC {nplc}")
+            self.write(f"{self.mode}:NPLC {nplc}")
         else:
             print("Invalid NPLC selection.")
 
+    def set_range(self, meas_range="AUTO") -> None:
+        """
+        Sets the measurement range of the current measurement mode.
+        A fixed range avoids autoranging delays between readings and sets
+        the resolution readings are rounded to.
+
+        Args:
+            meas_range (float or str): Range in the units of the measurement mode, or "AUTO".
+        """
+        if meas_range == "AUTO":
+            self.meas_range = 0
+            self.write(f"{self.mode}:RANG:AUTO ON", setting=f"{self.mode}:RANG")
+        else:
+            self.meas_range = meas_range
+            self.write(f"{self.mode}:RANG {meas_range}", setting=f"{self.mode}:RANG")
+        self.resolution = self.calc_resolution(ks34410a_consts.NPLC_RANGE.get(self.nplc, 0))
+
     def calc_resolution(self, pmm):
-        res = round(0.000001 * pmm * self.meas_range)
-        counter = 0
-        if res > 1:
-            while res % 10 == 0:
-                res /= 10
-                counter += 1
-        elif res < 1:
-            while res * 10 <= 10:
-                res *= 10
-                counter -= 1
-        return 10 ** counter
+        """
+        Calculates the resolution of readings from the measurement range.
+
+        Args:
+            pmm (float): Resolution in ppm of range, from NPLC_RANGE.
+
+        Returns:
+            float: Resolution rounded down to a power of 10, 0 when autoranging.
+        """
+        res = 0.000001 * pmm * self.meas_range
+        if res <= 0:
+            return 0
+        return 10 ** math.floor(math.log10(res))
 
     def convert_resolution(self, val):
-        return round(val / self.resolution) * self.resolution
+        """
+        Rounds readings to the resolution of the measurement.
+
+        Args:
+            val (float or np.ndarray): Reading or array of readings.
+
+        Returns:
+            float or np.ndarray: Rounded readings, unchanged if the resolution is unknown.
+        """
+        if self.resolution <= 0:
+            return val
+        return np.round(val / self.resolution) * self.resolution
+
+    def set_data_format(self, data_format: str="REAL") -> None:
+        """
+        Sets the format readings are returned in.
+        REAL transfers readings as 64-bit IEEE 754 binary blocks, which are
+        much smaller and faster to parse than ASCII for large reading sets.
+
+        Args:
+            data_format (str): "ASCII" or "REAL".
+        """
+        if data_format == "REAL":
+            self.write("FORM:DATA REAL,64")
+            self.write("FORM:BORD NORM")
+        else:
+            self.write("FORM:DATA ASC")
+        self.data_format = data_format
+
+    def query_readings(self, command: str) -> np.ndarray:
+        """
+        Sends a query returning readings and parses them in the current data format.
+
+        Args:
+            command (str): Query, e.g. "FETC?" or "READ?".
+
+        Returns:
+            np.ndarray: Readings, rounded to the measurement resolution.
+        """
+        if self.data_format == "REAL":
+            readings = self.inst.query_binary_values(
+                command, datatype="d", is_big_endian=True, container=np.array
+            )
+        else:
+            readings = self.inst.query_ascii_values(command, container=np.array)
+        return self.convert_resolution(readings)
+
+    def configure_acquisition(
+        self,
+        sample_count: int,
+        nplc: float=None,
+        trig_source: str="IMM",
+        trig_count: int=1,
+        trig_delay: float=None,
+        sample_interval: float=None
+    ) -> None:
+        """
+        Configures a buffered acquisition in the current measurement mode.
+        Readings are stored in reading memory and returned as binary blocks.
+
+        Args:
+            sample_count (int): Samples taken per trigger.
+            nplc (float): NPLC value, None to keep the current one.
+            trig_source (str): "IMM" (immediate), "BUS" (trigger()) or "EXT" (rear panel).
+            trig_count (int): Triggers accepted per acquisition.
+            trig_delay (float): Delay in seconds between the trigger and the
+                first sample, None for the automatic delay.
+            sample_interval (float): Time in seconds between samples, None
+                to sample as fast as the NPLC allows.
+        """
+        if sample_count * trig_count > ks34410a_consts.MAX_READINGS:
+            print(f"Invalid sample count, max {ks34410a_consts.MAX_READINGS} readings.")
+            return
+        if trig_source not in ks34410a_consts.TRIG_SOURCES:
+            print(f"Invalid trigger source, use one of {ks34410a_consts.TRIG_SOURCES}.")
+            return
+        if nplc is not None and self.nplc != nplc:
+            self.set_nplc(nplc)
+
+        self.write(f"TRIG:SOUR {trig_source}")
+        self.write(f"TRIG:COUN {trig_count}")
+        if trig_delay is None:
+            self.write("TRIG:DEL:AUTO ON", setting="TRIG:DEL")
+        else:
+            self.write(f"TRIG:DEL {trig_delay}", setting="TRIG:DEL")
+        self.write(f"SAMP:COUN {sample_count}")
+        if sample_interval is None:
+            self.write("SAMP:SOUR IMM")
+        else:
+            self.write("SAMP:SOUR TIM")
+            self.write(f"SAMP:TIM {sample_interval}")
+        if self.data_format != "REAL":
+            self.set_data_format("REAL")
 
-    def measure_volt(self, nplc: float=1, volt_range: str='AUTO') -> None:
+        self.sample_count = sample_count
+        self.trig_count = trig_count
+        self.trig_source = trig_source
+        self.sample_interval = sample_interval
+
+    def start_acquisition(self) -> None:
+        """
+        Clears reading memory and arms the DMM to take readings on the next triggers.
+        """
+        self.write("INIT")
+
+    def trigger(self) -> None:
+        """
+        Sends a bus trigger, for acquisitions using the BUS trigger source.
+        """
+        self.write("*TRG")
+
+    def readings_available(self) -> int:
+        """
+        Gets the number of readings in reading memory.
+
+        Returns:
+            int: Number of readings.
+        """
+        return int(self.inst.query("DATA:POIN?"))
+
+    def acquisition_time(self) -> float:
+        """
+        Estimates the time a configured acquisition takes once triggered.
+
+        Returns:
+            float: Estimated time in seconds.
+        """
+        sample_time = self.nplc / ks34410a_consts.LINE_FREQ
+        if self.sample_interval is not None:
+            sample_time = max(sample_time, self.sample_interval)
+        return sample_time * self.sample_count * self.trig_count
+
+    def fetch_readings(self) -> np.ndarray:
+        """
+        Waits for the acquisition to finish and fetches all readings in one transfer.
+        The VISA timeout is extended to cover the estimated acquisition time.
+
+        Returns:
+            np.ndarray: Readings, rounded to the measurement resolution.
+        """
+        timeout = self.inst.timeout
+        self.inst.timeout = max(timeout, 2000 + 1500 * self.acquisition_time())
+        try:
+            return self.query_readings("FETC?")
+        finally:
+            self.inst.timeout = timeout
+
+    def remove_readings(self, max_count: int=None) -> np.ndarray:
+        """
+        Reads and removes readings from reading memory without waiting for
+        the acquisition to finish, to stream long acquisitions in blocks.
+
+        Args:
+            max_count (int): Maximum number of readings to remove, None for all available.
+
+        Returns:
+            np.ndarray: Oldest readings in memory, rounded to the measurement resolution.
+        """
+        if max_count is None:
+            return self.query_readings("R?")
+        return self.query_readings(f"R? {max_count}")
+
+    def acquire(self, sample_count: int, nplc: float=None, sample_interval: float=None) -> np.ndarray:
+        """
+        Takes a buffered acquisition immediately and returns its readings.
+
+        Args:
+            sample_count (int): Number of samples.
+            nplc (float): NPLC value, None to keep the current one.
+            sample_interval (float): Time in seconds between samples, None
+                to sample as fast as the NPLC allows.
+
+        Returns:
+            np.ndarray: Readings, rounded to the measurement resolution.
+        """
+        self.configure_acquisition(sample_count, nplc, "IMM", 1, sample_interval=sample_interval)
+        self.start_acquisition()
+        return self.fetch_readings()
+
+    def measure_volt(self, nplc: float=1, volt_range='AUTO') -> float:
+        """
+        Takes a single DC voltage reading.
+
+        Args:
+            nplc (float): NPLC value.
+            volt_range (float or str): Voltage range in volts, or "AUTO".
+
+        Returns:
+            float: Voltage in volts.
+        """
         if self.mode != "VOLT:DC":
             self.set_mode("VOLT:DC")
         if self.nplc != nplc:
             self.set_nplc(nplc)
+        if (0 if volt_range == "AUTO" else volt_range) != self.meas_range:
+            self.set_range(volt_range)
+        if self.sample_count != 1 or self.trig_count != 1 or self.trig_source != "IMM":
+            self.configure_acquisition(1)
+        return float(self.query_readings("READ?")[0])
 
-    def __del__(self) -> None:
-        try:
-            self.disable_front_panel(False)
-            self.inst.close()
-        except (AttributeError, InvalidSession):
-            pass
+    def safe_state(self) -> None:
+        """
+        Unlocks the front panel.
+        """
+        self.disable_front_panel(False)
@@ -13,4 +13,15 @@ NPLC_RANGE = {
     2: 0.2,
     10: 0.1,
     100: 0.03,
-}
\ No newline at end of file
+}
+
+# Maximum readings stored in reading memory.
+MAX_READINGS = 50000
+
+TRIG_SOURCES = ("IMM", "BUS", "EXT")
+
+# Power line frequency in Hz, used to estimate acquisition time from NPLC.
+LINE_FREQ = 60
+
+# Model numbers supported by the driver.
+MODELS = ("34410A",)
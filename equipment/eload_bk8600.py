@@ -19,6 +19,8 @@ class Bk8600(EloadScpi):
         max_curr: Maximum current rating of instrument.
         max_volt: Maximum voltage rating of instrument.
         max_pow: Maximum power rating of instrument.
+        max_list_steps: Maximum number of steps in a list.
+        transient: True, transient mode is supported.
         mode: Operation mode (CC, CR, CV, CW) of instrument.
     """
     def __init__(self, visa_name: str) -> None:
@@ -27,6 +29,8 @@ class Bk8600(EloadScpi):
         self.max_volt = bk8600_consts.MAX_VOLT[self.model_number]
         self.max_curr = bk8600_consts.MAX_CURR[self.model_number]        
         self.max_pow = bk8600_consts.MAX_POW[self.model_number]
+        self.max_list_steps = bk8600_consts.MAX_LIST_STEPS
+        self.transient = True
 
     def toggle_remote_sense(self, state) -> None:
         """
@@ -39,6 +43,95 @@ class Bk8600(EloadScpi):
             state (bool): True for ON, False for OFF.
         """
         if state:
-            self.inst.write("REM:SENS ON")
+            self.write("REM:SENS ON")
         else:
-            self.inst.write("REM:SENS OFF")
+            self.write("REM:SENS OFF")
+
+    def write_list(self, currents: list, widths: list, count: int) -> None:
+        """
+        Sends the steps of a constant current list, see upload_list.
+        Steps are numbered from 1.
+
+        Args:
+            currents (list): Current of each step in amps.
+            widths (list): Length of each step in seconds.
+            count (int): Number of times the list runs per trigger.
+        """
+        self.write("LIST:MODE CURR")
+        self.write(f"LIST:RANG {self.max_curr}")
+        self.write(f"LIST:COUN {count}")
+        self.write(f"LIST:STEP {len(currents)}")
+        for step, (curr, width) in enumerate(zip(currents, widths), start=1):
+            self.write(f"LIST:LEV {step},{curr}", setting=f"LIST:LEV {step}")
+            self.write(f"LIST:WID {step},{width}", setting=f"LIST:WID {step}")
+
+    def read_list(self) -> tuple:
+        """
+        Reads the list in the e-load.
+
+        Returns:
+            tuple: Current of each step in amps and length of each step in seconds.
+        """
+        steps = range(1, int(float(self.inst.query("LIST:STEP?"))) + 1)
+        currents = [float(self.inst.query(f"LIST:LEV? {step}")) for step in steps]
+        widths = [float(self.inst.query(f"LIST:WID? {step}")) for step in steps]
+        return currents, widths
+
+    def arm_list(self) -> None:
+        """
+        Changes to list mode, with the list started by trigger().
+        """
+        self.write("TRIG:SOUR BUS")
+        self.write("TRAN OFF")
+        self.write("FUNC:MODE LIST")
+
+    def write_transient(
+        self,
+        low_curr: float,
+        high_curr: float,
+        low_width: float,
+        high_width: float,
+        mode: str
+    ) -> None:
+        """
+        Sends the constant current transient levels, see upload_transient.
+
+        Args:
+            low_curr (float): A level current in amps.
+            high_curr (float): B level current in amps.
+            low_width (float): Length of the A level in seconds.
+            high_width (float): Length of the B level in seconds.
+            mode (str): "CONT", "PULS" or "TOGG".
+        """
+        self.write(f"CURR:TRAN:MODE {mode}")
+        self.write(f"CURR:TRAN:ALEV {low_curr}")
+        self.write(f"CURR:TRAN:BLEV {high_curr}")
+        self.write(f"CURR:TRAN:AWID {low_width}")
+        self.write(f"CURR:TRAN:BWID {high_width}")
+
+    def read_transient(self) -> tuple:
+        """
+        Reads the constant current transient levels.
+
+        Returns:
+            tuple: A and B level currents in amps, A and B level lengths in seconds.
+        """
+        return tuple(
+            float(self.inst.query(f"CURR:TRAN:{level}?"))
+            for level in ("ALEV", "BLEV", "AWID", "BWID")
+        )
+
+    def arm_transient(self) -> None:
+        """
+        Changes to transient mode, with transients started by trigger().
+        """
+        self.write("TRIG:SOUR BUS")
+        self.write("FUNC:MODE FIX")
+        self.write("TRAN ON")
+
+    def set_fixed_mode(self) -> None:
+        """
+        Leaves list and transient mode, back to the static setting of the operation mode.
+        """
+        self.write("TRAN OFF")
+        self.write("FUNC:MODE FIX")
@@ -43,3 +43,6 @@ MAX_POW = {
     "8624": 4500,
     "8625": 6000,
 }
+
+# Steps in a list.
+MAX_LIST_STEPS = 84
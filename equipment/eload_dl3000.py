@@ -19,12 +19,16 @@ class Dl3000(EloadScpi):
         max_curr: Maximum current rating of instrument.
         max_volt: Maximum voltage rating of instrument.
         max_pow: Maximum power rating of instrument.
+        max_list_steps: Maximum number of steps in a list.
+        transient: True, transient mode is supported.
         mode: Operation mode (CC, CR, CV, CW) of instrument.
     """
     def __init__(self, visa_name: str) -> None:
         super().__init__(visa_name)
         self.max_volt = dl3000_consts.MAX_VOLT[self.model_number]
         self.max_pow = dl3000_consts.MAX_POW[self.model_number]
+        self.max_list_steps = dl3000_consts.MAX_LIST_STEPS
+        self.transient = True
         self.set_range("MAX")
 
     def set_range(self, curr_range: str) -> None:
@@ -36,4 +40,98 @@ class Dl3000(EloadScpi):
             range (str): "MIN" for low range, "MAX" for high range.
         """
         self.max_curr = dl3000_consts.MAX_CURR[self.model_number][curr_range]
-        self.inst.write(f"CURR:RANG {curr_range}")
+        self.write(f"CURR:RANG {curr_range}")
+
+    def write_list(self, currents: list, widths: list, count: int) -> None:
+        """
+        Sends the steps of a constant current list, see upload_list.
+        Steps are numbered from 0, and the list uses the current range.
+
+        Args:
+            currents (list): Current of each step in amps.
+            widths (list): Length of each step in seconds.
+            count (int): Number of times the list runs per trigger.
+        """
+        self.write(":SOUR:LIST:MODE CC")
+        self.write(f":SOUR:LIST:RANG {self.max_curr}")
+        self.write(f":SOUR:LIST:COUN {count}")
+        self.write(f":SOUR:LIST:STEP {len(currents)}")
+        for step, (curr, width) in enumerate(zip(currents, widths)):
+            self.write(f":SOUR:LIST:LEV {step},{curr}", setting=f":SOUR:LIST:LEV {step}")
+            self.write(f":SOUR:LIST:WID {step},{width}", setting=f":SOUR:LIST:WID {step}")
+
+    def read_list(self) -> tuple:
+        """
+        Reads the list in the e-load.
+
+        Returns:
+            tuple: Current of each step in amps and length of each step in seconds.
+        """
+        steps = range(int(float(self.inst.query(":SOUR:LIST:STEP?"))))
+        currents = [float(self.inst.query(f":SOUR:LIST:LEV? {step}")) for step in steps]
+        widths = [float(self.inst.query(f":SOUR:LIST:WID? {step}")) for step in steps]
+        return currents, widths
+
+    def arm_list(self) -> None:
+        """
+        Changes to list mode, with the list started by trigger().
+        """
+        self.write(":TRIG:SOUR BUS")
+        self.write(":SOUR:FUNC:MODE LIST")
+
+    def write_transient(
+        self,
+        low_curr: float,
+        high_curr: float,
+        low_width: float,
+        high_width: float,
+        mode: str
+    ) -> None:
+        """
+        Sends the constant current transient levels, see upload_transient.
+        The DL3000 sets the level lengths in ms.
+
+        Args:
+            low_curr (float): A level current in amps.
+            high_curr (float): B level current in amps.
+            low_width (float): Length of the A level in seconds.
+            high_width (float): Length of the B level in seconds.
+            mode (str): "CONT", "PULS" or "TOGG".
+        """
+        self.write(f":SOUR:CURR:TRAN:MODE {mode}")
+        self.write(f":SOUR:CURR:TRAN:ALEV {low_curr}")
+        self.write(f":SOUR:CURR:TRAN:BLEV {high_curr}")
+        self.write(f":SOUR:CURR:TRAN:AWID {low_width * 1000}")
+        self.write(f":SOUR:CURR:TRAN:BWID {high_width * 1000}")
+
+    def read_transient(self) -> tuple:
+        """
+        Reads the constant current transient levels.
+
+        Returns:
+            tuple: A and B level currents in amps, A and B level lengths in seconds.
+        """
+        low_curr, high_curr, low_width, high_width = (
+            float(self.inst.query(f":SOUR:CURR:TRAN:{level}?"))
+            for level in ("ALEV", "BLEV", "AWID", "BWID")
+        )
+        return low_curr, high_curr, low_width / 1000, high_width / 1000
+
+    def arm_transient(self) -> None:
+        """
+        Changes to transient mode, with transients started by trigger().
+        """
+        self.write(":TRIG:SOUR BUS")
+        self.write(":SOUR:FUNC:MODE TRAN")
+
+    def trigger(self) -> None:
+        """
+        Sends a bus trigger, starting an armed list or transient.
+        """
+        self.write(":TRIG")
+
+    def set_fixed_mode(self) -> None:
+        """
+        Leaves list and transient mode, back to the static setting of the operation mode.
+        """
+        self.write(":SOUR:FUNC:MODE FIX")
@@ -34,3 +34,6 @@ MAX_POW = {
     "DL3031": 350,
     "DL3031A": 350,
 }
+
+# Steps in a list.
+MAX_LIST_STEPS = 512
@@ -1,10 +1,32 @@
 """
 Module driver for a BK PRECISION 86XX series E-load.
+
+Besides static settings, e-loads that support it can run current
+profiles timed by the e-load itself, with no commands sent while the
+profile runs:
+    - List mode: each current of a list for its width in turn.
+    - Transient mode: switching between two currents (A and B levels).
+Profiles are uploaded and read back to check them, armed, then started
+with trigger(). Models supporting these modes (max_list_steps above 0,
+transient True) define write_list, read_list, arm_list, write_transient,
+read_transient, arm_transient and set_fixed_mode. For example, an IR pulse:
+
+    if eload.upload_list([1, 5], [2, 2]):
+        eload.arm_list()
+        eload.toggle_output(True)
+        eload.trigger()
+    ...
+    eload.set_fixed_mode()
 """
 
-from pyvisa.errors import InvalidSession
+import math
+import time
+
+from inst_pyvisa import Measurement, PyVisaInstrument
 
-from inst_pyvisa import PyVisaInstrument
+# Tolerances of a list read back from an e-load, which rounds to its resolution.
+LIST_CURR_TOLERANCE = 0.001
+LIST_WIDTH_TOLERANCE = 0.0001
 
 class EloadScpi(PyVisaInstrument):
     """
@@ -20,6 +42,8 @@ class EloadScpi(PyVisaInstrument):
         max_curr: Maximum current rating of instrument.
         max_volt: Maximum voltage rating of instrument.
         max_pow: Maximum power rating of instrument.
+        max_list_steps: Maximum number of steps in a list, 0 if list mode isn't supported.
+        transient: True if transient mode is supported.
         mode: Operation mode (CC, CR, CV, CW) of instrument.
     """
     def __init__(self, visa_name: str) -> None:
@@ -28,9 +52,11 @@ class EloadScpi(PyVisaInstrument):
         self.max_curr = 0
         self.max_volt = 0
         self.max_pow = 0
+        self.max_list_steps = 0
+        self.transient = False
 
         # Reset to default settings of E-load (constant current).
-        self.inst.write("*RST")
+        self.write("*RST")
         self.disable_front_panel(True)
         # E-load initializes to constant current mode.
         self.mode = "CURR"
@@ -42,7 +68,7 @@ class EloadScpi(PyVisaInstrument):
         E-Load will draw a constant current frorm the source.
         """
         self.mode = "CURR"
-        self.inst.write("FUNC CURR")
+        self.write("FUNC CURR")
 
     def set_curr(self, curr: float) -> None:
         """
@@ -53,7 +79,7 @@ class EloadScpi(PyVisaInstrument):
         """
         if self.mode == "CURR":
             if curr <= self.max_curr:
-                self.inst.write(f"CURR {curr}")
+                self.write(f"CURR {curr}")
             else:
                 print(f"{curr} greater than max current {self.max_curr}.")
         else:
@@ -65,7 +91,7 @@ class EloadScpi(PyVisaInstrument):
         E-Load will act as a resistor with constant resistance.
         """
         self.mode = "RES"
-        self.inst.write("FUNC RES")
+        self.write("FUNC RES")
 
     def set_res(self, resistance: float) -> None:
         """
@@ -75,7 +101,7 @@ class EloadScpi(PyVisaInstrument):
             resistance (float): Resistance level in ohms.
         """
         if self.mode == "RES":
-            self.inst.write(f"RES {resistance}")
+            self.write(f"RES {resistance}")
         else:
             print(f"Attempt to change resistance in incorrect mode ({self.mode}).")
 
@@ -85,7 +111,7 @@ class EloadScpi(PyVisaInstrument):
         E-Load will serve as a constant voltage drop.
         """
         self.mode = "VOLT"
-        self.inst.write("FUNC VOLT")
+        self.write("FUNC VOLT")
 
     def set_volt(self, volt: float) -> None:
         """
@@ -96,7 +122,7 @@ class EloadScpi(PyVisaInstrument):
         """
         if self.mode == "VOLT":
             if volt <= self.max_volt:
-                self.inst.write(f"VOLT {volt}")
+                self.write(f"VOLT {volt}")
             else:
                 print(f"{volt} greater than max current {self.max_volt}.")
         else:
@@ -109,7 +135,7 @@ class EloadScpi(PyVisaInstrument):
         Current and voltage are determined by the circuit connected.
         """
         self.mode = "POW"
-        self.inst.write("FUNC POW")
+        self.write("FUNC POW")
 
     def set_pow(self, power: float) -> None:
         """
@@ -120,7 +146,7 @@ class EloadScpi(PyVisaInstrument):
         """
         if self.mode == "POW":
             if power <= self.max_pow:
-                self.inst.write(f"POW {power}")
+                self.write(f"POW {power}")
             else:
                 print(f"{power} greater than max power {self.max_pow}.")
         else:
@@ -134,9 +160,9 @@ class EloadScpi(PyVisaInstrument):
             state (bool): True for ON, False for OFF.
         """
         if state:
-            self.inst.write("INP ON")
+            self.write("INP ON")
         else:
-            self.inst.write("INP OFF")
+            self.write("INP OFF")
 
     def toggle_remote_sense(self, state) -> None:
         """
@@ -149,9 +175,9 @@ class EloadScpi(PyVisaInstrument):
             state (bool): True for ON, False for OFF.
         """
         if state:
-            self.inst.write("SENS ON")
+            self.write("SENS ON")
         else:
-            self.inst.write("SENS OFF")
+            self.write("SENS OFF")
 
     def disable_front_panel(self, state) -> None:
         """
@@ -162,9 +188,9 @@ class EloadScpi(PyVisaInstrument):
             state (bool): True for remote mode, False for local mode.
         """
         if state:
-            self.inst.write("SYST:REM")
+            self.write("SYST:REM", setting="SYST")
         else:
-            self.inst.write("SYST:LOC")
+            self.write("SYST:LOC", setting="SYST")
 
     def measure_volt(self) -> float:
         """
@@ -184,10 +210,129 @@ class EloadScpi(PyVisaInstrument):
         """
         return -float(self.inst.query("MEAS:CURR?"))
 
-    def __del__(self) -> None:
-        try:
-            self.toggle_output(False)
-            self.disable_front_panel(False)
-            self.inst.close()
-        except (AttributeError, InvalidSession):
-            pass
+    def measure_volt_curr(self) -> Measurement:
+        """
+        Measures the voltage and current of the e-load with one compound query,
+        so both values are from the same moment.
+
+        Returns:
+            Measurement: Time of the query, voltage drop across the e-load
+                in volts and current draw from the source (negative) in amps.
+        """
+        timestamp, (volt, curr) = self.query_floats("MEAS:VOLT?;:MEAS:CURR?")
+        return Measurement(timestamp, volt, -curr)
+
+    def upload_list(self, currents: list, widths: list, count: int=1) -> bool:
+        """
+        Uploads a constant current list, then reads it back to check it.
+        Once armed and triggered, the e-load draws each current for its width in turn.
+
+        Args:
+            currents (list): Current of each step in amps.
+            widths (list): Length of each step in seconds.
+            count (int): Number of times the list runs per trigger.
+
+        Returns:
+            bool: True if the list was uploaded and read back unchanged.
+        """
+        if not self.max_list_steps:
+            print(f"List mode isn't supported on the {self.model_number}.")
+            return False
+        if len(currents) != len(widths) or not currents:
+            print("List needs one width for every current.")
+            return False
+        if len(currents) > self.max_list_steps:
+            print(f"{len(currents)} steps greater than max list steps {self.max_list_steps}.")
+            return False
+        for curr in currents:
+            if curr > self.max_curr:
+                print(f"{curr} greater than max current {self.max_curr}.")
+                return False
+
+        self.write_list(currents, widths, count)
+        read_currents, read_widths = self.read_list()
+        uploaded = len(read_currents) == len(currents) and all(
+            math.isclose(read, curr, abs_tol=LIST_CURR_TOLERANCE)
+            for read, curr in zip(read_currents, currents)
+        ) and all(
+            math.isclose(read, width, abs_tol=LIST_WIDTH_TOLERANCE)
+            for read, width in zip(read_widths, widths)
+        )
+        if not uploaded:
+            print(f"List read back as {read_currents} A, {read_widths} s.")
+        return uploaded
+
+    def run_list(self, currents: list, widths: list) -> float:
+        """
+        Uploads a constant current list, turns the input on and starts the list.
+
+        Args:
+            currents (list): Current of each step in amps.
+            widths (list): Length of each step in seconds.
+
+        Returns:
+            float: time.monotonic() when the list started, None if it couldn't be uploaded.
+        """
+        if not self.upload_list(currents, widths):
+            return None
+        self.arm_list()
+        self.toggle_output(True)
+        start = time.monotonic()
+        self.trigger()
+        return (start + time.monotonic()) / 2
+
+    def upload_transient(
+        self,
+        low_curr: float,
+        high_curr: float,
+        low_width: float,
+        high_width: float,
+        mode: str="PULS"
+    ) -> bool:
+        """
+        Sets the constant current transient levels, then reads them back to check them.
+
+        Args:
+            low_curr (float): A level current in amps.
+            high_curr (float): B level current in amps.
+            low_width (float): Length of the A level in seconds.
+            high_width (float): Length of the B level in seconds.
+            mode (str): "CONT" to switch between the levels continuously,
+                "PULS" for one B level pulse per trigger,
+                "TOGG" to switch level at every trigger.
+
+        Returns:
+            bool: True if the levels were set and read back unchanged.
+        """
+        if not self.transient:
+            print(f"Transient mode isn't supported on the {self.model_number}.")
+            return False
+        for curr in (low_curr, high_curr):
+            if curr > self.max_curr:
+                print(f"{curr} greater than max current {self.max_curr}.")
+                return False
+
+        self.write_transient(low_curr, high_curr, low_width, high_width, mode)
+        levels = (low_curr, high_curr, low_width, high_width)
+        read_levels = self.read_transient()
+        tolerances = (LIST_CURR_TOLERANCE,) * 2 + (LIST_WIDTH_TOLERANCE,) * 2
+        uploaded = all(
+            math.isclose(read, level, abs_tol=tolerance)
+            for read, level, tolerance in zip(read_levels, levels, tolerances)
+        )
+        if not uploaded:
+            print(f"Transient read back as {read_levels}.")
+        return uploaded
+
+    def trigger(self) -> None:
+        """
+        Sends a bus trigger, starting an armed list or transient.
+        """
+        self.write("*TRG")
+
+    def safe_state(self) -> None:
+        """
+        Turns the output off and unlocks the front panel.
+        """
+        self.toggle_output(False)
+        self.disable_front_panel(False)
@@ -0,0 +1,100 @@
+"""
+Asyncio wrapper for the instrument drivers.
+
+Driver methods block until the instrument replies. AsyncInstrument runs
+them in a single-thread executor per instrument, so calls to one
+instrument stay in order while instruments on different buses are polled
+at the same time. Every driver method has an async counterpart with the
+same name and arguments:
+
+    async def read_all(eload, psu, dmm):
+        return await asyncio.gather(
+            eload.measure_volt_curr(),
+            psu.measure_all(),
+            dmm.measure_volt(),
+        )
+
+    eload = AsyncInstrument(Bk8600(eload_visa_name))
+    ...
+    readings = asyncio.run(read_all(eload, psu, dmm))
+
+A sample then takes as long as the slowest instrument instead of the sum
+of all of them.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+class AsyncInstrument:
+    """
+    Class to represent an instrument driver with async methods.
+
+    Args:
+        driver (PyVisaInstrument): Instrument driver to wrap.
+
+    Attributes:
+        driver: Wrapped instrument driver.
+        executor: Single-thread executor running the driver's methods.
+    """
+    def __init__(self, driver) -> None:
+        self.driver = driver
+        name = getattr(driver, "visa_name", type(driver).__name__)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"inst {name}")
+
+    async def call(self, method: str, *args, **kwargs):
+        """
+        Calls a driver method in the instrument's executor.
+
+        Args:
+            method (str): Name of the driver method.
+            args: Arguments of the method.
+            kwargs: Keyword arguments of the method.
+
+        Returns:
+            Return value of the method.
+        """
+        loop = asyncio.get_running_loop()
+        func = functools.partial(getattr(self.driver, method), *args, **kwargs)
+        return await loop.run_in_executor(self.executor, func)
+
+    def __getattr__(self, name: str):
+        # Only called for attributes not set on the AsyncInstrument itself.
+        if name in ("driver", "executor"):
+            raise AttributeError(name)
+        attr = getattr(self.driver, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.call(name, *args, **kwargs)
+        return method
+
+    async def close(self) -> None:
+        """
+        Closes the driver and shuts down the executor.
+        """
+        if hasattr(self.driver, "close"):
+            await self.call("close")
+        self.executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+async def gather_measurements(calls: dict) -> dict:
+    """
+    Runs measurement calls on several instruments at the same time.
+
+    Args:
+        calls (dict): Awaitable measurement call by name,
+            e.g. {"eload": eload.measure_volt_curr(), "dmm": dmm.measure_volt()}.
+
+    Returns:
+        dict: Result of each call by name.
+    """
+    results = await asyncio.gather(*calls.values())
+    return dict(zip(calls.keys(), results))
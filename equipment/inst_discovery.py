@@ -0,0 +1,331 @@
+"""
+Discovery of connected instruments.
+
+Every VISA resource is probed with *IDN? at the same time, with a short
+timeout, so unresponsive ports don't add up. Serial resources that don't
+answer *IDN? at all are probed with the BK9103's GETD command, since that
+PSU has no *IDN? command (its model number has to be given when opening
+it). GETD is only sent if the port is already set up like a BK9103's
+(baud rate, data bits, parity and stop bits), so unknown devices don't
+get commands they weren't set up for.
+
+Resources already opened by a driver (see inst_registry) aren't probed,
+so discovery never talks to an instrument in the middle of a test. Their
+cached result is reused, however old. A probe that raises an unexpected
+error is recorded as failed (with the error) instead of stopping discovery.
+
+Results are cached on disk (CACHE_PATH) by VISA resource name, including
+resources that didn't answer, and are reused until they are older than
+the cache TTL. Each identified model is mapped to its driver class:
+
+    for inst in discover():
+        print(inst["visa_name"], inst["model_number"], inst["driver"])
+    eload = open_driver(discover()[0])
+
+Run as a script to print the connected instruments:
+    python inst_discovery.py --refresh
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pyvisa
+from pyvisa.constants import Parity, StopBits
+
+import dmm_ks34410a_consts as ks34410a_consts
+import eload_bk8600_consts as bk8600_consts
+import eload_dl3000_consts as dl3000_consts
+import psu_bk9103_consts as bk9103_consts
+import inst_registry
+
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".instrument_cache.json")
+# Seconds a cached result is reused for.
+CACHE_TTL = 24 * 3600
+# Timeout of each probe in ms.
+PROBE_TIMEOUT = 500
+MAX_PROBES = 16
+
+# Driver module and class by model number.
+DRIVERS = {}
+DRIVERS.update({model: ("eload_bk8600", "Bk8600") for model in bk8600_consts.MAX_CURR})
+DRIVERS.update({model: ("eload_dl3000", "Dl3000") for model in dl3000_consts.MAX_CURR})
+DRIVERS.update({model: ("psu_bk9103", "Bk9103") for model in bk9103_consts.MAX_CURR})
+DRIVERS.update({model: ("dmm_ks34410a", "Ks34410A") for model in ks34410a_consts.MODELS})
+DRIVERS["E3631A"] = ("psu_e3631a", "E363xa")
+
+BK9103_MANUFACTURER = "B&K Precision"
+# Model number reported for BK9103/9104 PSUs, which can't report their own.
+BK9103_MODEL = "9103/9104"
+# Serial port settings of a BK9103/9104 PSU.
+BK9103_PORT = {
+    "baud_rate": bk9103_consts.BAUD_RATE,
+    "data_bits": 8,
+    "parity": Parity.none,
+    "stop_bits": StopBits.one,
+}
+
+def failed_result(visa_name: str, error: str=None) -> dict:
+    """
+    Creates the result of a resource that wasn't identified.
+
+    Args:
+        visa_name (str): VISA resource name.
+        error (str): Error raised by the probe, None if the resource just didn't answer.
+
+    Returns:
+        dict: Probe result without a manufacturer or model number.
+    """
+    result = {
+        "visa_name": visa_name,
+        "idn": None,
+        "manufacturer": None,
+        "model_number": None,
+        "time": time.time(),
+    }
+    if error is not None:
+        result["error"] = error
+    return result
+
+def probe_resource(rm: pyvisa.ResourceManager, visa_name: str, timeout: int=PROBE_TIMEOUT) -> dict:
+    """
+    Identifies the instrument connected to a VISA resource.
+
+    Args:
+        rm (pyvisa.ResourceManager): Resource manager.
+        visa_name (str): VISA resource name.
+        timeout (int): Timeout of each query in ms.
+
+    Returns:
+        dict: VISA resource name, *IDN? response, manufacturer and model
+            number (None if the instrument didn't answer) and probe time.
+    """
+    result = failed_result(visa_name)
+    try:
+        inst = rm.open_resource(visa_name, open_timeout=timeout)
+    except (pyvisa.errors.VisaIOError, ValueError, OSError):
+        return result
+    try:
+        inst.timeout = timeout
+        try:
+            idn = inst.query("*IDN?").strip()
+        except pyvisa.errors.VisaIOError:
+            if visa_name.startswith("ASRL") and is_bk9103_port(inst) and probe_bk9103(inst):
+                result.update(manufacturer=BK9103_MANUFACTURER, model_number=BK9103_MODEL)
+            return result
+        fields = [field.strip() for field in idn.split(",")]
+        if len(fields) >= 2:
+            result.update(idn=idn, manufacturer=fields[0], model_number=fields[1])
+    finally:
+        try:
+            inst.close()
+        except pyvisa.errors.VisaIOError:
+            pass
+    return result
+
+def is_bk9103_port(inst) -> bool:
+    """
+    Checks if a serial resource is set up like a BK9103/9104 PSU's port.
+
+    Args:
+        inst: Open PyVISA serial resource.
+
+    Returns:
+        bool: True if the port settings match BK9103_PORT.
+    """
+    return all(getattr(inst, name, None) == value for name, value in BK9103_PORT.items())
+
+def probe_bk9103(inst) -> bool:
+    """
+    Checks if a serial resource is a BK9103/9104 PSU, which answers GETD with 9 digits.
+
+    Args:
+        inst: Open PyVISA serial resource.
+
+    Returns:
+        bool: True if the resource answered like a BK9103/9104.
+    """
+    try:
+        inst.read_termination = bk9103_consts.READ_TERMINATION
+        inst.write_termination = bk9103_consts.WRITE_TERMINATION
+        inst.clear()
+        data = inst.query("GETD").strip()
+        # Read the trailing "OK".
+        inst.read()
+    except pyvisa.errors.VisaIOError:
+        return False
+    return len(data) == 9 and data.isdigit()
+
+def load_cache(path: str=CACHE_PATH) -> dict:
+    """
+    Loads cached probe results.
+
+    Args:
+        path (str): Path of the cache file.
+
+    Returns:
+        dict: Probe results by VISA resource name, empty if there is no valid cache.
+    """
+    try:
+        with open(path, 'r', encoding="utf-8") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+def save_cache(cache: dict, path: str=CACHE_PATH) -> None:
+    """
+    Saves probe results.
+
+    Args:
+        cache (dict): Probe results by VISA resource name.
+        path (str): Path of the cache file.
+    """
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, 'w', encoding="utf-8") as file:
+            json.dump(cache, file, indent=1)
+        os.replace(tmp, path)
+    except OSError as err:
+        print(f"Could not save instrument cache: {err}")
+
+def probe_or_fail(rm: pyvisa.ResourceManager, visa_name: str, timeout: int=PROBE_TIMEOUT) -> dict:
+    """
+    Identifies the instrument connected to a VISA resource.
+    Any error raised by the probe is recorded as a failed probe.
+
+    Args:
+        rm (pyvisa.ResourceManager): Resource manager.
+        visa_name (str): VISA resource name.
+        timeout (int): Timeout of each query in ms.
+
+    Returns:
+        dict: Probe result from probe_resource, or from failed_result if the probe raised.
+    """
+    try:
+        return probe_resource(rm, visa_name, timeout)
+    except Exception as err:
+        print(f"Could not probe {visa_name}: {err}")
+        return failed_result(visa_name, repr(err))
+
+def driver_name(model_number: str) -> str:
+    """
+    Gets the name of the driver class of a model.
+
+    Args:
+        model_number (str): Model number reported by the instrument.
+
+    Returns:
+        str: Driver class name, None if there is no driver for the model.
+    """
+    if model_number == BK9103_MODEL:
+        return "Bk9103"
+    driver = DRIVERS.get(model_number)
+    return driver[1] if driver else None
+
+def discover(
+    refresh: bool=False,
+    timeout: int=PROBE_TIMEOUT,
+    ttl: float=CACHE_TTL,
+    cache_path: str=CACHE_PATH
+) -> list:
+    """
+    Finds the connected instruments, probing resources at the same time.
+    Resources with a cached result newer than the TTL, and resources open
+    in inst_registry, aren't probed again.
+
+    Args:
+        refresh (bool): True to probe every resource, ignoring the cache.
+        timeout (int): Timeout of each probe in ms.
+        ttl (float): Seconds a cached result is reused for.
+        cache_path (str): Path of the cache file, None to not use a cache.
+
+    Returns:
+        list: Identified instruments as dicts with the VISA resource name,
+            *IDN? response, manufacturer, model number and driver class name.
+    """
+    rm = inst_registry.get_resource_manager()
+    resources = rm.list_resources()
+    cache = {} if cache_path is None or refresh else load_cache(cache_path)
+
+    now = time.time()
+    to_probe = [
+        r for r in resources
+        if not inst_registry.is_open(r) and (r not in cache or now - cache[r].get("time", 0) > ttl)
+    ]
+    if to_probe:
+        with ThreadPoolExecutor(max_workers=min(MAX_PROBES, len(to_probe))) as executor:
+            for result in executor.map(lambda r: probe_or_fail(rm, r, timeout), to_probe):
+                cache[result["visa_name"]] = result
+        if cache_path is not None:
+            save_cache(cache, cache_path)
+
+    instruments = []
+    for visa_name in resources:
+        if visa_name not in cache:
+            # Open in inst_registry and never probed.
+            continue
+        result = dict(cache[visa_name])
+        if result["model_number"] is not None:
+            result["driver"] = driver_name(result["model_number"])
+            instruments.append(result)
+    return instruments
+
+def open_driver(instrument: dict, model_number: str=None):
+    """
+    Opens a discovered instrument with its driver.
+
+    Args:
+        instrument (dict): Instrument from discover.
+        model_number (str): Model number, required for BK9103/9104 PSUs ("9103" or "9104").
+
+    Returns:
+        PyVisaInstrument: Connected driver, None if there is no driver for the instrument.
+    """
+    if instrument["model_number"] == BK9103_MODEL:
+        if model_number not in bk9103_consts.MAX_CURR:
+            print(f"Model number required for BK9103/9104 PSUs, one of {list(bk9103_consts.MAX_CURR)}.")
+            return None
+        module = importlib.import_module("psu_bk9103")
+        return module.Bk9103(instrument["visa_name"], model_number)
+
+    driver = DRIVERS.get(instrument["model_number"])
+    if driver is None:
+        print(f"No driver for {instrument['manufacturer']} {instrument['model_number']}.")
+        return None
+    module = importlib.import_module(driver[0])
+    return getattr(module, driver[1])(instrument["visa_name"])
+
+def main(argv=None) -> int:
+    """
+    Prints the connected instruments from the command line.
+
+    Args:
+        argv (list): Arguments, None to use sys.argv.
+
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(description="Find connected instruments.")
+    parser.add_argument("--refresh", action="store_true", help="Probe every resource, ignoring the cache.")
+    parser.add_argument(
+        "--timeout", type=int, default=PROBE_TIMEOUT, help="Probe timeout in ms (default: %(default)s)."
+    )
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    instruments = discover(args.refresh, args.timeout)
+    for inst in instruments:
+        print(
+            f"{inst['visa_name']}  |  {inst['manufacturer']} {inst['model_number']}"
+            f"  |  Driver: {inst['driver'] or 'None'}"
+        )
+    print(f"Found {len(instruments)} instruments in {time.perf_counter() - start:.2f} s.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
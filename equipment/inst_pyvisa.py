@@ -1,9 +1,49 @@
 """
 Template for a PyVISA instrument.
+
+Drivers send setting commands through write(), which can skip commands
+that wouldn't change anything. With the write cache enabled
+(set_write_cache(True)), the last command sent for each setting is kept
+and an identical command for the same setting isn't sent again. The
+state is kept on the shared session, so drivers sharing a VISA name see
+each other's writes. It is cleared on *RST or *RCL from any of them, and
+when a write fails.
+
+Measurements that read several values with one compound query are
+returned as a Measurement, timestamped at the midpoint of the query.
+
+Connections are opened through inst_registry, so instruments share one
+resource manager and sessions are reused by VISA name. Close instruments
+with close(), or use them as context managers:
+
+    with EloadScpi(visa_name) as eload:
+        ...
+
+The latency of every command can be recorded with enable_stats(), see inst_stats.
 """
 
+import re
+import time
+from typing import NamedTuple
+
 import pyvisa
 
+import inst_registry
+from inst_stats import CommandStats
+
+class Measurement(NamedTuple):
+    """
+    Voltage and current read together from an instrument.
+
+    Attributes:
+        timestamp: Time of the measurement (seconds since epoch), midpoint of the query.
+        volt: Voltage in volts.
+        curr: Current in amps.
+    """
+    timestamp: float
+    volt: float
+    curr: float
+
 class PyVisaInstrument:
     """
     Class to represent a instrument for use with PyVISA.
@@ -12,13 +52,22 @@ class PyVisaInstrument:
         visa_name (str): VISA resource name of the instrument.
 
     Attributes:
-        inst: PyVISA resource instance.
+        inst: Shared PyVISA resource (inst_registry.ManagedResource).
+        visa_name: VISA resource name of the instrument.
         manufacturer: Manufacturer name of instrument.
         model_number: Model number of instrument.
+        closed: True once the connection was released.
+        cache_writes: True to skip writes that don't change a setting.
+        state: Last command sent for each setting, by setting name,
+            shared by the drivers of the session.
     """
     def __init__(self, visa_name: str) -> None:
-        rm = pyvisa.ResourceManager()
-        self.inst = rm.open_resource(visa_name)
+        self.cache_writes = False
+        self.closed = False
+        self.visa_name = visa_name
+        self.inst = inst_registry.open_resource(visa_name)
+        # Settings may have been lost with the connection, resend them.
+        self.inst.callbacks.append(self.clear_state)
         try:
             idn = self.inst.query("*IDN?").split(",")
             self.manufacturer = idn[0].lstrip(" ")
@@ -27,8 +76,137 @@ class PyVisaInstrument:
         except pyvisa.errors.VisaIOError:
             print(f"Connected to {visa_name}.")
 
+    @property
+    def state(self) -> dict:
+        return self.inst.state
+
+    def set_write_cache(self, state: bool) -> None:
+        """
+        Toggles skipping writes that don't change a setting.
+        Only use when the instrument is locked to remote control, so settings
+        can't be changed from the front panel.
+
+        Args:
+            state (bool): True to cache writes, False to send every write.
+        """
+        self.cache_writes = state
+        self.clear_state()
+
+    def clear_state(self, *settings: str) -> None:
+        """
+        Clears the cached state, so the next write of each setting is sent.
+
+        Args:
+            settings (str): Names of the settings to clear, none to clear all settings.
+        """
+        if settings:
+            for setting in settings:
+                self.state.pop(setting, None)
+        else:
+            self.state.clear()
+
+    def write(self, command: str, setting: str=None) -> None:
+        """
+        Sends a command to the instrument.
+        With the write cache enabled, setting commands identical to the last
+        command sent for the same setting are skipped.
+
+        Args:
+            command (str): Command to send.
+            setting (str): Name of the setting the command changes.
+                Defaults to the command header for commands with a value,
+                e.g. "CURR" for "CURR 1.5". Commands without a value or setting
+                name (e.g. "INIT") are always sent.
+        """
+        header, _, value = command.partition(" ")
+        if header.upper() in inst_registry.RESET_COMMANDS:
+            # The shared session clears the state.
+            setting = None
+        elif setting is None and value:
+            setting = header
+        if self.cache_writes and setting is not None and self.state.get(setting) == command:
+            return
+
+        try:
+            self.inst.write(command)
+        except pyvisa.errors.VisaIOError:
+            # The instrument may or may not have applied the command.
+            self.clear_state()
+            raise
+        # Recorded even without the cache, for other drivers sharing the session.
+        if setting is not None:
+            self.state[setting] = command
+
+    def query_floats(self, command: str) -> tuple:
+        """
+        Sends a query and parses every value of the response as a float.
+        Responses to compound queries (e.g. "MEAS:VOLT?;:MEAS:CURR?") are
+        separated by ";" (or "," for some instruments).
+
+        Args:
+            command (str): Query to send.
+
+        Returns:
+            tuple: Time of the query (seconds since epoch, midpoint of the
+                write and read) and list of float values.
+        """
+        start = time.time()
+        response = self.inst.query(command)
+        timestamp = (start + time.time()) / 2
+        return timestamp, [float(val) for val in re.split("[;,]", response)]
+
+    def enable_stats(self, state: bool=True) -> None:
+        """
+        Toggles recording the latency, bytes and errors of every command
+        (see inst_stats). Statistics are shared by drivers using the same connection.
+
+        Args:
+            state (bool): True to record statistics, False to stop and discard them.
+        """
+        if not state:
+            self.inst.stats = None
+        elif self.inst.stats is None:
+            self.inst.stats = CommandStats(self.visa_name)
+
+    def get_stats(self) -> CommandStats:
+        """
+        Gets the recorded command statistics.
+
+        Returns:
+            CommandStats: Statistics, None if not recorded.
+        """
+        return self.inst.stats
+
+    def safe_state(self) -> None:
+        """
+        Puts the instrument in a safe state before disconnecting
+        (e.g. output off, front panel unlocked). Does nothing by default.
+        """
+
+    def close(self) -> None:
+        """
+        Puts the instrument in a safe state and releases the connection.
+        The session is closed once no other driver is using it.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.safe_state()
+        except (pyvisa.errors.VisaIOError, pyvisa.errors.InvalidSession):
+            print(f"Could not put {self.visa_name} in a safe state.")
+        if self.clear_state in self.inst.callbacks:
+            self.inst.callbacks.remove(self.clear_state)
+        inst_registry.release_resource(self.visa_name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
     def __del__(self):
         try:
-            self.inst.close()
+            self.close()
         except AttributeError:
             pass
@@ -7,21 +7,28 @@ Also serves as a basic template for using PyVISA with a device.
 
 import pyvisa
 
+import inst_discovery
+import inst_registry
+
 # Initialize PyVISA resource manager.
-rm = pyvisa.ResourceManager()
+rm = inst_registry.get_resource_manager()
 
 try:
     while True:
         # Gets available resources (instruments).
         resource_list = rm.list_resources()
         print(resource_list)
-        # Prints the details of all available resources.
+        # Prints the details of all available resources, probed in parallel.
         print("\nAvailable Instrument List")
+        details = {inst["visa_name"]: inst for inst in inst_discovery.discover(refresh=True)}
         for index, source in enumerate(resource_list):
-            inst = rm.open_resource(source)
-            try:
-                print(f"Index: {index}  |  Instrument Details: {inst.query('*IDN?')}")
-            except pyvisa.errors.VisaIOError:
+            if source in details:
+                inst = details[source]
+                print(
+                    f"Index: {index}  |  Instrument Details: "
+                    f"{inst['idn'] or inst['manufacturer'] + ' ' + inst['model_number']}"
+                )
+            else:
                 # Instrument does not support *IDN? command
                 print(f"Index: {index}  |  Instrument Details: {source}")
         # Select a resource to communicate with, and print its VISA resource name.
@@ -0,0 +1,355 @@
+"""
+Process-wide PyVISA resource manager and connection registry.
+
+Opening a pyvisa.ResourceManager is slow, so one is shared by every
+instrument in the process. Connections are shared by VISA resource name:
+drivers opened on the same resource name (e.g. several channels of one
+instrument) use the same session. The session is closed when the last
+driver using it releases it.
+
+Connections are returned as a ManagedResource, which is used like a
+PyVISA resource. If the connection is lost (e.g. a USB or LAN instrument
+drops out), it reopens the session, reapplies the attributes that were
+set on it (timeout, baud rate, terminations, ...) and retries the call
+once. The instrument's init sequence isn't run again. Timeouts and other
+I/O errors aren't retried, the instrument may still be busy with the
+command. Writes of commands without a value (e.g. *TRG, INIT) aren't
+retried either, since the instrument may have run them before the
+connection dropped and running them twice would trigger twice.
+
+Calls to instruments on a shared bus (a GPIB board) are serialized with
+a lock per bus, instruments on separate buses (USB, LAN, serial ports)
+are accessed at the same time.
+
+Simulated resources (see inst_sim) can be registered under a VISA name
+with register_simulator; drivers opened on that name then use the
+simulated resource instead of the resource manager.
+"""
+
+import threading
+
+import pyvisa
+from pyvisa.constants import StatusCode
+from pyvisa.errors import InvalidSession, VisaIOError
+
+# VISA errors that mean the session has to be reopened.
+RECONNECT_ERRORS = (
+    StatusCode.error_connection_lost,
+    StatusCode.error_invalid_object,
+)
+
+_resource_manager = None
+# ManagedResource and number of drivers using it, by VISA resource name.
+_connections = {}
+_registry_lock = threading.RLock()
+# Simulated resources by VISA resource name.
+_simulators = {}
+# Locks of shared buses, by bus name.
+_bus_locks = {}
+# Commands that change the settings of an instrument, clearing the write cache.
+RESET_COMMANDS = ("*RST", "*RCL")
+# Interfaces where every instrument on a board shares one bus.
+SHARED_BUS_INTERFACES = ("GPIB",)
+
+def get_resource_manager() -> pyvisa.ResourceManager:
+    """
+    Gets the process-wide resource manager, opening it the first time.
+
+    Returns:
+        pyvisa.ResourceManager: Shared resource manager.
+    """
+    global _resource_manager
+    with _registry_lock:
+        if _resource_manager is None:
+            _resource_manager = pyvisa.ResourceManager()
+        return _resource_manager
+
+def register_simulator(visa_name: str, resource) -> None:
+    """
+    Registers a simulated resource, used instead of the instrument with the same VISA name.
+
+    Args:
+        visa_name (str): VISA resource name to simulate.
+        resource: Simulated resource, None to remove the simulator.
+    """
+    with _registry_lock:
+        if resource is None:
+            _simulators.pop(visa_name, None)
+        else:
+            _simulators[visa_name] = resource
+
+def bus_name(visa_name: str) -> str:
+    """
+    Gets the name of the bus an instrument is on.
+
+    Args:
+        visa_name (str): VISA resource name, e.g. "GPIB0::5::INSTR".
+
+    Returns:
+        str: Board name for shared buses (e.g. "GPIB0"), the VISA resource
+            name for instruments with their own connection.
+    """
+    board = visa_name.split("::")[0].upper()
+    if board.startswith(SHARED_BUS_INTERFACES):
+        return board
+    return visa_name
+
+def bus_lock(visa_name: str) -> threading.RLock:
+    """
+    Gets the lock of the bus an instrument is on, shared by every instrument on the bus.
+
+    Args:
+        visa_name (str): VISA resource name.
+
+    Returns:
+        threading.RLock: Bus lock.
+    """
+    with _registry_lock:
+        return _bus_locks.setdefault(bus_name(visa_name), threading.RLock())
+
+def open_session(visa_name: str):
+    """
+    Opens a session to an instrument, or gets its simulated resource.
+
+    Args:
+        visa_name (str): VISA resource name of the instrument.
+
+    Returns:
+        PyVISA resource or simulated resource.
+    """
+    with _registry_lock:
+        if visa_name in _simulators:
+            return _simulators[visa_name]
+    return get_resource_manager().open_resource(visa_name)
+
+def is_connection_error(err: Exception) -> bool:
+    """
+    Checks if an error from a VISA call means the connection was lost.
+
+    Args:
+        err (Exception): Error raised by the call.
+
+    Returns:
+        bool: True if the session should be reopened.
+    """
+    if isinstance(err, InvalidSession):
+        return True
+    return isinstance(err, VisaIOError) and err.error_code in RECONNECT_ERRORS
+
+def is_repeatable(method: str, args: tuple) -> bool:
+    """
+    Checks if a call can be sent again after reconnecting.
+    Writes of setting commands (with a value) can, writes of commands
+    that make the instrument do something (e.g. *TRG, INIT) can't.
+
+    Args:
+        method (str): Name of the PyVISA resource method.
+        args (tuple): Arguments of the method.
+
+    Returns:
+        bool: True if the call can be retried.
+    """
+    if method != "write":
+        return True
+    command = args[0] if args and isinstance(args[0], str) else ""
+    return " " in command.strip()
+
+class ManagedResource:
+    """
+    Class to represent a shared PyVISA resource that reconnects when the connection is lost.
+    Attributes not listed here are read from and set on the PyVISA resource.
+
+    Args:
+        visa_name (str): VISA resource name of the instrument.
+
+    Attributes:
+        visa_name: VISA resource name of the instrument.
+        resource: PyVISA resource instance.
+        settings: Attributes set on the resource, reapplied after reconnecting.
+        callbacks: Functions called after reconnecting.
+        lock: Lock of the instrument's bus, held during each call to the resource.
+        reconnects: Number of times the session was reopened.
+        stats: Communication statistics (inst_stats.CommandStats), None when not recorded.
+        state: Last command sent for each setting by the drivers sharing the
+            session, for their write caches (see PyVisaInstrument.write).
+            Cleared by commands in RESET_COMMANDS.
+    """
+    LOCAL_ATTRIBUTES = (
+        "visa_name", "resource", "settings", "callbacks", "lock", "reconnects", "stats", "state"
+    )
+
+    def __init__(self, visa_name: str) -> None:
+        self.visa_name = visa_name
+        self.settings = {}
+        self.callbacks = []
+        self.lock = bus_lock(visa_name)
+        self.reconnects = 0
+        self.stats = None
+        self.state = {}
+        self.resource = open_session(visa_name)
+
+    def __getattr__(self, name: str):
+        # Only called for attributes not set on the ManagedResource itself.
+        if name == "resource":
+            raise AttributeError(name)
+        return getattr(self.resource, name)
+
+    def __setattr__(self, name: str, value) -> None:
+        if name in self.LOCAL_ATTRIBUTES:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.resource, name, value)
+            self.settings[name] = value
+
+    def reconnect(self) -> None:
+        """
+        Reopens the session and reapplies the attributes set on the resource.
+        """
+        with self.lock:
+            try:
+                self.resource.close()
+            except (VisaIOError, InvalidSession):
+                pass
+            self.resource = open_session(self.visa_name)
+            for name, value in self.settings.items():
+                setattr(self.resource, name, value)
+            self.reconnects += 1
+            if self.stats is not None:
+                self.stats.reconnects += 1
+            print(f"Reconnected to {self.visa_name}.")
+            for callback in self.callbacks:
+                callback()
+
+    def call(self, method: str, *args, **kwargs):
+        """
+        Calls a method of the resource, recording its statistics when enabled.
+
+        Args:
+            method (str): Name of the PyVISA resource method.
+            args: Arguments of the method.
+            kwargs: Keyword arguments of the method.
+
+        Returns:
+            Return value of the method.
+        """
+        with self.lock:
+            if self.stats is None:
+                return self.call_with_retry(method, *args, **kwargs)
+            command = args[0] if args and isinstance(args[0], str) else ""
+            return self.stats.timed(
+                method, command, lambda: self.call_with_retry(method, *args, **kwargs)
+            )
+
+    def call_with_retry(self, method: str, *args, **kwargs):
+        """
+        Calls a method of the resource, reconnecting and retrying once if the connection was lost.
+        Calls that can't be repeated (see is_repeatable) are reconnected but not retried.
+
+        Args:
+            method (str): Name of the PyVISA resource method.
+            args: Arguments of the method.
+            kwargs: Keyword arguments of the method.
+
+        Returns:
+            Return value of the method.
+        """
+        try:
+            return getattr(self.resource, method)(*args, **kwargs)
+        except (VisaIOError, InvalidSession) as err:
+            if not is_connection_error(err):
+                raise
+            self.reconnect()
+            if not is_repeatable(method, args):
+                raise
+            return getattr(self.resource, method)(*args, **kwargs)
+
+    def write(self, *args, **kwargs):
+        command = args[0] if args and isinstance(args[0], str) else ""
+        if command.strip().split(" ")[0].upper() in RESET_COMMANDS:
+            # Settings change, whichever driver sent the command.
+            self.state.clear()
+        return self.call("write", *args, **kwargs)
+
+    def read(self, *args, **kwargs):
+        return self.call("read", *args, **kwargs)
+
+    def query(self, *args, **kwargs):
+        return self.call("query", *args, **kwargs)
+
+    def query_ascii_values(self, *args, **kwargs):
+        return self.call("query_ascii_values", *args, **kwargs)
+
+    def query_binary_values(self, *args, **kwargs):
+        return self.call("query_binary_values", *args, **kwargs)
+
+    def close(self) -> None:
+        """
+        Closes the session.
+        Use release_resource instead for sessions opened with open_resource.
+        """
+        with self.lock:
+            self.resource.close()
+
+def open_resource(visa_name: str) -> ManagedResource:
+    """
+    Opens a connection to an instrument, or reuses the open connection to it.
+    Each call must be matched by a call to release_resource.
+
+    Args:
+        visa_name (str): VISA resource name of the instrument.
+
+    Returns:
+        ManagedResource: Shared connection to the instrument.
+    """
+    with _registry_lock:
+        if visa_name in _connections:
+            _connections[visa_name][1] += 1
+        else:
+            _connections[visa_name] = [ManagedResource(visa_name), 1]
+        return _connections[visa_name][0]
+
+def is_open(visa_name: str) -> bool:
+    """
+    Checks if a driver has a connection to an instrument open.
+
+    Args:
+        visa_name (str): VISA resource name of the instrument.
+
+    Returns:
+        bool: True if the connection is open.
+    """
+    with _registry_lock:
+        return visa_name in _connections
+
+def release_resource(visa_name: str) -> None:
+    """
+    Releases a connection opened with open_resource.
+    The session is closed when no driver is using it.
+
+    Args:
+        visa_name (str): VISA resource name of the instrument.
+    """
+    with _registry_lock:
+        if visa_name not in _connections:
+            return
+        _connections[visa_name][1] -= 1
+        if _connections[visa_name][1] > 0:
+            return
+        resource = _connections.pop(visa_name)[0]
+    try:
+        resource.close()
+    except (VisaIOError, InvalidSession):
+        pass
+
+def close_all() -> None:
+    """
+    Closes every open connection, e.g. when shutting down a test station.
+    """
+    with _registry_lock:
+        resources = [connection[0] for connection in _connections.values()]
+        _connections.clear()
+    for resource in resources:
+        try:
+            resource.close()
+        except (VisaIOError, InvalidSession):
+            pass
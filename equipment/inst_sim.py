@@ -0,0 +1,780 @@
+"""
+Simulated instruments for testing and benchmarking drivers without hardware.
+
+Simulated resources answer the commands the drivers send, in place of a
+PyVISA resource:
+    SimEload    SCPI e-load (EloadScpi, Bk8600, Dl3000).
+    SimPsu      SCPI power supply (PsuScpi, E363xa).
+    SimDmm      KEYSIGHT 34410A DMM (Ks34410A), including buffered acquisition.
+    SimBk9103   BK9103/9104 PSU with its own protocol (GETD, GETS, SETD, ...),
+                replying with the data followed by "OK".
+
+Each command takes a configurable latency, and serial resources (those
+with a baud rate) also take the time to transfer every byte, so driver
+throughput can be measured on a plain computer. Instruments can share a
+SimCell, so the current set on an e-load or PSU changes the voltage the
+other instruments measure.
+
+A simulated resource is used by registering it under a VISA name with
+simulate(), after which drivers are opened as usual:
+
+    cell = SimCell(ocv=3.9, ir=0.025)
+    simulate("SIM::ELOAD", SimEload(cell))
+    eload = Bk8600("SIM::ELOAD")
+
+Run as a script to benchmark the measurement rate of every driver:
+    python inst_sim.py --latency 0.002
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+
+import numpy as np
+from pyvisa.constants import StatusCode
+from pyvisa.errors import VisaIOError
+
+import inst_registry
+
+# Seconds each command takes to process.
+DEFAULT_LATENCY = 0.001
+# Bits transferred per byte on a serial port (start, 8 data, stop).
+BITS_PER_BYTE = 10
+
+class SimCell:
+    """
+    Class to represent a simulated cell with a fixed OCV and internal resistance.
+
+    Args:
+        ocv (float): Open circuit voltage in volts.
+        ir (float): Internal resistance in ohms.
+        noise (float): Standard deviation of measurement noise in volts.
+
+    Attributes:
+        ocv: Open circuit voltage in volts.
+        ir: Internal resistance in ohms.
+        noise: Standard deviation of measurement noise in volts.
+        currents: Current into the cell from each connected instrument, in amps.
+    """
+    def __init__(self, ocv: float=3.9, ir: float=0.025, noise: float=0.0001) -> None:
+        self.ocv = ocv
+        self.ir = ir
+        self.noise = noise
+        self.currents = {}
+
+    def current(self) -> float:
+        """
+        Gets the total current into the cell.
+
+        Returns:
+            float: Current in amps, negative when discharging.
+        """
+        return sum(self.currents.values())
+
+    def voltage(self) -> float:
+        """
+        Gets the terminal voltage of the cell, with measurement noise.
+
+        Returns:
+            float: Voltage in volts.
+        """
+        return self.ocv + self.ir * self.current() + random.gauss(0, self.noise)
+
+class SimResource:
+    """
+    Class to represent a simulated PyVISA resource.
+    Subclasses override handle() to answer commands.
+
+    Args:
+        latency (float): Seconds each command takes to process.
+        baud_rate (int): Baud rate of a serial resource, None for USB/LAN resources.
+
+    Attributes:
+        latency: Seconds each command takes to process.
+        baud_rate: Baud rate of a serial resource, None for USB/LAN resources.
+        timeout: Timeout of reads in ms.
+        read_termination: Read termination characters.
+        write_termination: Write termination characters.
+        responses: Responses waiting to be read.
+        compound: True while answering a compound query.
+        commands: Number of commands received.
+        fail_next: VISA status code to raise on the next call, None for no error.
+    """
+    def __init__(self, latency: float=DEFAULT_LATENCY, baud_rate: int=None) -> None:
+        self.latency = latency
+        self.baud_rate = baud_rate
+        self.timeout = 2000
+        self.read_termination = "\n"
+        self.write_termination = "\n"
+        self.responses = []
+        self.commands = 0
+        self.fail_next = None
+        # True while answering a compound query, whose responses are read as one message.
+        self.compound = False
+
+    def transfer(self, num_bytes: int) -> None:
+        """
+        Waits for bytes to be transferred over a serial port.
+
+        Args:
+            num_bytes (int): Number of bytes.
+        """
+        if self.baud_rate:
+            time.sleep(num_bytes * BITS_PER_BYTE / self.baud_rate)
+
+    def check_connection(self) -> None:
+        """
+        Raises the error set with fail_next, to simulate a lost connection.
+        """
+        if self.fail_next is not None:
+            status, self.fail_next = self.fail_next, None
+            raise VisaIOError(status)
+
+    def write(self, command: str) -> None:
+        self.check_connection()
+        self.transfer(len(command) + len(self.write_termination or ""))
+        time.sleep(self.latency)
+        self.commands += 1
+        for part in self.split(command):
+            response = self.handle(part)
+            if response is not None:
+                self.responses.append(response)
+
+    def next_response(self):
+        """
+        Gets the oldest response waiting to be read, waiting the timeout if there is none.
+
+        Returns:
+            str or np.ndarray: Response, readings for binary responses.
+        """
+        self.check_connection()
+        if not self.responses:
+            time.sleep(self.timeout / 1000)
+            raise VisaIOError(StatusCode.error_timeout)
+        return self.responses.pop(0)
+
+    def read(self) -> str:
+        response = self.next_response()
+        # Responses to one compound query are sent as one message.
+        parts = [response]
+        while self.responses and self.compound:
+            parts.append(self.responses.pop(0))
+        text = ";".join(self.format(p) for p in parts)
+        self.transfer(len(text) + len(self.read_termination or ""))
+        return text
+
+    def query(self, command: str) -> str:
+        self.compound = ";" in command
+        self.write(command)
+        return self.read()
+
+    def query_ascii_values(self, command: str, container=list, separator: str=","):
+        text = self.query(command)
+        return container([float(val) for val in re.split(f"[{separator};]", text)])
+
+    def query_binary_values(
+        self, command: str, datatype: str="f", is_big_endian: bool=False, container=list
+    ):
+        self.compound = False
+        self.write(command)
+        values = np.atleast_1d(np.asarray(self.next_response(), dtype=float))
+        # IEEE 488.2 block header, data and termination.
+        self.transfer(2 + len(str(values.nbytes)) + values.nbytes + 1)
+        return container(values)
+
+    def clear(self) -> None:
+        self.responses.clear()
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def split(command: str) -> list:
+        """
+        Splits a compound command into its commands.
+
+        Args:
+            command (str): Command, e.g. "MEAS:VOLT?;:MEAS:CURR?".
+
+        Returns:
+            list: Commands with leading colons removed.
+        """
+        return [part.strip().lstrip(":") for part in command.split(";") if part.strip()]
+
+    @staticmethod
+    def format(value) -> str:
+        """
+        Formats a response like a SCPI instrument.
+
+        Args:
+            value (str, float or np.ndarray): Response.
+
+        Returns:
+            str: Formatted response.
+        """
+        if isinstance(value, str):
+            return value
+        return ",".join(f"{v:+.8E}" for v in np.atleast_1d(value))
+
+    def handle(self, command: str):
+        """
+        Processes one command.
+        Unknown commands are ignored, like a real instrument, so queries
+        the resource doesn't know time out.
+
+        Args:
+            command (str): Command without leading colon.
+
+        Returns:
+            Response to a query, None for commands without a response.
+        """
+        return None
+
+class SimScpi(SimResource):
+    """
+    Class to represent a simulated SCPI instrument.
+    Setting commands are stored by header, and queries of a setting return its value.
+
+    Args:
+        idn (str): *IDN? response.
+        latency (float): Seconds each command takes to process.
+        baud_rate (int): Baud rate of a serial resource, None for USB/LAN resources.
+
+    Attributes:
+        idn: *IDN? response.
+        settings: Value of each setting command, by upper case header.
+    """
+    def __init__(self, idn: str, latency: float=DEFAULT_LATENCY, baud_rate: int=None) -> None:
+        super().__init__(latency, baud_rate)
+        self.idn = idn
+        self.settings = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Restores the default settings (*RST).
+        """
+        self.settings.clear()
+
+    def handle(self, command: str):
+        header, _, value = command.partition(" ")
+        header = header.upper()
+        if header == "*IDN?":
+            return self.idn
+        if header == "*RST":
+            self.reset()
+            return None
+        if header in ("*CLS", "*OPC"):
+            return None
+        if header == "*OPC?":
+            return "1"
+        response = self.handle_scpi(header, value.strip())
+        if response is not None:
+            return response
+        if header.endswith("?"):
+            return self.settings.get(header[:-1], "0")
+        self.settings[header] = value.strip()
+        return None
+
+    def handle_scpi(self, header: str, value: str):
+        """
+        Processes a command specific to the instrument.
+
+        Args:
+            header (str): Upper case command header.
+            value (str): Command value.
+
+        Returns:
+            Response, None for commands handled as settings.
+        """
+        return None
+
+    def setting(self, header: str, default: float=0) -> float:
+        """
+        Gets a numeric setting.
+
+        Args:
+            header (str): Upper case command header.
+            default (float): Value if the setting was never set.
+
+        Returns:
+            float: Setting value.
+        """
+        try:
+            return float(self.settings.get(header, default))
+        except ValueError:
+            return default
+
+    def is_on(self, header: str) -> bool:
+        """
+        Checks if an ON/OFF setting is on.
+
+        Args:
+            header (str): Upper case command header.
+
+        Returns:
+            bool: True if the setting is ON or 1.
+        """
+        return self.settings.get(header, "OFF").upper() in ("ON", "1")
+
+class SimEload(SimScpi):
+    """
+    Class to represent a simulated SCPI e-load discharging a SimCell.
+    Constant current lists and transients run from the time of the trigger.
+
+    Args:
+        cell (SimCell): Cell connected to the e-load.
+        idn (str): *IDN? response, sets the model number the driver sees.
+        latency (float): Seconds each command takes to process.
+        baud_rate (int): Baud rate of a serial resource, None for USB/LAN resources.
+
+    Attributes:
+        cell: Cell connected to the e-load.
+        width_scale: Seconds per unit of transient widths, ms on the DL3000.
+        list_levels: Current of each list step, by step number.
+        list_widths: Length of each list step in seconds, by step number.
+        trigger_time: time.monotonic() of the last trigger, None before the first trigger.
+        triggers: Number of triggers received.
+    """
+    def __init__(
+        self,
+        cell: SimCell=None,
+        idn: str="B&K Precision, 8600, SIM, 1.0",
+        latency: float=DEFAULT_LATENCY,
+        baud_rate: int=None
+    ) -> None:
+        self.cell = cell or SimCell()
+        self.width_scale = 0.001 if "DL30" in idn.upper() else 1
+        super().__init__(idn, latency, baud_rate)
+
+    def reset(self) -> None:
+        super().reset()
+        self.settings["FUNC"] = "CURR"
+        self.settings["INP"] = "OFF"
+        self.list_levels = {}
+        self.list_widths = {}
+        self.trigger_time = None
+        self.triggers = 0
+
+    def profile_current(self) -> float:
+        """
+        Calculates the constant current of the running list or transient.
+
+        Returns:
+            float: Current in amps, None if no list or transient is running.
+        """
+        if self.trigger_time is None:
+            return None
+        elapsed = time.monotonic() - self.trigger_time
+        func_mode = self.settings.get("FUNC:MODE", "FIX").upper()
+        if func_mode.startswith("LIST") and self.list_levels:
+            steps = sorted(self.list_levels)
+            for step in steps:
+                width = float(self.list_widths.get(step, 0))
+                if elapsed < width:
+                    return float(self.list_levels[step])
+                elapsed -= width
+            # The list stays at its last current once it ends.
+            return float(self.list_levels[steps[-1]])
+        if func_mode.startswith("TRAN") or self.is_on("TRAN"):
+            low_width = self.setting("CURR:TRAN:AWID") * self.width_scale
+            high_width = self.setting("CURR:TRAN:BWID") * self.width_scale
+            mode = self.settings.get("CURR:TRAN:MODE", "CONT").upper()
+            if mode.startswith("PULS"):
+                high = elapsed < high_width
+            elif mode.startswith("TOGG"):
+                high = self.triggers % 2 == 1
+            else:
+                high = elapsed % (low_width + high_width) >= low_width
+            return self.setting("CURR:TRAN:BLEV" if high else "CURR:TRAN:ALEV")
+        return None
+
+    def load_current(self) -> float:
+        """
+        Calculates the current drawn from the cell in the current mode.
+
+        Returns:
+            float: Current in amps (positive).
+        """
+        if not self.is_on("INP"):
+            return 0
+        profile = self.profile_current()
+        if profile is not None:
+            return profile
+        mode = self.settings["FUNC"].upper()
+        ocv, ir = self.cell.ocv, self.cell.ir
+        if mode == "CURR":
+            return self.setting("CURR")
+        if mode == "RES":
+            return ocv / (self.setting("RES", 1e9) + ir)
+        if mode == "VOLT":
+            return max(0, (ocv - self.setting("VOLT")) / ir)
+        if mode == "POW":
+            return self.setting("POW") / ocv
+        return 0
+
+    def handle_scpi(self, header: str, value: str):
+        if header in ("MEAS:VOLT?", "FETC:VOLT?"):
+            self.cell.currents[id(self)] = -self.load_current()
+            return self.cell.voltage()
+        if header in ("MEAS:CURR?", "FETC:CURR?"):
+            return self.load_current()
+        if header in ("MEAS:POW?", "FETC:POW?"):
+            self.cell.currents[id(self)] = -self.load_current()
+            return self.load_current() * self.cell.voltage()
+        if header in ("*TRG", "TRIG"):
+            self.trigger_time = time.monotonic()
+            self.triggers += 1
+            return ""
+        if header in ("LIST:LEV", "LIST:WID"):
+            step, _, level = value.partition(",")
+            steps = self.list_levels if header == "LIST:LEV" else self.list_widths
+            steps[int(step)] = level
+            return ""
+        if header in ("LIST:LEV?", "LIST:WID?"):
+            steps = self.list_levels if header == "LIST:LEV?" else self.list_widths
+            return float(steps.get(int(value), 0))
+        if header == "FUNC:MODE":
+            # Changing mode stops the running list or transient.
+            self.trigger_time = None
+        return None
+
+    def handle(self, command: str):
+        # The DL3000's :SOURce root is optional, handle its commands like the 8600's.
+        if command[:5].upper() == "SOUR:":
+            command = command[5:]
+        response = super().handle(command)
+        self.cell.currents[id(self)] = -self.load_current()
+        # Commands without a response return "" from handle_scpi.
+        return None if isinstance(response, str) and response == "" else response
+
+class SimPsu(SimScpi):
+    """
+    Class to represent a simulated SCPI power supply charging a SimCell.
+    The PSU regulates the set voltage, limited to the set current.
+
+    Args:
+        cell (SimCell): Cell connected to the PSU.
+        idn (str): *IDN? response, sets the model number the driver sees.
+        latency (float): Seconds each command takes to process.
+        baud_rate (int): Baud rate of a serial resource, None for USB/LAN resources.
+    """
+    def __init__(
+        self,
+        cell: SimCell=None,
+        idn: str="HEWLETT-PACKARD,E3631A,0,SIM",
+        latency: float=DEFAULT_LATENCY,
+        baud_rate: int=None
+    ) -> None:
+        self.cell = cell or SimCell()
+        super().__init__(idn, latency, baud_rate)
+
+    def reset(self) -> None:
+        super().reset()
+        self.settings["OUTP"] = "OFF"
+
+    def output_current(self) -> float:
+        """
+        Calculates the current into the cell.
+
+        Returns:
+            float: Current in amps.
+        """
+        if not self.is_on("OUTP"):
+            return 0
+        curr = (self.setting("VOLT") - self.cell.ocv) / self.cell.ir
+        return min(max(curr, 0), self.setting("CURR"))
+
+    def handle_scpi(self, header: str, value: str):
+        if header in ("MEAS:VOLT?", "FETC:VOLT?"):
+            return self.cell.voltage() if self.is_on("OUTP") else 0.0
+        if header in ("MEAS:CURR?", "FETC:CURR?"):
+            return self.output_current()
+        return None
+
+    def handle(self, command: str):
+        response = super().handle(command)
+        self.cell.currents[id(self)] = self.output_current()
+        return response
+
+class SimDmm(SimScpi):
+    """
+    Class to represent a simulated KEYSIGHT 34410A DMM measuring a SimCell.
+    Buffered acquisitions take NPLC / LINE_FREQ seconds per sample.
+
+    Args:
+        cell (SimCell): Cell measured by the DMM.
+        idn (str): *IDN? response, sets the model number the driver sees.
+        latency (float): Seconds each command takes to process.
+        baud_rate (int): Baud rate of a serial resource, None for USB/LAN resources.
+
+    Attributes:
+        readings: Readings in reading memory.
+        armed: True when waiting for a bus trigger.
+        acquisition_start: Time the current acquisition started, None if not started.
+    """
+    LINE_FREQ = 60
+
+    def __init__(
+        self,
+        cell: SimCell=None,
+        idn: str="Agilent Technologies,34410A,SIM,1.0",
+        latency: float=DEFAULT_LATENCY,
+        baud_rate: int=None
+    ) -> None:
+        self.cell = cell or SimCell()
+        self.readings = []
+        self.armed = False
+        self.acquisition_start = None
+        super().__init__(idn, latency, baud_rate)
+
+    def reset(self) -> None:
+        super().reset()
+        self.readings = []
+        self.armed = False
+        self.acquisition_start = None
+
+    def total_samples(self) -> int:
+        """
+        Gets the number of samples in a configured acquisition.
+
+        Returns:
+            int: Samples per trigger times triggers.
+        """
+        return int(self.setting("SAMP:COUN", 1) * self.setting("TRIG:COUN", 1))
+
+    def sample_time(self) -> float:
+        """
+        Gets the time each sample takes.
+
+        Returns:
+            float: Time in seconds.
+        """
+        nplc = self.setting("VOLT:DC:NPLC", 1)
+        return max(nplc / self.LINE_FREQ, self.setting("SAMP:TIM", 0))
+
+    def collect(self, wait: bool) -> None:
+        """
+        Moves the samples taken so far into reading memory.
+
+        Args:
+            wait (bool): True to wait for the acquisition to finish.
+        """
+        if self.acquisition_start is None:
+            return
+        total = self.total_samples()
+        elapsed = time.monotonic() - self.acquisition_start
+        if wait:
+            time.sleep(max(0, total * self.sample_time() - elapsed))
+            taken = total
+        else:
+            taken = min(total, int(elapsed / self.sample_time()))
+        new = taken - self.taken
+        self.readings.extend(self.cell.voltage() for _ in range(new))
+        self.taken = taken
+        if taken >= total:
+            self.acquisition_start = None
+
+    def start(self) -> None:
+        """
+        Starts an acquisition.
+        """
+        self.acquisition_start = time.monotonic()
+        self.taken = 0
+        self.armed = False
+
+    def handle_scpi(self, header: str, value: str):
+        if header == "INIT":
+            self.readings = []
+            if self.settings.get("TRIG:SOUR", "IMM").upper() == "BUS":
+                self.armed = True
+            else:
+                self.start()
+            return ""
+        if header == "*TRG":
+            if self.armed:
+                self.start()
+            return ""
+        if header == "READ?":
+            self.readings = []
+            self.start()
+            self.collect(True)
+            return np.array(self.readings)
+        if header == "FETC?":
+            self.collect(True)
+            return np.array(self.readings)
+        if header == "R?":
+            self.collect(False)
+            count = int(value) if value else len(self.readings)
+            removed, self.readings = self.readings[:count], self.readings[count:]
+            return np.array(removed)
+        if header == "DATA:POIN?":
+            self.collect(False)
+            return str(len(self.readings))
+        return None
+
+    def handle(self, command: str):
+        response = super().handle(command)
+        # Commands without a response return "" from handle_scpi.
+        return None if isinstance(response, str) and response == "" else response
+
+class SimBk9103(SimResource):
+    """
+    Class to represent a simulated BK PRECISION 9103/9104 PSU charging a SimCell.
+    Every command is answered with "OK", after the data for GETD and GETS.
+    There is no *IDN? command, queries the PSU doesn't know time out.
+
+    Args:
+        cell (SimCell): Cell connected to the PSU.
+        latency (float): Seconds each command takes to process.
+        baud_rate (int): Baud rate of the serial port.
+
+    Attributes:
+        presets: Voltage and current setting of each preset.
+        preset: Selected preset.
+        output: True when the output is on.
+    """
+    def __init__(self, cell: SimCell=None, latency: float=DEFAULT_LATENCY, baud_rate: int=9600) -> None:
+        super().__init__(latency, baud_rate)
+        self.cell = cell or SimCell()
+        self.presets = {num: [0.0, 0.0] for num in range(4)}
+        self.preset = 3
+        self.output = False
+
+    def output_current(self) -> float:
+        """
+        Calculates the current into the cell.
+
+        Returns:
+            float: Current in amps.
+        """
+        if not self.output:
+            return 0
+        volt, curr = self.presets[self.preset]
+        return min(max((volt - self.cell.ocv) / self.cell.ir, 0), curr)
+
+    def write(self, command: str) -> None:
+        super().write(command)
+        self.cell.currents[id(self)] = self.output_current()
+
+    def handle(self, command: str):
+        # Handles every reply itself, including the "OK" after data.
+        name, args = command[:4], command[4:]
+        if name == "GETD":
+            volt = self.cell.voltage() if self.output else 0.0
+            curr = self.output_current()
+            mode = int(curr >= self.presets[self.preset][1] > 0)
+            self.responses.append(f"{int(volt * 100):04d}{int(curr * 100):04d}{mode}")
+        elif name == "GETS":
+            volt, curr = self.presets[int(args or self.preset)]
+            self.responses.append(f"{int(round(volt * 100)):04d}{int(round(curr * 100)):04d}")
+        elif name == "SETD":
+            self.presets[int(args[0])] = [int(args[1:5]) / 100, int(args[5:9]) / 100]
+        elif name == "VOLT":
+            self.presets[int(args[0])][0] = int(args[1:5]) / 100
+        elif name == "CURR":
+            self.presets[int(args[0])][1] = int(args[1:5]) / 100
+        elif name == "SOUT":
+            self.output = args == "1"
+        elif name == "SABC":
+            self.preset = int(args)
+        elif name not in ("SESS", "ENDS"):
+            # Unknown commands aren't answered.
+            return None
+        return "OK"
+
+    @staticmethod
+    def split(command: str) -> list:
+        return [command]
+
+def simulate(visa_name: str, resource: SimResource) -> SimResource:
+    """
+    Registers a simulated resource, so drivers opened on a VISA name use it.
+
+    Args:
+        visa_name (str): VISA resource name to simulate.
+        resource (SimResource): Simulated resource.
+
+    Returns:
+        SimResource: The simulated resource.
+    """
+    inst_registry.register_simulator(visa_name, resource)
+    return resource
+
+def benchmark_rate(func, duration: float=1.0) -> float:
+    """
+    Measures how many times a function runs per second.
+
+    Args:
+        func (callable): Function to run.
+        duration (float): Seconds to run for.
+
+    Returns:
+        float: Calls per second.
+    """
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        func()
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+def main(argv=None) -> int:
+    """
+    Benchmarks the measurement rate of every driver on simulated instruments.
+
+    Args:
+        argv (list): Arguments, None to use sys.argv.
+
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the drivers on simulated instruments.")
+    parser.add_argument(
+        "--latency", type=float, default=DEFAULT_LATENCY,
+        help="Seconds per command (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--duration", type=float, default=1.0, help="Seconds per benchmark (default: %(default)s)."
+    )
+    args = parser.parse_args(argv)
+
+    from dmm_ks34410a import Ks34410A
+    from eload_bk8600 import Bk8600
+    from psu_bk9103 import Bk9103
+    from psu_e3631a import E363xa
+
+    cell = SimCell()
+    simulate("SIM::ELOAD", SimEload(cell, latency=args.latency))
+    simulate("SIM::PSU", SimPsu(cell, latency=args.latency, baud_rate=9600))
+    simulate("SIM::DMM", SimDmm(cell, latency=args.latency))
+    simulate("SIM::BK9103", SimBk9103(cell, latency=args.latency))
+    eload = Bk8600("SIM::ELOAD")
+    psu = E363xa("SIM::PSU")
+    dmm = Ks34410A("SIM::DMM")
+    bk9103 = Bk9103("SIM::BK9103", "9103")
+
+    benchmarks = {
+        "Bk8600 measure_volt + measure_curr": lambda: (eload.measure_volt(), eload.measure_curr()),
+        "Bk8600 measure_volt_curr": eload.measure_volt_curr,
+        "E363xa measure_volt_curr (9600 baud)": psu.measure_volt_curr,
+        "Bk9103 measure_all (9600 baud)": bk9103.measure_all,
+        "Ks34410A measure_volt (NPLC 0.02)": lambda: dmm.measure_volt(0.02),
+    }
+    for name, func in benchmarks.items():
+        print(f"{name}: {benchmark_rate(func, args.duration):.1f}/s")
+
+    start = time.perf_counter()
+    readings = dmm.acquire(1000, nplc=0.02)
+    print(
+        f"Ks34410A acquire 1000 samples (NPLC 0.02): {len(readings)} readings "
+        f"in {time.perf_counter() - start:.3f} s"
+    )
+    for inst in (eload, psu, dmm, bk9103):
+        inst.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Per-command timing statistics of instrument communication.
+
+When enabled on an instrument (PyVisaInstrument.enable_stats), every
+write, query and read is timed and counted by command, with its bytes
+sent and received, errors and timeouts, and a histogram of its latency.
+Commands are grouped by header, without their values, e.g. "CURR 1.5" is
+counted as "CURR" and the BK9103's "CURR30150" as "CURR". Reads are
+counted under the command they follow, e.g. the "OK" read after a BK9103
+GETD as "GETD [read]". Each instrument also gets a summary row
+(TOTAL_COMMAND) with the totals of all its commands and the number of
+times its connection was reopened, which is only on that row.
+
+The statistics of several instruments are saved at the end of a run with
+save_stats:
+
+    eload.enable_stats()
+    ...
+    save_stats([eload, psu, dmm], "Command Stats.csv")
+"""
+
+import csv
+import json
+import os
+import re
+import time
+
+from pyvisa.constants import StatusCode
+from pyvisa.errors import VisaIOError
+
+# Upper edges of the latency histogram bins in seconds, the last bin has no upper edge.
+LATENCY_BINS = (0.0001, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1, 0.3, 1, 3)
+BIN_NAMES = [f"<{edge * 1000:g} ms" for edge in LATENCY_BINS] + [f">={LATENCY_BINS[-1] * 1000:g} ms"]
+STATS_COLUMNS = [
+    "Instrument",
+    "Reconnects",
+    "Command",
+    "Count",
+    "Errors",
+    "Timeouts",
+    "Total [s]",
+    "Mean [ms]",
+    "Min [ms]",
+    "Max [ms]",
+    "Bytes Out",
+    "Bytes In",
+] + BIN_NAMES
+# Command name of the summary row of each instrument.
+TOTAL_COMMAND = "[total]"
+
+def command_key(command: str) -> str:
+    """
+    Gets the name a command is counted under, without its values.
+
+    Args:
+        command (str): Command sent to the instrument.
+
+    Returns:
+        str: Command header, e.g. "CURR" for "CURR 1.5" or "CURR30150".
+    """
+    header = command.strip().split(" ")[0]
+    # Values appended to the header, as in the BK9103's protocol.
+    return re.sub(r"\d+$", "", header) or header
+
+def response_size(response) -> int:
+    """
+    Gets the size of a response, without terminations or block headers.
+
+    Args:
+        response (str, np.ndarray or list): Response.
+
+    Returns:
+        int: Size in bytes.
+    """
+    if isinstance(response, str):
+        return len(response)
+    if hasattr(response, "nbytes"):
+        return response.nbytes
+    if isinstance(response, (list, tuple)):
+        # Binary values, assumed to be 64-bit.
+        return 8 * len(response)
+    return 0
+
+class CommandStats:
+    """
+    Class to represent the communication statistics of one instrument.
+
+    Args:
+        name (str): Name of the instrument, e.g. its VISA resource name.
+
+    Attributes:
+        name: Name of the instrument.
+        commands: Statistics of each command, by command name.
+        last_command: Name of the last command written, reads are counted under it.
+        reconnects: Number of times the connection was reopened.
+    """
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.commands = {}
+        self.last_command = ""
+        self.reconnects = 0
+
+    def record(self, method: str, command: str, elapsed: float, response=None, error=None) -> None:
+        """
+        Records one call to the instrument.
+
+        Args:
+            method (str): PyVISA method called ("write", "query", "read", ...).
+            command (str): Command sent, "" for reads.
+            elapsed (float): Time the call took in seconds.
+            response: Response received, None for writes.
+            error (Exception): Error raised by the call, None if it succeeded.
+        """
+        if method == "read":
+            key = f"{self.last_command} [read]"
+        else:
+            key = command_key(command)
+            self.last_command = key
+
+        stats = self.commands.get(key)
+        if stats is None:
+            stats = {
+                "count": 0,
+                "errors": 0,
+                "timeouts": 0,
+                "total": 0.0,
+                "min": float("inf"),
+                "max": 0.0,
+                "bytes_out": 0,
+                "bytes_in": 0,
+                "bins": [0] * len(BIN_NAMES),
+            }
+            self.commands[key] = stats
+        stats["count"] += 1
+        stats["total"] += elapsed
+        stats["min"] = min(stats["min"], elapsed)
+        stats["max"] = max(stats["max"], elapsed)
+        stats["bytes_out"] += len(command)
+        stats["bytes_in"] += response_size(response)
+        stats["bins"][self.latency_bin(elapsed)] += 1
+        if error is not None:
+            stats["errors"] += 1
+            if isinstance(error, VisaIOError) and error.error_code == StatusCode.error_timeout:
+                stats["timeouts"] += 1
+
+    @staticmethod
+    def latency_bin(elapsed: float) -> int:
+        """
+        Gets the histogram bin of a latency.
+
+        Args:
+            elapsed (float): Latency in seconds.
+
+        Returns:
+            int: Index of the bin.
+        """
+        for index, edge in enumerate(LATENCY_BINS):
+            if elapsed < edge:
+                return index
+        return len(LATENCY_BINS)
+
+    def timed(self, method: str, command: str, func):
+        """
+        Calls a function and records its time, response and errors.
+
+        Args:
+            method (str): PyVISA method called.
+            command (str): Command sent, "" for reads.
+            func (callable): Function making the call.
+
+        Returns:
+            Return value of func.
+        """
+        start = time.perf_counter()
+        try:
+            response = func()
+        except Exception as err:
+            self.record(method, command, time.perf_counter() - start, error=err)
+            raise
+        self.record(method, command, time.perf_counter() - start, response)
+        return response
+
+    def row(self, command: str, stats: dict) -> dict:
+        """
+        Converts the statistics of a command to a row.
+
+        Args:
+            command (str): Command name.
+            stats (dict): Statistics of the command.
+
+        Returns:
+            dict: Row with STATS_COLUMNS, without the number of reconnects.
+        """
+        count = stats["count"]
+        row = {
+            "Instrument": self.name,
+            "Reconnects": None,
+            "Command": command,
+            "Count": count,
+            "Errors": stats["errors"],
+            "Timeouts": stats["timeouts"],
+            "Total [s]": stats["total"],
+            "Mean [ms]": 1000 * stats["total"] / count if count else None,
+            "Min [ms]": 1000 * stats["min"] if count else None,
+            "Max [ms]": 1000 * stats["max"] if count else None,
+            "Bytes Out": stats["bytes_out"],
+            "Bytes In": stats["bytes_in"],
+        }
+        row.update(zip(BIN_NAMES, stats["bins"]))
+        return row
+
+    def summary_row(self) -> dict:
+        """
+        Gets the totals of all commands and the number of reconnects.
+
+        Returns:
+            dict: Row with STATS_COLUMNS, named TOTAL_COMMAND.
+        """
+        commands = list(self.commands.values())
+        totals = {
+            name: sum(stats[name] for stats in commands)
+            for name in ("count", "errors", "timeouts", "total", "bytes_out", "bytes_in")
+        }
+        totals["min"] = min((stats["min"] for stats in commands), default=0.0)
+        totals["max"] = max((stats["max"] for stats in commands), default=0.0)
+        totals["bins"] = [
+            sum(stats["bins"][index] for stats in commands) for index in range(len(BIN_NAMES))
+        ]
+        row = self.row(TOTAL_COMMAND, totals)
+        row["Reconnects"] = self.reconnects
+        return row
+
+    def rows(self) -> list:
+        """
+        Gets the summary row, then the statistics of each command, slowest total time first.
+
+        Returns:
+            list: Statistics as dicts with STATS_COLUMNS.
+        """
+        rows = [self.row(command, stats) for command, stats in self.commands.items()]
+        rows.sort(key=lambda row: -row["Total [s]"])
+        return [self.summary_row()] + rows
+
+    def reset(self) -> None:
+        """
+        Clears all statistics.
+        """
+        self.commands.clear()
+        self.last_command = ""
+        self.reconnects = 0
+
+def save_stats(instruments: list, path: str) -> None:
+    """
+    Saves the statistics of several instruments.
+
+    Args:
+        instruments (list): Instruments (PyVisaInstrument) or CommandStats.
+            Instruments without statistics enabled are skipped.
+        path (str): Path of a .csv or .json file.
+    """
+    rows = []
+    for inst in instruments:
+        stats = inst if isinstance(inst, CommandStats) else inst.get_stats()
+        if stats is not None:
+            rows.extend(stats.rows())
+
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path, 'w', encoding="utf-8") as file:
+            json.dump(rows, file, indent=1)
+    else:
+        with open(path, 'w', newline='', encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=STATS_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
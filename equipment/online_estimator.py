@@ -0,0 +1,105 @@
+"""
+Online DC IR and OCV estimation from samples as they are measured.
+
+Gives the same results as process_single_ir_test_folders.py calculates
+from the logs afterwards, without re-reading them:
+    - A new step starts wherever Data_Timestamp_From_Step_Start goes back down.
+    - The mean voltage and current of each step ignore the very first
+      measurement of the step, unless it is the only one.
+    - The internal resistance is the least-squares slope of the mean step
+      voltages against the mean step currents.
+    - The OCV is the first voltage measured.
+
+Only running sums and means are kept, so each sample costs the same
+however long the test runs. The least-squares fit is updated with the
+means and deviations from the means (Welford's method) rather than raw
+sums of squares, which would cancel when the step currents are large and
+close together. The estimate is updated as soon as a step ends, either
+when the next step's first sample arrives or when end_step() is called.
+"""
+
+class OnlineIrEstimator:
+    """
+    Class to estimate the DC IR and OCV of a cell from samples as they are measured.
+
+    Args:
+        callback (callable): Called with the estimator every time a step ends, None for no callback.
+
+    Attributes:
+        callback: Called with the estimator every time a step ends.
+        ocv: First voltage measured, None before the first sample.
+        step_volts: Mean voltage of each finished step.
+        step_currs: Mean current of each finished step.
+    """
+    def __init__(self, callback=None) -> None:
+        self.callback = callback
+        self.ocv = None
+        self.step_volts = []
+        self.step_currs = []
+        self._step = None
+        self._last_time = None
+        # Means of the step currents and voltages, sum of squared current
+        # deviations and sum of current-voltage co-deviations.
+        self._mean_curr = 0.0
+        self._mean_volt = 0.0
+        self._curr_dev_sq = 0.0
+        self._curr_volt_dev = 0.0
+
+    def add_sample(self, step_time: float, volt: float, curr: float) -> None:
+        """
+        Adds a measured sample.
+
+        Args:
+            step_time (float): Data_Timestamp_From_Step_Start of the sample.
+            volt (float): Voltage in volts.
+            curr (float): Current in amps.
+        """
+        if self.ocv is None:
+            self.ocv = volt
+        if self._step is not None and step_time < self._last_time:
+            self.end_step()
+        if self._step is None:
+            # The first sample is kept apart, it's only the mean of single-sample steps.
+            self._step = [0, 0.0, 0.0, volt, curr]
+        else:
+            self._step[1] += volt
+            self._step[2] += curr
+        self._step[0] += 1
+        self._last_time = step_time
+
+    def end_step(self) -> None:
+        """
+        Finishes the step in progress, updates the estimate and calls the callback.
+        Does nothing if no step is in progress.
+        """
+        if self._step is None:
+            return
+        samples, volt_sum, curr_sum, first_volt, first_curr = self._step
+        self._step = None
+        if samples > 1:
+            volt = volt_sum / (samples - 1)
+            curr = curr_sum / (samples - 1)
+        else:
+            volt, curr = first_volt, first_curr
+        self.step_volts.append(volt)
+        self.step_currs.append(curr)
+        num_steps = len(self.step_currs)
+        curr_dev = curr - self._mean_curr
+        self._mean_curr += curr_dev / num_steps
+        self._mean_volt += (volt - self._mean_volt) / num_steps
+        self._curr_dev_sq += curr_dev * (curr - self._mean_curr)
+        self._curr_volt_dev += curr_dev * (volt - self._mean_volt)
+        if self.callback is not None:
+            self.callback(self)
+
+    @property
+    def ir(self) -> float:
+        """
+        Gets the internal resistance from the finished steps.
+
+        Returns:
+            float: Internal resistance in ohms, None until there are two steps with different currents.
+        """
+        if len(self.step_currs) < 2 or self._curr_dev_sq <= 0:
+            return None
+        return self._curr_volt_dev / self._curr_dev_sq
@@ -2,15 +2,16 @@
 Module driver for a BK PRECISION 9103/9104 series power supply.
 Note that this PSU uses "non-standard" serial commands.
 
-There are some commands where the return value is two messages.
-At the moment, these are cleared manually each time by querying
-an empty string.
-This could potentially be replaced by a function that automatically
-clears/saves the message buffer.
+There are some commands where the return value is two messages,
+the data followed by "OK". The "OK" is read directly after the data
+instead of sending another (empty) query, so each read is one exchange.
+
+The voltage and current settings of each preset are cached when first
+read, so setting one doesn't need a GETS exchange to check the other
+against the power rating. The front panel is locked while connected,
+so the settings can only change through this driver.
 """
 
-from pyvisa.errors import InvalidSession
-
 from inst_pyvisa import PyVisaInstrument
 import psu_bk9103_consts as bk9103_consts
 
@@ -29,6 +30,7 @@ class Bk9103(PyVisaInstrument):
         max_curr: Maximum current rating of instrument.
         max_volt: Maximum voltage rating of instrument.
         max_pow: Maximum power rating of instrument.
+        setpoints: Cached (voltage, current) settings by preset number.
     """
     def __init__(self, visa_name: str, model_number: str) -> None:
         super().__init__(visa_name)
@@ -43,6 +45,9 @@ class Bk9103(PyVisaInstrument):
         self.max_volt = bk9103_consts.MAX_VOLT[self.model_number]
         self.max_curr = bk9103_consts.MAX_CURR[self.model_number]
         self.max_pow = bk9103_consts.MAX_POW[self.model_number]
+        self.setpoints = {}
+        # The instrument may have been power cycled when the connection was lost.
+        self.inst.callbacks.append(self.clear_setpoints)
 
         # Initialize settings of PSU.
         self.toggle_output(False)
@@ -76,6 +81,45 @@ class Bk9103(PyVisaInstrument):
         """
         return float(val) / 100
 
+    def get_setpoints(self, preset_num: int=3) -> tuple:
+        """
+        Gets the output voltage and current settings of the PSU in one exchange,
+        and updates the cached settings.
+
+        Args:
+            preset_num (int): Preset to use (0=A, 1=B, 2=C, 3=Normal).
+
+        Returns:
+            tuple: Set voltage in volts and set current in amps.
+        """
+        data = self.inst.query(f"GETS{preset_num}")
+        # Read the trailing "OK".
+        self.inst.read()
+        setpoints = (self.query_to_float(data[0:4]), self.query_to_float(data[4:8]))
+        self.setpoints[preset_num] = setpoints
+        return setpoints
+
+    def clear_setpoints(self) -> None:
+        """
+        Clears the cached setpoints, so they are read again before the next change.
+        """
+        self.setpoints.clear()
+
+    def cached_setpoints(self, preset_num: int=3) -> tuple:
+        """
+        Gets the cached output voltage and current settings of the PSU,
+        reading them from the PSU the first time.
+
+        Args:
+            preset_num (int): Preset to use (0=A, 1=B, 2=C, 3=Normal).
+
+        Returns:
+            tuple: Set voltage in volts and set current in amps.
+        """
+        if preset_num not in self.setpoints:
+            return self.get_setpoints(preset_num)
+        return self.setpoints[preset_num]
+
     def set_curr(self, curr: float, preset_num: int=3) -> None:
         """
         Sets the output current of the PSU.
@@ -85,9 +129,10 @@ class Bk9103(PyVisaInstrument):
             preset_num (int): Preset to use (0=A, 1=B, 2=C, 3=Normal).
         """
         curr = round(curr, 2)
-        volt = self.get_volt(preset_num)
+        volt = self.cached_setpoints(preset_num)[0]
         if curr <= self.max_curr and curr * volt <= self.max_pow:
             self.inst.query(f"CURR{preset_num}{self.float_to_4_dig(curr)}")
+            self.setpoints[preset_num] = (volt, curr)
         else:
             print("Invalid current.")
 
@@ -101,10 +146,21 @@ class Bk9103(PyVisaInstrument):
         Returns:
             float: Set current value in amps.
         """
-        curr = self.inst.query(f"GETS{preset_num}")[4:8]
-        # Clear output buffer
-        self.inst.query("")
-        return self.query_to_float(curr)
+        return self.get_setpoints(preset_num)[1]
+
+    def measure_all(self) -> tuple:
+        """
+        Measures the output voltage, current and power of the PSU in one exchange.
+
+        Returns:
+            tuple: Displayed voltage in volts, current in amps and power in watts.
+        """
+        data = self.inst.query("GETD")
+        # Read the trailing "OK".
+        self.inst.read()
+        volt = self.query_to_float(data[0:4])
+        curr = self.query_to_float(data[4:8])
+        return volt, curr, volt * curr
 
     def measure_curr(self) -> float:
         """
@@ -113,10 +169,7 @@ class Bk9103(PyVisaInstrument):
         Returns:
             float: Displayed current value in amps.
         """
-        curr = self.inst.query("GETD")[4:8]
-        # Clear output buffer
-        self.inst.query("")
-        return self.query_to_float(curr)
+        return self.measure_all()[1]
 
     def set_volt(self, volt: float, preset_num: int=3) -> None:
         """
@@ -127,9 +180,10 @@ class Bk9103(PyVisaInstrument):
             preset_num (int): Preset to use (0=A, 1=B, 2=C, 3=Normal).
         """
         volt = round(volt, 2)
-        curr = self.get_curr(preset_num)
+        curr = self.cached_setpoints(preset_num)[1]
         if volt <= self.max_volt and volt * curr <= self.max_pow:
             self.inst.query(f"VOLT{preset_num}{self.float_to_4_dig(volt)}")
+            self.setpoints[preset_num] = (volt, curr)
         else:
             print("Invalid voltage.")
 
@@ -143,10 +197,7 @@ class Bk9103(PyVisaInstrument):
         Returns:
             float: Set voltage value in volts.
         """
-        volt = self.inst.query(f"GETS{preset_num}")[0:4]
-        # Clear output buffer
-        self.inst.query("")
-        return self.query_to_float(volt)
+        return self.get_setpoints(preset_num)[0]
 
     def measure_volt(self) -> float:
         """
@@ -155,10 +206,7 @@ class Bk9103(PyVisaInstrument):
         Returns:
             float: Displayed voltage value in volts.
         """
-        volt = self.inst.query("GETD")[0:4]
-        # Clear output buffer
-        self.inst.query("")
-        return self.query_to_float(volt)
+        return self.measure_all()[0]
 
     def set_curr_volt(self, curr: float, volt: float, preset_num: int=3) -> None:
         """
@@ -179,6 +227,7 @@ class Bk9103(PyVisaInstrument):
             self.inst.query(
                 f"SETD{preset_num}{self.float_to_4_dig(volt)}{self.float_to_4_dig(curr)}"
             )
+            self.setpoints[preset_num] = (volt, curr)
         else:
             print("Invalid voltage and current combination.")
 
@@ -189,7 +238,7 @@ class Bk9103(PyVisaInstrument):
         Returns:
             float: Output power value.
         """
-        return self.measure_volt() * self.measure_curr()
+        return self.measure_all()[2]
 
     def toggle_output(self, state: bool) -> None:
         """
@@ -224,11 +273,20 @@ class Bk9103(PyVisaInstrument):
             self.inst.query("SESS")
         else:
             self.inst.query("ENDS")
+            # Settings can be changed from the front panel once unlocked.
+            self.setpoints.clear()
 
-    def __del__(self):
-        try:
-            self.toggle_output(False)
-            self.disable_front_panel(False)
-            self.inst.close()
-        except (AttributeError, InvalidSession):
-            pass
+    def safe_state(self) -> None:
+        """
+        Turns the output off and unlocks the front panel.
+        """
+        self.toggle_output(False)
+        self.disable_front_panel(False)
+
+    def close(self) -> None:
+        """
+        Puts the instrument in a safe state and releases the connection.
+        """
+        if self.clear_setpoints in self.inst.callbacks:
+            self.inst.callbacks.remove(self.clear_setpoints)
+        super().close()
@@ -42,7 +42,9 @@ class E363xa(PsuScpi):
             self.min_volt = e3631a_consts.MIN_VOLT[channel]
             self.max_volt = e3631a_consts.MAX_VOLT[channel]
             self.max_curr = e3631a_consts.MAX_CURR[channel]
-            self.inst.write(f"INST:NSEL {channel}")
+            self.write(f"INST:NSEL {channel}")
+            # Voltage and current settings apply to the selected channel.
+            self.clear_state("VOLT", "CURR")
         else:
             print("Invalid channel.")
 
@@ -64,6 +66,6 @@ class E363xa(PsuScpi):
         """
         volt = round(volt, 3)
         if self.min_volt <= volt <= self.max_volt:
-            self.inst.write(f"VOLT {volt}")
+            self.write(f"VOLT {volt}")
         else:
             print(f"Invalid voltage, voltage range: {self.min_volt} to {self.max_volt}V.")
@@ -3,9 +3,7 @@ Module driver template for a SCPI VISA power supply.
 Implements all the standard SCPI commands for PSU control.
 """
 
-from pyvisa.errors import InvalidSession
-
-from inst_pyvisa import PyVisaInstrument
+from inst_pyvisa import Measurement, PyVisaInstrument
 
 class PsuScpi(PyVisaInstrument):
     """
@@ -25,7 +23,7 @@ class PsuScpi(PyVisaInstrument):
         super().__init__(visa_name)
 
         # Initialize settings of PSU.
-        self.inst.write("*RST")
+        self.write("*RST")
         self.disable_front_panel(True)
         self.max_curr = 0
         self.max_volt = 0
@@ -41,7 +39,7 @@ class PsuScpi(PyVisaInstrument):
             curr (float): Current level in amps.
         """
         if curr <= self.max_curr:
-            self.inst.write(f"CURR {curr}")
+            self.write(f"CURR {curr}")
         else:
             print(f"Invalid current, max current {self.max_curr}A.")
 
@@ -52,7 +50,7 @@ class PsuScpi(PyVisaInstrument):
         Returns:
             float: Measured current value in amps.
         """
-        return self.inst.query("MEAS:CURR?")
+        return float(self.inst.query("MEAS:CURR?"))
 
     def set_volt(self, volt: float) -> None:
         """
@@ -62,7 +60,7 @@ class PsuScpi(PyVisaInstrument):
             volt (float): Voltage level in volts.
         """
         if volt <= self.max_volt:
-            self.inst.write(f"VOLT {volt}")
+            self.write(f"VOLT {volt}")
         else:
             print(f"Invalid voltage, max voltage: {self.max_volt}V.")
 
@@ -71,9 +69,9 @@ class PsuScpi(PyVisaInstrument):
         Measures the output voltage of the PSU.
 
         Returns:
-            float: Measured voltage value in amps.
+            float: Measured voltage value in volts.
         """
-        return self.inst.query("MEAS:VOLT?")
+        return float(self.inst.query("MEAS:VOLT?"))
 
     def measure_pow(self) -> float:
         """
@@ -82,7 +80,19 @@ class PsuScpi(PyVisaInstrument):
         Returns:
             float: Output power value.
         """
-        return self.measure_volt() * self.measure_curr()
+        measurement = self.measure_volt_curr()
+        return measurement.volt * measurement.curr
+
+    def measure_volt_curr(self) -> Measurement:
+        """
+        Measures the output voltage and current of the PSU with one compound
+        query, so both values are from the same moment.
+
+        Returns:
+            Measurement: Time of the query, voltage in volts and current in amps.
+        """
+        timestamp, (volt, curr) = self.query_floats("MEAS:VOLT?;:MEAS:CURR?")
+        return Measurement(timestamp, volt, curr)
 
     def toggle_output(self, state: bool) -> None:
         """
@@ -92,9 +102,9 @@ class PsuScpi(PyVisaInstrument):
             state (bool): True for ON, False for OFF.
         """
         if state:
-            self.inst.write("OUTP ON")
+            self.write("OUTP ON")
         else:
-            self.inst.write("OUTP OFF")
+            self.write("OUTP OFF")
 
     def disable_front_panel(self, state) -> None:
         """
@@ -105,14 +115,13 @@ class PsuScpi(PyVisaInstrument):
             state (bool): True for locked, False for unlocked.
         """
         if state:
-            self.inst.write("SYST:REM")
+            self.write("SYST:REM", setting="SYST")
         else:
-            self.inst.write("SYST:LOC")
-
-    def __del__(self):
-        try:
-            self.toggle_output(False)
-            self.disable_front_panel(False)
-            self.inst.close()
-        except (AttributeError, InvalidSession):
-            pass
+            self.write("SYST:LOC", setting="SYST")
+
+    def safe_state(self) -> None:
+        """
+        Turns the output off and unlocks the front panel.
+        """
+        self.toggle_output(False)
+        self.disable_front_panel(False)
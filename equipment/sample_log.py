@@ -0,0 +1,249 @@
+"""
+Append-only binary log of test samples.
+
+Samples are stored as fixed-width records (RECORD_DTYPE) after a small
+header describing the record layout, so a log is read back as a NumPy
+structured array by memory-mapping it, without parsing:
+
+    with SampleLogWriter(path) as log:
+        log.append(timestamp, data_time, step_time, step, volt, curr)
+    samples = read_sample_log(path)
+    samples["Voltage"].mean()
+
+Samples are buffered and written in batches, when BATCH_SIZE samples
+are buffered or FSYNC_INTERVAL seconds after the last fsync, whichever
+comes first, and the file is fsynced at most every FSYNC_INTERVAL
+seconds, so logging doesn't wait for the disk on every sample. After a
+crash, the log holds every batch written before it, so at most about
+FSYNC_INTERVAL seconds of samples are lost, and a partly written last
+record is ignored when reading.
+
+export_csv converts a log to the csv format the data processing scripts
+read (LOG_COLUMNS, also used by step_sequencer for csv logs).
+"""
+
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"CELLLOG\x00"
+VERSION = 1
+# Header is padded to a multiple of this, so the records start on a 64 byte boundary.
+# The records themselves are packed (52 bytes), their fields aren't aligned.
+HEADER_ALIGN = 64
+SAMPLE_LOG_EXTENSION = ".samples"
+
+RECORD_DTYPE = np.dtype([
+    ("Timestamp", "<f8"),
+    ("Data_Timestamp", "<f8"),
+    ("Data_Timestamp_From_Step_Start", "<f8"),
+    ("Step", "<u4"),
+    ("Voltage", "<f8"),
+    ("Current", "<f8"),
+    ("Temperature", "<f8"),
+])
+# Columns of csv test logs.
+LOG_COLUMNS = [
+    "Timestamp",
+    "Voltage",
+    "Current",
+    "Data_Timestamp",
+    "Data_Timestamp_From_Step_Start",
+]
+
+# Samples buffered before they are written.
+BATCH_SIZE = 256
+# Maximum seconds between fsyncs.
+FSYNC_INTERVAL = 1.0
+
+def make_header(dtype: np.dtype=RECORD_DTYPE) -> bytes:
+    """
+    Makes the header of a sample log: magic, header length and the record layout as json.
+
+    Args:
+        dtype (np.dtype): Record dtype.
+
+    Returns:
+        bytes: Header, padded to a multiple of HEADER_ALIGN bytes.
+    """
+    layout = json.dumps({"version": VERSION, "descr": dtype.descr}).encode()
+    length = len(MAGIC) + 4 + len(layout)
+    padded = -(-length // HEADER_ALIGN) * HEADER_ALIGN
+    return MAGIC + struct.pack("<I", padded) + layout + b" " * (padded - length)
+
+def read_header(path: str) -> tuple:
+    """
+    Reads the header of a sample log.
+
+    Args:
+        path (str): Path of the sample log.
+
+    Returns:
+        tuple: Record dtype and header length in bytes.
+    """
+    with open(path, 'rb') as file:
+        prefix = file.read(len(MAGIC) + 4)
+        if prefix[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a sample log.")
+        length = struct.unpack("<I", prefix[len(MAGIC):])[0]
+        layout = json.loads(file.read(length - len(prefix)).decode())
+    descr = [tuple(field) for field in layout["descr"]]
+    return np.dtype(descr), length
+
+class SampleLogWriter:
+    """
+    Class to represent a sample log being written.
+
+    Args:
+        path (str): Path of the sample log, created or appended to.
+        batch_size (int): Samples buffered before they are written.
+        fsync_interval (float): Maximum seconds between fsyncs.
+
+    Attributes:
+        path: Path of the sample log.
+        buffer: Preallocated records waiting to be written.
+        buffered: Number of records in the buffer.
+        fsync_interval: Maximum seconds between fsyncs.
+        last_fsync: time.monotonic() of the last fsync.
+        count: Number of samples appended.
+    """
+    def __init__(
+        self,
+        path: str,
+        batch_size: int=BATCH_SIZE,
+        fsync_interval: float=FSYNC_INTERVAL
+    ) -> None:
+        self.path = path
+        self.buffer = np.zeros(batch_size, dtype=RECORD_DTYPE)
+        self.buffered = 0
+        self.fsync_interval = fsync_interval
+        self.count = 0
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new:
+            dtype, header_len = read_header(path)
+            if dtype != RECORD_DTYPE:
+                raise ValueError(f"{path} has a different record layout.")
+            # Drop a partly written record, so appended records start on a record boundary.
+            size = os.path.getsize(path)
+            with open(path, 'r+b') as file:
+                file.truncate(size - (size - header_len) % RECORD_DTYPE.itemsize)
+        self.file = open(path, 'ab')
+        if new:
+            self.file.write(make_header())
+            self.sync()
+        self.last_fsync = time.monotonic()
+
+    def append(
+        self,
+        timestamp: float,
+        data_time: float,
+        step_time: float,
+        step: int,
+        volt: float,
+        curr: float,
+        temp: float=float("nan")
+    ) -> None:
+        """
+        Appends a sample, writing the buffered samples when the buffer is
+        full or the last fsync is older than the interval.
+
+        Args:
+            timestamp (float): Time of the sample, seconds since epoch.
+            data_time (float): Seconds since the test started.
+            step_time (float): Seconds since the step started.
+            step (int): Step number.
+            volt (float): Voltage in volts.
+            curr (float): Current in amps.
+            temp (float): Temperature in degrees C, NaN if not measured.
+        """
+        self.buffer[self.buffered] = (timestamp, data_time, step_time, step, volt, curr, temp)
+        self.buffered += 1
+        self.count += 1
+        if (
+            self.buffered == len(self.buffer)
+            or time.monotonic() - self.last_fsync >= self.fsync_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered samples, and fsyncs if the last fsync is older than the interval.
+        """
+        if self.buffered:
+            self.file.write(self.buffer[:self.buffered].tobytes())
+            self.buffered = 0
+        self.file.flush()
+        if time.monotonic() - self.last_fsync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        """
+        Writes written samples to disk.
+        """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_fsync = time.monotonic()
+
+    def close(self) -> None:
+        """
+        Writes the buffered samples to disk and closes the log.
+        """
+        if self.file.closed:
+            return
+        self.flush()
+        self.sync()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def read_sample_log(path: str) -> np.ndarray:
+    """
+    Memory-maps a sample log as a structured array.
+    A partly written last record is ignored.
+
+    Args:
+        path (str): Path of the sample log.
+
+    Returns:
+        np.ndarray: Samples with the fields of RECORD_DTYPE, read-only.
+    """
+    dtype, header_len = read_header(path)
+    count = (os.path.getsize(path) - header_len) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=header_len, shape=(count,))
+
+def export_csv(path: str, csv_path: str=None) -> str:
+    """
+    Exports a sample log to a csv test log.
+
+    Args:
+        path (str): Path of the sample log.
+        csv_path (str): Path of the csv file, None for the sample log's path with a .csv extension.
+
+    Returns:
+        str: Path of the csv file.
+    """
+    if csv_path is None:
+        csv_path = os.path.splitext(path)[0] + ".csv"
+    samples = read_sample_log(path)
+    data = np.column_stack([samples[column] for column in LOG_COLUMNS])
+    # Write to a temporary file first so a partial file is never picked up as a log.
+    tmp = csv_path + ".tmp"
+    np.savetxt(
+        tmp,
+        data,
+        fmt=["%.6f", "%.10g", "%.10g", "%.6f", "%.6f"],
+        delimiter=",",
+        header=",".join(LOG_COLUMNS),
+        comments="",
+    )
+    os.replace(tmp, csv_path)
+    return csv_path
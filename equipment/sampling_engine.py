@@ -0,0 +1,252 @@
+"""
+Multi-instrument sampling engine.
+
+Each instrument is sampled by its own thread at a fixed period, so a slow
+bus doesn't delay the other instruments. Sample times are scheduled from
+the start time (start + n * period) with time.monotonic, so delays don't
+accumulate; if a reading takes longer than the period, the missed sample
+times are skipped and counted.
+
+Readings are written into a preallocated NumPy ring buffer per instrument,
+one row per sample: the time of the reading (seconds since epoch) followed
+by the values the read function returns. Each buffer has one writer (the
+sampling thread), so loggers and live views read it without locks:
+
+    engine = SamplingEngine()
+    eload_data = engine.add_instrument(
+        "eload", lambda: eload.measure_volt_curr()[1:], ["Voltage", "Current"], period=0.1
+    )
+    engine.add_instrument("dmm", lambda: (dmm.measure_volt(),), ["Voltage"], period=0.05)
+    engine.start()
+    index = 0
+    while testing:
+        rows, index = eload_data.read_since(index)
+        ...
+    engine.stop()
+"""
+
+import threading
+import time
+
+import numpy as np
+
+# Rows of each ring buffer, about 28 minutes at 10 ms per sample.
+DEFAULT_CAPACITY = 2 ** 17
+
+class RingBuffer:
+    """
+    Class to represent a preallocated ring buffer of readings with one writer.
+
+    Args:
+        columns (list): Column names of a row.
+        capacity (int): Number of rows kept.
+
+    Attributes:
+        columns: Column names of a row.
+        capacity: Number of rows kept.
+        data: Array of rows, shape (capacity, len(columns)).
+        count: Number of rows written since the buffer was created.
+    """
+    def __init__(self, columns: list, capacity: int=DEFAULT_CAPACITY) -> None:
+        self.columns = list(columns)
+        self.capacity = capacity
+        self.data = np.zeros((capacity, len(self.columns)))
+        self.count = 0
+
+    def append(self, row) -> None:
+        """
+        Writes a row, overwriting the oldest row when the buffer is full.
+        Only call from the writing thread.
+
+        Args:
+            row (sequence): Values of each column.
+        """
+        self.data[self.count % self.capacity] = row
+        # Publish the row only after it's written.
+        self.count += 1
+
+    def read_since(self, index: int) -> tuple:
+        """
+        Copies the rows written since a given row.
+        Rows that were already overwritten are skipped.
+
+        Args:
+            index (int): Number of rows already read, 0 to read from the start.
+
+        Returns:
+            tuple: Array of rows and the index to read from next time.
+        """
+        end = self.count
+        start = max(index, end - self.capacity)
+        rows = self._copy(start, end)
+        # Drop rows the writer overwrote while they were being copied, including
+        # the row in the slot it may be writing now (index count - capacity).
+        overwritten = self.count + 1 - self.capacity - start
+        if overwritten > 0:
+            rows = rows[overwritten:]
+        return rows, end
+
+    def latest(self, num_rows: int=1) -> np.ndarray:
+        """
+        Copies the most recent rows.
+
+        Args:
+            num_rows (int): Number of rows.
+
+        Returns:
+            np.ndarray: Up to num_rows rows, oldest first.
+        """
+        end = self.count
+        return self.read_since(max(0, end - num_rows))[0][:num_rows]
+
+    def _copy(self, start: int, end: int) -> np.ndarray:
+        """
+        Copies rows by their index since the buffer was created.
+
+        Args:
+            start (int): Index of the first row.
+            end (int): Index after the last row.
+
+        Returns:
+            np.ndarray: Copied rows.
+        """
+        first = start % self.capacity
+        last = first + (end - start)
+        if last <= self.capacity:
+            return self.data[first:last].copy()
+        return np.concatenate((self.data[first:], self.data[:last - self.capacity]))
+
+class Sampler(threading.Thread):
+    """
+    Class to represent a thread sampling one instrument at a fixed period.
+
+    Args:
+        name (str): Name of the instrument.
+        read (callable): Function returning the values of one reading.
+        buffer (RingBuffer): Buffer to write the readings to.
+        period (float): Time between readings in seconds.
+
+    Attributes:
+        read: Function returning the values of one reading.
+        buffer: Buffer the readings are written to.
+        period: Time between readings in seconds.
+        missed: Number of sample times skipped because a reading ran late.
+        errors: Number of readings that raised an exception.
+        stop_event: Set to stop sampling.
+    """
+    def __init__(self, name: str, read, buffer: RingBuffer, period: float) -> None:
+        super().__init__(name=f"sampler {name}", daemon=True)
+        self.read = read
+        self.buffer = buffer
+        self.period = period
+        self.missed = 0
+        self.errors = 0
+        self.stop_event = threading.Event()
+
+    def run(self) -> None:
+        row = np.zeros(len(self.buffer.columns))
+        start = time.monotonic()
+        sample_num = 0
+        while not self.stop_event.is_set():
+            delay = start + sample_num * self.period - time.monotonic()
+            if delay > 0 and self.stop_event.wait(delay):
+                break
+
+            before = time.time()
+            try:
+                values = self.read()
+            except Exception as err:
+                self.errors += 1
+                print(f"{self.name} reading failed: {err}")
+            else:
+                row[0] = (before + time.time()) / 2
+                row[1:] = values
+                self.buffer.append(row)
+
+            # Skip sample times that have already passed.
+            sample_num += 1
+            late = int((time.monotonic() - start) / self.period) - sample_num + 1
+            if late > 0:
+                self.missed += late
+                sample_num += late
+
+    def stop(self) -> None:
+        """
+        Stops sampling after the current reading.
+        """
+        self.stop_event.set()
+
+class SamplingEngine:
+    """
+    Class to represent a set of instruments sampled in parallel.
+
+    Attributes:
+        samplers: Sampler of each instrument, by name.
+    """
+    def __init__(self) -> None:
+        self.samplers = {}
+
+    def add_instrument(
+        self,
+        name: str,
+        read,
+        columns: list,
+        period: float,
+        capacity: int=DEFAULT_CAPACITY
+    ) -> RingBuffer:
+        """
+        Adds an instrument to sample.
+
+        Args:
+            name (str): Name of the instrument.
+            read (callable): Function returning the values of one reading, in column order.
+            columns (list): Names of the values returned by read.
+            period (float): Time between readings in seconds.
+            capacity (int): Number of readings kept in the buffer.
+
+        Returns:
+            RingBuffer: Buffer of the readings, with a "Timestamp" column first.
+        """
+        buffer = RingBuffer(["Timestamp"] + list(columns), capacity)
+        self.samplers[name] = Sampler(name, read, buffer, period)
+        return buffer
+
+    def buffer(self, name: str) -> RingBuffer:
+        """
+        Gets the buffer of an instrument.
+
+        Args:
+            name (str): Name of the instrument.
+
+        Returns:
+            RingBuffer: Buffer of the readings.
+        """
+        return self.samplers[name].buffer
+
+    def start(self) -> None:
+        """
+        Starts sampling every instrument.
+        """
+        for sampler in self.samplers.values():
+            sampler.start()
+
+    def stop(self) -> None:
+        """
+        Stops sampling and waits for every thread to finish its current reading.
+        """
+        for sampler in self.samplers.values():
+            sampler.stop()
+        for sampler in self.samplers.values():
+            sampler.join()
+
+    def stats(self) -> dict:
+        """
+        Gets the number of readings, missed sample times and errors of each instrument.
+
+        Returns:
+            dict: Counts by instrument name.
+        """
+        return {
+            name: {"readings": s.buffer.count, "missed": s.missed, "errors": s.errors}
+            for name, s in self.samplers.items()
+        }
@@ -0,0 +1,161 @@
+"""
+Test station running cells on several channels at the same time.
+
+Each channel is an e-load (and optionally a PSU) testing one cell, with
+its own cell number and output folder. Every channel runs its tests in a
+StepSequencer on its own thread, so a channel waiting for an instrument
+doesn't hold up the others. Instruments on separate buses (USB, LAN,
+serial ports) are accessed at the same time, while calls to instruments
+sharing a GPIB board are serialized by the board's lock (see
+inst_registry), so channels interleave on a shared bus until it is
+saturated.
+
+Example:
+    station = Station("/data/tester1")
+    station.add_channel(1, Bk8600("USB0::...::1::INSTR"))
+    station.add_channel(2, Dl3000("USB0::...::2::INSTR"), E363xa("ASRL3::INSTR"))
+    logs = station.run([
+        Test("Rest", [Rest(10)]),
+        Test("Single_IR_Test", [IrPulse([1, 5], 2)]),
+    ])
+"""
+
+import threading
+import time
+
+from step_sequencer import DEFAULT_PERIOD, StepSequencer
+
+class Station:
+    """
+    Class to represent a test station with several channels.
+
+    Args:
+        folder (str): Default output directory of the channels.
+        period (float): Default time between samples in seconds.
+        on_result (callable): Called with the cell number, result name and value
+            when a channel's DC IR or OCV is updated, see StepSequencer.
+
+    Attributes:
+        folder: Default output directory of the channels.
+        period: Default time between samples in seconds.
+        on_result: Called when a channel's DC IR or OCV is updated.
+        channels: StepSequencer of each channel, by cell number.
+        errors: Error that stopped each failed channel, by cell number.
+    """
+    def __init__(self, folder: str, period: float=DEFAULT_PERIOD, on_result=None) -> None:
+        self.folder = folder
+        self.period = period
+        self.on_result = on_result
+        self.channels = {}
+        self.errors = {}
+
+    def add_channel(
+        self,
+        cell_num: int,
+        eload=None,
+        psu=None,
+        folder: str=None,
+        period: float=None
+    ) -> StepSequencer:
+        """
+        Adds a channel testing one cell.
+
+        Args:
+            cell_num (int): Cell number of the channel.
+            eload (EloadScpi): E-load of the channel, None if not used.
+            psu (PsuScpi or Bk9103): PSU of the channel, None if not used.
+            folder (str): Output directory, None for the station's directory.
+            period (float): Time between samples in seconds, None for the station's period.
+
+        Returns:
+            StepSequencer: Sequencer of the channel.
+        """
+        if cell_num in self.channels:
+            raise ValueError(f"Cell {cell_num} already has a channel.")
+        sequencer = StepSequencer(
+            cell_num,
+            folder or self.folder,
+            eload,
+            psu,
+            period or self.period,
+            on_result=self.on_result,
+        )
+        self.channels[cell_num] = sequencer
+        return sequencer
+
+    def run(self, tests, timeout: float=None) -> dict:
+        """
+        Runs tests on every channel at the same time.
+        A channel that fails stops by itself, the other channels keep running.
+
+        Args:
+            tests (list or dict): Tests run on every channel, or tests by cell number.
+            timeout (float): Seconds to wait before stopping every channel,
+                None to wait for the tests to end.
+
+        Returns:
+            dict: Paths of the test logs of each channel, by cell number.
+        """
+        self.errors = {}
+        logs = {cell_num: [] for cell_num in self.channels}
+        threads = []
+        for cell_num, sequencer in self.channels.items():
+            sequencer.stop_event.clear()
+            channel_tests = tests.get(cell_num, []) if isinstance(tests, dict) else tests
+            thread = threading.Thread(
+                target=self.run_channel,
+                args=(cell_num, sequencer, channel_tests, logs[cell_num]),
+                name=f"channel {cell_num}",
+                daemon=True,
+            )
+            thread.start()
+            threads.append(thread)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            for thread in threads:
+                thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+                if thread.is_alive():
+                    print("Station timed out.")
+                    self.stop()
+                    break
+        except KeyboardInterrupt:
+            self.stop()
+        for thread in threads:
+            thread.join()
+        return logs
+
+    def run_channel(self, cell_num: int, sequencer: StepSequencer, tests: list, logs: list) -> None:
+        """
+        Runs tests on one channel, recording the error if the channel fails.
+
+        Args:
+            cell_num (int): Cell number of the channel.
+            sequencer (StepSequencer): Sequencer of the channel.
+            tests (list): Tests to run.
+            logs (list): List the paths of the test logs are added to.
+        """
+        try:
+            for test in tests:
+                if sequencer.stop_event.is_set():
+                    break
+                logs.append(sequencer.run_test(test))
+        except Exception as err:
+            self.errors[cell_num] = err
+            print(f"Cell {cell_num} stopped: {err}")
+
+    def results(self) -> dict:
+        """
+        Gets the DC IR and OCV estimated so far on every channel.
+
+        Returns:
+            dict: Results of each channel by result name, by cell number.
+        """
+        return {cell_num: dict(sequencer.results) for cell_num, sequencer in self.channels.items()}
+
+    def stop(self) -> None:
+        """
+        Stops every channel after its current sample.
+        """
+        for sequencer in self.channels.values():
+            sequencer.stop()
@@ -0,0 +1,493 @@
+"""
+Step sequencer for cell tests.
+
+Runs tests made of steps (rest, CC discharge, CC charge, IR pulse) on an
+e-load and/or PSU, and logs every test to a csv file in the format the
+data processing scripts read:
+
+OUTPUT DIRECTORY
+----> 1 (cell number, folder)
+--------> 1 Continuous_Step_Cycles Rest 2023-03-08 19-41-54.csv
+--------> 1 Continuous_Step_Cycles Single_IR_Test 2023-03-08 19-41-55.csv
+
+with the columns Timestamp (seconds since epoch), Voltage, Current
+(positive for charge, negative for discharge), Data_Timestamp (seconds
+since the test started) and Data_Timestamp_From_Step_Start (seconds since
+the step started, reset at every step and every current of an IR pulse).
+
+By default, samples are logged to a binary sample log (see sample_log.py)
+next to the csv file, which is exported to csv when the test ends. If
+the test is interrupted (e.g. by a crash), the samples logged so far can
+be exported with sample_log.export_csv.
+
+The DC IR of Single_IR_Test tests and the OCV of Rest tests are
+estimated while the test runs (see online_estimator.py), and published
+to results and the on_result callback as soon as each step ends, so a
+bad cell can be rejected without waiting for the data processing.
+
+Samples are scheduled from the start of each step (start + n * period)
+with time.monotonic, so instrument latency doesn't make the sample
+period drift. If a sample takes longer than the period, the missed
+sample times are skipped.
+
+IR pulses with hardware=True are uploaded to the e-load as a list (see
+EloadScpi.upload_list) and run by the e-load, so the currents change at
+the e-load's timing and no commands are sent to change them. The steps
+are still sampled and logged by the sequencer, from the list's start.
+
+Example:
+    sequencer = StepSequencer(1, "/data/tester1", eload=Bk8600(eload_visa_name))
+    sequencer.run_tests([
+        Test("Rest", [Rest(10)]),
+        Test("Single_IR_Test", [IrPulse([1, 5], 2)]),
+    ])
+"""
+
+import csv
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import sample_log
+from online_estimator import OnlineIrEstimator
+
+LOG_COLUMNS = sample_log.LOG_COLUMNS
+# Seconds between samples.
+DEFAULT_PERIOD = 0.1
+# Result estimated online for each test type, named as in the processed data.
+TEST_RESULTS = {
+    "Single_IR_Test": "DC IR",
+    "Rest": "OCV",
+}
+
+class Rest:
+    """
+    Class to represent a rest step, with the e-load and PSU outputs off.
+
+    Args:
+        duration (float): Length of the step in seconds.
+    """
+    def __init__(self, duration: float) -> None:
+        self.duration = duration
+
+class CcDischarge:
+    """
+    Class to represent a constant current discharge step on the e-load.
+
+    Args:
+        curr (float): Discharge current in amps (positive).
+        duration (float): Maximum length of the step in seconds.
+        cutoff_volt (float): Voltage to end the step at, None to run for the full duration.
+    """
+    def __init__(self, curr: float, duration: float, cutoff_volt: float=None) -> None:
+        self.curr = curr
+        self.duration = duration
+        self.cutoff_volt = cutoff_volt
+
+class CcCharge:
+    """
+    Class to represent a constant current, constant voltage charge step on the PSU.
+
+    Args:
+        curr (float): Charge current in amps.
+        volt (float): Charge voltage in volts.
+        duration (float): Maximum length of the step in seconds.
+        cutoff_curr (float): Current to end the step at once the cell reaches
+            the charge voltage, None to run for the full duration.
+    """
+    def __init__(self, curr: float, volt: float, duration: float, cutoff_curr: float=None) -> None:
+        self.curr = curr
+        self.volt = volt
+        self.duration = duration
+        self.cutoff_curr = cutoff_curr
+
+class ListStep:
+    """
+    Class to represent one current of a list run by the e-load, logged as a step.
+    The list is uploaded and started by its first step.
+
+    Args:
+        currents (list): Discharge currents of the list in amps (positive).
+        duration (float): Length of each current in seconds.
+        index (int): Index of the step's current in the list.
+    """
+    def __init__(self, currents: list, duration: float, index: int) -> None:
+        self.currents = currents
+        self.duration = duration
+        self.index = index
+        self.curr = currents[index]
+
+class IrPulse:
+    """
+    Class to represent an IR test: a discharge at each current in turn,
+    logged as one step per current.
+
+    Args:
+        currents (list): Discharge currents in amps (positive).
+        step_duration (float): Length of each current step in seconds.
+        hardware (bool): True to run the currents as a list timed by the e-load,
+            False to set each current from the sequencer.
+    """
+    def __init__(self, currents: list, step_duration: float, hardware: bool=False) -> None:
+        self.currents = list(currents)
+        self.step_duration = step_duration
+        self.hardware = hardware
+
+    def steps(self) -> list:
+        """
+        Gets the discharge step of each current.
+
+        Returns:
+            list: ListStep steps with hardware timing, CcDischarge steps otherwise.
+        """
+        if self.hardware:
+            return [
+                ListStep(self.currents, self.step_duration, index)
+                for index in range(len(self.currents))
+            ]
+        return [CcDischarge(curr, self.step_duration) for curr in self.currents]
+
+class Test:
+    """
+    Class to represent a test, logged to one file.
+
+    Args:
+        test_type (str): Test type in the file name, e.g. "Rest",
+            "Single_IR_Test", "Charge", "Discharge" or "Cycle".
+        steps (list): Steps of the test.
+    """
+    def __init__(self, test_type: str, steps: list) -> None:
+        self.test_type = test_type
+        self.steps = steps
+
+def log_file_name(cell_num: int, test_type: str, start: datetime) -> str:
+    """
+    Gets the name of a test log.
+
+    Args:
+        cell_num (int): Cell number.
+        test_type (str): Test type.
+        start (datetime): Start time of the test.
+
+    Returns:
+        str: File name, e.g. "1 Continuous_Step_Cycles Rest 2023-03-08 19-41-54.csv".
+    """
+    return f"{cell_num} Continuous_Step_Cycles {test_type} {start:%Y-%m-%d %H-%M-%S}.csv"
+
+def read_volt_curr(inst) -> tuple:
+    """
+    Measures the voltage and current of an instrument with a single query where supported.
+
+    Args:
+        inst (PyVisaInstrument): E-load or PSU driver.
+
+    Returns:
+        tuple: Voltage in volts and current in amps.
+    """
+    if hasattr(inst, "measure_volt_curr"):
+        measurement = inst.measure_volt_curr()
+        return measurement.volt, measurement.curr
+    if hasattr(inst, "measure_all"):
+        return inst.measure_all()[:2]
+    return inst.measure_volt(), inst.measure_curr()
+
+class StepSequencer:
+    """
+    Class to represent a sequencer running tests on one cell.
+
+    Args:
+        cell_num (int): Cell number.
+        folder (str): Output directory, logs are saved in its cell number folder.
+        eload (EloadScpi): E-load for discharge steps, None if not used.
+        psu (PsuScpi or Bk9103): PSU for charge steps, None if not used.
+        period (float): Time between samples in seconds.
+        binary_log (bool): True to log to a binary sample log and export it
+            to csv at the end of each test, False to write the csv directly.
+        on_result (callable): Called with the cell number, result name ("DC IR"
+            or "OCV") and value every time a step updates a result, None for no callback.
+
+    Attributes:
+        cell_num: Cell number.
+        folder: Folder the logs are saved in.
+        eload: E-load for discharge steps.
+        psu: PSU for charge steps.
+        period: Time between samples in seconds.
+        binary_log: True to log to a binary sample log.
+        on_result: Called with the cell number, result name and value when a result is updated.
+        results: Latest DC IR and OCV estimated during the tests, by result name.
+        estimator: OnlineIrEstimator of the running test, None if it has no result.
+        list_start: time.monotonic() when the running e-load list started, None if no list is running.
+        missed: Number of sample times skipped because a sample ran late.
+        stop_event: Set to stop the running test.
+    """
+    def __init__(
+        self,
+        cell_num: int,
+        folder: str,
+        eload=None,
+        psu=None,
+        period: float=DEFAULT_PERIOD,
+        binary_log: bool=True,
+        on_result=None
+    ) -> None:
+        self.cell_num = cell_num
+        self.folder = os.path.join(folder, str(cell_num))
+        self.eload = eload
+        self.psu = psu
+        self.period = period
+        self.binary_log = binary_log
+        self.on_result = on_result
+        self.results = {}
+        self.estimator = None
+        self.list_start = None
+        self.missed = 0
+        self.stop_event = threading.Event()
+
+    def outputs_off(self) -> None:
+        """
+        Turns the e-load input and PSU output off, and ends a running e-load list.
+        """
+        if self.eload is not None:
+            self.eload.toggle_output(False)
+            self.end_list()
+        if self.psu is not None:
+            self.psu.toggle_output(False)
+
+    def end_list(self) -> None:
+        """
+        Returns the e-load to fixed mode if a list was started.
+        """
+        if self.list_start is not None:
+            self.list_start = None
+            self.eload.set_fixed_mode()
+
+    def apply_step(self, step):
+        """
+        Sets the instruments for a step.
+
+        Args:
+            step: Rest, CcDischarge, CcCharge or ListStep step.
+
+        Returns:
+            PyVisaInstrument: Instrument to measure the step with.
+        """
+        if isinstance(step, ListStep):
+            if self.eload is None:
+                raise ValueError("List step requires an e-load.")
+            if step.index == 0:
+                if self.psu is not None:
+                    self.psu.toggle_output(False)
+                self.end_list()
+                self.list_start = self.eload.run_list(
+                    step.currents, [step.duration] * len(step.currents)
+                )
+                if self.list_start is None:
+                    raise ValueError("List couldn't be uploaded to the e-load.")
+            return self.eload
+        if isinstance(step, CcDischarge):
+            if self.eload is None:
+                raise ValueError("Discharge step requires an e-load.")
+            if self.psu is not None:
+                self.psu.toggle_output(False)
+            self.end_list()
+            if self.eload.mode != "CURR":
+                self.eload.set_const_curr_mode()
+            self.eload.set_curr(step.curr)
+            self.eload.toggle_output(True)
+            return self.eload
+        if isinstance(step, CcCharge):
+            if self.psu is None:
+                raise ValueError("Charge step requires a PSU.")
+            if self.eload is not None:
+                self.eload.toggle_output(False)
+                self.end_list()
+            if hasattr(self.psu, "set_curr_volt"):
+                self.psu.set_curr_volt(step.curr, step.volt)
+            else:
+                self.psu.set_volt(step.volt)
+                self.psu.set_curr(step.curr)
+            self.psu.toggle_output(True)
+            return self.psu
+        self.outputs_off()
+        # With the outputs off, the e-load measures the cell's open circuit voltage.
+        return self.eload if self.eload is not None else self.psu
+
+    def step_done(self, step, volt: float, curr: float) -> bool:
+        """
+        Checks if a step reached its cutoff.
+
+        Args:
+            step: Running step.
+            volt (float): Last measured voltage in volts.
+            curr (float): Last measured current in amps.
+
+        Returns:
+            bool: True if the step should end.
+        """
+        if isinstance(step, CcDischarge) and step.cutoff_volt is not None:
+            return volt <= step.cutoff_volt
+        if isinstance(step, CcCharge) and step.cutoff_curr is not None:
+            return volt >= step.volt * 0.999 and curr <= step.cutoff_curr
+        return False
+
+    def run_step(self, step, step_num: int, log, test_start: float) -> bool:
+        """
+        Runs one step, logging a sample every period.
+
+        Args:
+            step: Rest, CcDischarge, CcCharge or ListStep step.
+            step_num (int): Number of the step in the test.
+            log (callable): Function logging a sample, with the arguments of
+                sample_log.SampleLogWriter.append.
+            test_start (float): time.monotonic() at the start of the test.
+
+        Returns:
+            bool: False if the test was stopped.
+        """
+        inst = self.apply_step(step)
+        step_start = time.monotonic()
+        duration = step.duration
+        if isinstance(step, ListStep):
+            # Log the step from when the e-load changes to its current, and
+            # don't sample at its end, when the e-load may already be on the next one.
+            step_start = self.list_start + step.index * step.duration
+            duration -= self.period / 2
+            if self.stop_event.wait(max(0, step_start - time.monotonic())):
+                return False
+        sample_num = 0
+        while True:
+            before = time.time()
+            volt, curr = read_volt_curr(inst)
+            now = time.monotonic()
+            if isinstance(step, Rest):
+                curr = 0.0
+            log((before + time.time()) / 2, now - test_start, now - step_start, step_num, volt, curr)
+            if self.estimator is not None:
+                self.estimator.add_sample(now - step_start, volt, curr)
+            if self.step_done(step, volt, curr):
+                return True
+
+            # Next sample time that hasn't passed yet.
+            sample_num += 1
+            late = int((time.monotonic() - step_start) / self.period) - sample_num + 1
+            if late > 0:
+                self.missed += late
+                sample_num += late
+            next_time = step_start + sample_num * self.period
+            if next_time - step_start > duration:
+                return True
+            if self.stop_event.wait(max(0, next_time - time.monotonic())):
+                return False
+
+    def run_test(self, test: Test) -> str:
+        """
+        Runs a test and logs it to a csv file.
+        The outputs are turned off when the test ends, even if it fails.
+
+        Args:
+            test (Test): Test to run.
+
+        Returns:
+            str: Path of the test log.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        start = datetime.now()
+        path = os.path.join(self.folder, log_file_name(self.cell_num, test.test_type, start))
+        # Names only have one second resolution, don't overwrite a test started in the same second.
+        while os.path.exists(path) or os.path.exists(
+            os.path.splitext(path)[0] + sample_log.SAMPLE_LOG_EXTENSION
+        ):
+            start += timedelta(seconds=1)
+            path = os.path.join(self.folder, log_file_name(self.cell_num, test.test_type, start))
+        steps = []
+        for step in test.steps:
+            steps.extend(step.steps() if isinstance(step, IrPulse) else [step])
+        self.estimator = self.make_estimator(test.test_type)
+
+        if self.binary_log:
+            binary_path = os.path.splitext(path)[0] + sample_log.SAMPLE_LOG_EXTENSION
+            with sample_log.SampleLogWriter(binary_path) as writer:
+                self.run_steps(steps, writer.append)
+            sample_log.export_csv(binary_path, path)
+        else:
+            with open(path, 'w', newline='', encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(LOG_COLUMNS)
+                self.run_steps(
+                    steps,
+                    lambda timestamp, data_time, step_time, step_num, volt, curr: writer.writerow(
+                        [timestamp, volt, curr, data_time, step_time]
+                    ),
+                )
+        self.estimator = None
+        return path
+
+    def make_estimator(self, test_type: str) -> OnlineIrEstimator:
+        """
+        Makes the estimator of a test's result, publishing the result at the end of every step.
+
+        Args:
+            test_type (str): Test type.
+
+        Returns:
+            OnlineIrEstimator: Estimator, None if the test type has no result.
+        """
+        name = TEST_RESULTS.get(test_type)
+        if name is None:
+            return None
+
+        def publish(estimator: OnlineIrEstimator) -> None:
+            value = estimator.ir if name == "DC IR" else estimator.ocv
+            if value is None:
+                return
+            self.results[name] = value
+            if self.on_result is not None:
+                self.on_result(self.cell_num, name, value)
+
+        return OnlineIrEstimator(publish)
+
+    def run_steps(self, steps: list, log) -> None:
+        """
+        Runs the steps of a test.
+        The outputs are turned off when the steps end, even if they fail.
+
+        Args:
+            steps (list): Rest, CcDischarge, CcCharge or ListStep steps.
+            log (callable): Function logging a sample, see run_step.
+        """
+        test_start = time.monotonic()
+        try:
+            for step_num, step in enumerate(steps):
+                done = self.run_step(step, step_num, log, test_start)
+                if self.estimator is not None:
+                    self.estimator.end_step()
+                if not done:
+                    break
+        finally:
+            self.outputs_off()
+
+    def run_tests(self, tests: list) -> list:
+        """
+        Runs tests one after the other, stopping early if stop() is called.
+        A stop() from a previous run doesn't stop this one.
+
+        Args:
+            tests (list): Tests to run.
+
+        Returns:
+            list: Paths of the test logs.
+        """
+        self.stop_event.clear()
+        paths = []
+        for test in tests:
+            if self.stop_event.is_set():
+                break
+            paths.append(self.run_test(test))
+        return paths
+
+    def stop(self) -> None:
+        """
+        Stops the running test after the current sample.
+        """
+        self.stop_event.set()